@@ -0,0 +1,272 @@
+import base64
+import json
+import logging
+import zlib
+from abc import ABC, abstractmethod
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional, Type
+
+from dapr.serializers import DefaultJSONSerializer
+
+try:
+    import zstandard
+except ImportError:  # pragma: no cover
+    # Zstandard compression is only available if the package is installed.
+    zstandard = None
+
+from py_a2a_dapr import metrics
+from py_a2a_dapr.model.echo_task import EchoResponse
+
+logger = logging.getLogger(__name__)
+
+
+class PlainJSONSerializer(DefaultJSONSerializer):
+    """
+    A serializer that deserializes JSON as it is. Unlike the default serializer,
+    it does not turn strings that look like timestamps or durations into objects,
+    and it uses the faster native JSON decoder.
+    """
+
+    def deserialize(
+        self,
+        data: bytes,
+        data_type: Optional[Type] = object,
+        custom_hook: Optional[Callable[[bytes], object]] = None,
+    ) -> Any:
+        if not isinstance(data, (str, bytes)):
+            raise ValueError("data must be str or bytes types")
+        obj = json.loads(data)
+        return custom_hook(obj) if callable(custom_hook) else obj
+
+
+class HistoryCodec(ABC):
+    """
+    Encodes a segment of history as a value to be stored in the actor state. Entries
+    that are no longer retained are encoded as None.
+    """
+
+    name: str
+
+    @abstractmethod
+    def encode(self, entries: List[Optional[EchoResponse]]) -> Any: ...
+
+    @abstractmethod
+    def decode(self, value: Any) -> List[Optional[EchoResponse]]: ...
+
+    @abstractmethod
+    def can_decode(self, value: Any) -> bool: ...
+
+
+class JSONStringHistoryCodec(HistoryCodec):
+    """
+    Each entry is stored as a JSON string, which is escaped again when the segment
+    is stored.
+    """
+
+    name = "json"
+
+    def encode(self, entries: List[Optional[EchoResponse]]) -> Any:
+        return [entry.model_dump_json() if entry else None for entry in entries]
+
+    def decode(self, value: Any) -> List[Optional[EchoResponse]]:
+        return [
+            EchoResponse.model_validate_json(entry) if entry else None
+            for entry in value
+        ]
+
+    def can_decode(self, value: Any) -> bool:
+        return isinstance(value, list) and all(
+            entry is None or isinstance(entry, str) for entry in value
+        )
+
+
+class TupleHistoryCodec(HistoryCodec):
+    """
+    Each entry is stored as an array of its fields, without field names or a second
+    level of encoding. The state must be deserialized with the PlainJSONSerializer,
+    or user inputs that look like timestamps or durations are not read back as is.
+    """
+
+    name = "tuple"
+
+    def encode(self, entries: List[Optional[EchoResponse]]) -> Any:
+        return [
+            [
+                entry.user_input,
+                entry.output,
+                entry.timestamp.isoformat(),
+                entry.actor_id,
+            ]
+            if entry
+            else None
+            for entry in entries
+        ]
+
+    def decode(self, value: Any) -> List[Optional[EchoResponse]]:
+        return [
+            EchoResponse(
+                user_input=entry[0],
+                output=entry[1],
+                timestamp=datetime.fromisoformat(entry[2]),
+                actor_id=entry[3],
+            )
+            if entry
+            else None
+            for entry in value
+        ]
+
+    def can_decode(self, value: Any) -> bool:
+        return isinstance(value, list) and all(
+            entry is None or isinstance(entry, list) for entry in value
+        )
+
+
+HISTORY_CODECS: Dict[str, HistoryCodec] = {
+    codec.name: codec for codec in (JSONStringHistoryCodec(), TupleHistoryCodec())
+}
+
+
+def get_history_codec(name: str) -> HistoryCodec:
+    if name not in HISTORY_CODECS:
+        raise ValueError(
+            f"Unknown history codec '{name}', expected one of: {', '.join(HISTORY_CODECS)}"
+        )
+    return HISTORY_CODECS[name]
+
+
+def detect_history_codec(value: Any) -> HistoryCodec:
+    """
+    Find the codec with which a stored segment was encoded.
+    """
+    for codec in HISTORY_CODECS.values():
+        if codec.can_decode(value):
+            return codec
+    raise ValueError("The stored history segment cannot be decoded.")
+
+
+class StateCompression(ABC):
+    """
+    Compresses large state values, which are then stored as a string tagged with
+    the name of the compression.
+    """
+
+    name: str
+
+    @abstractmethod
+    def compress(self, data: bytes) -> bytes: ...
+
+    @abstractmethod
+    def decompress(self, data: bytes) -> bytes: ...
+
+
+class ZlibStateCompression(StateCompression):
+    name = "zlib"
+
+    def compress(self, data: bytes) -> bytes:
+        return zlib.compress(data)
+
+    def decompress(self, data: bytes) -> bytes:
+        return zlib.decompress(data)
+
+
+class ZstdStateCompression(StateCompression):
+    name = "zstd"
+
+    def compress(self, data: bytes) -> bytes:
+        if zstandard is None:
+            raise ValueError("The zstandard package is required for zstd compression.")
+        return zstandard.compress(data)
+
+    def decompress(self, data: bytes) -> bytes:
+        if zstandard is None:
+            raise ValueError("The zstandard package is required for zstd compression.")
+        return zstandard.decompress(data)
+
+
+STATE_COMPRESSIONS: Dict[str, StateCompression] = {
+    compression.name: compression
+    for compression in (ZlibStateCompression(), ZstdStateCompression())
+}
+
+
+def get_state_compression(name: str) -> Optional[StateCompression]:
+    """
+    Get the compression of the given name, or None if the name is none.
+    """
+    if name == "none":
+        return None
+    if name not in STATE_COMPRESSIONS:
+        raise ValueError(
+            f"Unknown state compression '{name}', expected none or one of: {', '.join(STATE_COMPRESSIONS)}"
+        )
+    if name == ZstdStateCompression.name and zstandard is None:
+        raise ValueError("The zstandard package is required for zstd compression.")
+    return STATE_COMPRESSIONS[name]
+
+
+class CompressionStats:
+    """
+    Running totals of the sizes of the state values that were compressed.
+    """
+
+    def __init__(self):
+        self.values = 0
+        self.uncompressed_bytes = 0
+        self.compressed_bytes = 0
+
+    @property
+    def ratio(self) -> float:
+        """
+        The ratio of uncompressed to compressed size, over all compressed values.
+        """
+        return (
+            self.uncompressed_bytes / self.compressed_bytes
+            if self.compressed_bytes
+            else 1.0
+        )
+
+    def record(self, uncompressed_size: int, compressed_size: int) -> None:
+        self.values += 1
+        self.uncompressed_bytes += uncompressed_size
+        self.compressed_bytes += compressed_size
+
+
+compression_stats = CompressionStats()
+
+
+def compress_state_value(
+    value: Any, compression: Optional[StateCompression], threshold: int
+) -> Any:
+    """
+    Compress a state value if its JSON encoding is larger than the threshold.
+    """
+    if compression is None:
+        return value
+    data = json.dumps(value, separators=(",", ":")).encode()
+    if len(data) <= threshold:
+        return value
+    compressed = (
+        f"{compression.name}:{base64.b64encode(compression.compress(data)).decode()}"
+    )
+    compression_stats.record(len(data), len(compressed))
+    metrics.STATE_COMPRESSED_VALUES.inc()
+    metrics.STATE_UNCOMPRESSED_BYTES.inc(len(data))
+    metrics.STATE_COMPRESSED_BYTES.inc(len(compressed))
+    logger.debug(
+        f"Compressed a state value of {len(data)} bytes to {len(compressed)} bytes "
+        f"with {compression.name}, overall compression ratio {compression_stats.ratio:.2f}"
+    )
+    return compressed
+
+
+def decompress_state_value(value: Any) -> Any:
+    """
+    Decompress a state value if it was compressed, whatever the compression that
+    is currently configured.
+    """
+    if not isinstance(value, str):
+        return value
+    name, _, data = value.partition(":")
+    if name not in STATE_COMPRESSIONS:
+        raise ValueError(f"Unknown state compression '{name}' of a stored value.")
+    return json.loads(STATE_COMPRESSIONS[name].decompress(base64.b64decode(data)))
@@ -1,8 +1,44 @@
-from datetime import datetime
+import asyncio
+from bisect import bisect_left, bisect_right
+from datetime import datetime, timedelta
+import hashlib
 import logging
 from abc import abstractmethod
-from dapr.actor import Actor, ActorInterface, actormethod
-from py_a2a_dapr.model.echo_task import EchoInput, EchoResponse, EchoResponseWithHistory
+import json
+from typing import Any, List, Optional
+from dapr.actor import (
+    Actor,
+    ActorId,
+    ActorInterface,
+    ActorProxy,
+    ActorProxyFactory,
+    Remindable,
+    actormethod,
+)
+from dapr.actor.client.proxy import ActorFactoryBase
+
+from py_a2a_dapr import env, metrics
+from py_a2a_dapr.actor.codec import (
+    JSONStringHistoryCodec,
+    compress_state_value,
+    decompress_state_value,
+    detect_history_codec,
+    get_history_codec,
+    get_state_compression,
+)
+from py_a2a_dapr.actor.thread_index import (
+    ThreadIndexActor,
+    ThreadIndexActorInterface,
+    thread_index_shard,
+)
+from py_a2a_dapr.model.echo_task import (
+    EchoHistoryHead,
+    EchoHistoryInput,
+    EchoHistoryPage,
+    EchoInput,
+    EchoResponse,
+    EchoResponseWithHistory,
+)
 
 
 class EchoTaskActorInterface(ActorInterface):
@@ -12,7 +48,7 @@ class EchoTaskActorInterface(ActorInterface):
 
     @abstractmethod
     @actormethod(name="History")
-    async def history(self) -> list | None: ...
+    async def history(self, data: dict | None = None) -> dict | None: ...
 
     @abstractmethod
     @actormethod(name="DeleteHistory")
@@ -26,23 +62,368 @@ class EchoTaskActorInterface(ActorInterface):
 logger = logging.getLogger(__name__)
 
 
-class EchoTaskActor(Actor, EchoTaskActorInterface):
+class EchoTaskActor(Actor, EchoTaskActorInterface, Remindable):
+    # Shared by all instances, since creating a factory waits for the sidecar.
+    _thread_index_proxy_factory: ActorFactoryBase | None = None
+
     def __init__(self, ctx, actor_id):
         super().__init__(ctx, actor_id)
         self._cancelled = False
         self._history_key = "echo_history"
+        self._history_head_key = f"{self._history_key}:head"
+        self._history_segment_size = env.int("APP_ECHO_HISTORY_SEGMENT_SIZE", 64)
+        # Segments stored with another codec are migrated when they are read.
+        self._history_codec = get_history_codec(
+            env.str("APP_ECHO_HISTORY_CODEC", JSONStringHistoryCodec.name)
+        )
+        self._history_segments_to_migrate: List[int] = []
+        # Segments whose encoding exceeds the threshold (in bytes) are compressed.
+        self._history_compression = get_state_compression(
+            env.str("APP_ECHO_HISTORY_COMPRESSION", "none")
+        )
+        self._history_compression_threshold = env.int(
+            "APP_ECHO_HISTORY_COMPRESSION_THRESHOLD", 1024
+        )
+        # Retention policies for the history, none of which apply unless set.
+        self._history_max_entries: Optional[int] = env.int(
+            "APP_ECHO_HISTORY_MAX_ENTRIES", None
+        )
+        self._history_max_bytes: Optional[int] = env.int(
+            "APP_ECHO_HISTORY_MAX_BYTES", None
+        )
+        self._history_max_age: Optional[timedelta] = env.timedelta(
+            "APP_ECHO_HISTORY_MAX_AGE", None
+        )
+        self._history_retention_interval: timedelta = env.timedelta(
+            "APP_ECHO_HISTORY_RETENTION_INTERVAL", timedelta(minutes=5)
+        )
+        self._history_retention_reminder = f"{self._history_key}:retention"
+        self._history_retention_reminder_registered = False
+        # Threads with a history are recorded in an index, so that they can be
+        # found by prefix for bulk operations.
+        self._thread_index_enabled = env.bool("APP_ECHO_THREAD_INDEX", True)
+        self._thread_index_timeout: timedelta = env.timedelta(
+            "APP_ECHO_THREAD_INDEX_TIMEOUT", timedelta(seconds=5)
+        )
+        # Whether the thread still has to be added to the index, after it failed.
+        self._thread_index_pending = False
+        # Decoded history kept resident while the actor is active, so that
+        # repeated calls neither re-read nor re-parse the stored segments.
+        self._history_head: EchoHistoryHead | None = None
+        self._history: List[EchoResponse] | None = None
+        self._history_size = 0
 
     async def _on_activate(self) -> None:
+        metrics.ACTIVE_ACTORS.labels(self.__class__.__name__).inc()
+        await self._load_resident_history()
         logger.debug(f"{self.__class__.__name__} activated")
 
     async def _on_deactivate(self) -> None:
+        metrics.ACTIVE_ACTORS.labels(self.__class__.__name__).dec()
+        self._history_head = None
+        self._history = None
         logger.debug(f"{self.__class__.__name__} deactivated")
 
+    def _history_segment_key(self, segment: int) -> str:
+        return f"{self._history_key}:{segment}"
+
+    @staticmethod
+    def _chain_history_digest(digest: str, message: EchoResponse) -> str:
+        """
+        Chain the hash of the history so far with an appended entry, so that the
+        content of the history is versioned without hashing all of it again.
+        """
+        return hashlib.blake2b(
+            f"{digest}{message.model_dump_json()}".encode(), digest_size=16
+        ).hexdigest()
+
+    async def _get_history_head(self) -> EchoHistoryHead:
+        """
+        Load the history head, migrating any history stored as a single list
+        under the legacy key into segments on first access.
+        """
+        has_head, head = await self._state_manager.try_get_state(self._history_head_key)
+        if has_head:
+            return EchoHistoryHead.model_validate(head)
+        head = EchoHistoryHead(segment_size=self._history_segment_size)
+        has_legacy, legacy_history = await self._state_manager.try_get_state(
+            self._history_key
+        )
+        if has_legacy and legacy_history:
+            logger.debug(
+                f"Migrating {len(legacy_history)} legacy history entries for actor {self.id}"
+            )
+            for start in range(0, len(legacy_history), head.segment_size):
+                segment_history = JSONStringHistoryCodec().decode(
+                    legacy_history[start : start + head.segment_size]
+                )
+                await self._state_manager.set_state(
+                    self._history_segment_key(start // head.segment_size),
+                    compress_state_value(
+                        self._history_codec.encode(segment_history),
+                        self._history_compression,
+                        self._history_compression_threshold,
+                    ),
+                )
+                for item in segment_history:
+                    head.digest = self._chain_history_digest(head.digest, item)
+            head.count = len(legacy_history)
+            await self._state_manager.remove_state(self._history_key)
+            await self._state_manager.set_state(
+                self._history_head_key, head.model_dump()
+            )
+            await self._state_manager.save_state()
+            # Histories stored before the index existed are indexed as migrated.
+            self._thread_index_pending = not await self._update_thread_index("Add")
+        return head
+
+    async def _get_history_segment(self, segment: int) -> List[EchoResponse | None]:
+        has_segment, value = await self._state_manager.try_get_state(
+            self._history_segment_key(segment)
+        )
+        if not has_segment or not value:
+            return []
+        value = decompress_state_value(value)
+        codec = detect_history_codec(value)
+        if codec is not self._history_codec:
+            self._history_segments_to_migrate.append(segment)
+        return codec.decode(value)
+
+    async def _load_history(self, head: EchoHistoryHead) -> List[EchoResponse | None]:
+        history: List[EchoResponse | None] = []
+        for segment in head.segments:
+            history.extend(await self._get_history_segment(segment))
+        # The oldest segment may still hold entries that are no longer retained.
+        return history[head.first % head.segment_size :] if history else history
+
+    async def _load_resident_history(self) -> List[EchoResponse]:
+        if self._history is None or self._history_head is None:
+            self._history_segments_to_migrate = []
+            self._history_head = await self._get_history_head()
+            self._history = [
+                item
+                for item in await self._load_history(self._history_head)
+                if item is not None
+            ]
+            self._history_size = sum(
+                len(item.model_dump_json()) for item in self._history
+            )
+            if self._history_segments_to_migrate:
+                await self._migrate_history_segments()
+        return self._history
+
+    async def _migrate_history_segments(self) -> None:
+        """
+        Rewrite the segments that were read with a codec other than the configured
+        one, so that each segment is migrated when it is first read.
+        """
+        logger.debug(
+            f"Migrating {len(self._history_segments_to_migrate)} history segments "
+            f"for actor {self.id} to the {self._history_codec.name} codec"
+        )
+        try:
+            for segment in self._history_segments_to_migrate:
+                await self._state_manager.set_state(
+                    self._history_segment_key(segment),
+                    self._history_segment_values(segment),
+                )
+            await self._state_manager.save_state()
+        except Exception:
+            self._history = None
+            raise
+        self._history_segments_to_migrate = []
+
+    def _history_segment_values(self, segment: int) -> Any:
+        """
+        Encode the stored value of a segment from the resident history. Entries
+        of the segment that are no longer retained are stored as None.
+        """
+        assert self._history is not None and self._history_head is not None
+        head = self._history_head
+        start = segment * head.segment_size
+        return compress_state_value(
+            self._history_codec.encode(
+                [None] * max(head.first - start, 0)
+                + self._history[
+                    max(start - head.first, 0) : start + head.segment_size - head.first
+                ]
+            ),
+            self._history_compression,
+            self._history_compression_threshold,
+        )
+
+    def _trim_history(self, now: datetime) -> List[int]:
+        """
+        Drop the oldest resident entries that exceed the retention policies and
+        return the segments that no longer hold any retained entries. The most
+        recent entry is never dropped for exceeding the size limit.
+        """
+        assert self._history is not None and self._history_head is not None
+        history = self._history
+        drop = 0
+        if self._history_max_entries:
+            drop = max(drop, len(history) - self._history_max_entries)
+        if self._history_max_age:
+            drop = max(
+                drop,
+                bisect_left(
+                    history,
+                    now - self._history_max_age,
+                    key=lambda item: item.timestamp,
+                ),
+            )
+        dropped_size = sum(len(item.model_dump_json()) for item in history[:drop])
+        if self._history_max_bytes:
+            while (
+                drop < len(history) - 1
+                and self._history_size - dropped_size > self._history_max_bytes
+            ):
+                dropped_size += len(history[drop].model_dump_json())
+                drop += 1
+        if drop == 0:
+            return []
+        segments = self._history_head.segments
+        self._history_head.first += drop
+        del history[:drop]
+        self._history_size -= dropped_size
+        logger.debug(f"Trimmed {drop} history entries for actor {self.id}")
+        return [
+            segment
+            for segment in segments
+            if segment not in self._history_head.segments
+        ]
+
+    async def _update_thread_index(self, method: str) -> bool:
+        """
+        Add the thread to the index or remove it from the index, and return whether
+        that succeeded. Failures are only logged, since the index merely serves to
+        find threads for bulk operations.
+        """
+        if not self._thread_index_enabled:
+            return True
+        if EchoTaskActor._thread_index_proxy_factory is None:
+            EchoTaskActor._thread_index_proxy_factory = ActorProxyFactory()
+        proxy = ActorProxy.create(
+            actor_type=ThreadIndexActor.__name__,
+            actor_id=ActorId(actor_id=thread_index_shard(str(self.id))),
+            actor_interface=ThreadIndexActorInterface,
+            actor_proxy_factory=EchoTaskActor._thread_index_proxy_factory,
+        )
+        try:
+            await asyncio.wait_for(
+                proxy.invoke_method(
+                    method=method, raw_body=json.dumps(str(self.id)).encode()
+                ),
+                self._thread_index_timeout.total_seconds(),
+            )
+        except Exception as e:
+            logger.warning(
+                f"Could not update the thread index with {method} for actor {self.id}. "
+                f"{str(e) or e.__class__.__name__}"
+            )
+            return False
+        return True
+
+    async def _remove_history_segments(self, segments: List[int]) -> None:
+        for segment in segments:
+            await self._state_manager.try_remove_state(
+                self._history_segment_key(segment)
+            )
+
+    async def _append_history(self, message: EchoResponse) -> None:
+        """
+        Append a message by rewriting only the tail segment and the head, and
+        enforce the retention policies incrementally. The tail segment is rebuilt
+        from the resident history, so nothing is read back.
+        """
+        history = await self._load_resident_history()
+        assert self._history_head is not None
+        if self._history_head.retained == 0:
+            # The first entry of the history, which makes the thread worth indexing.
+            self._thread_index_pending = True
+        try:
+            segment = self._history_head.count // self._history_head.segment_size
+            history.append(message)
+            self._history_head.count += 1
+            self._history_head.digest = self._chain_history_digest(
+                self._history_head.digest, message
+            )
+            self._history_size += len(message.model_dump_json())
+            await self._remove_history_segments(self._trim_history(message.timestamp))
+            await self._state_manager.set_state(
+                self._history_segment_key(segment),
+                self._history_segment_values(segment),
+            )
+            await self._state_manager.set_state(
+                self._history_head_key, self._history_head.model_dump()
+            )
+            await self._state_manager.save_state()
+        except Exception:
+            # Reload from the state store on the next call rather than serve
+            # a resident copy that may not have been saved.
+            self._history = None
+            raise
+        if self._thread_index_pending:
+            # Indexed once the entry is saved, and otherwise with the next entry.
+            self._thread_index_pending = not await self._update_thread_index("Add")
+        metrics.ECHO_HISTORY_ENTRIES.observe(len(history))
+        metrics.ECHO_HISTORY_BYTES.observe(self._history_size)
+        if self._history_max_age and not self._history_retention_reminder_registered:
+            await self.register_reminder(
+                name=self._history_retention_reminder,
+                # The state must not be empty, or the reminder cannot be fired.
+                state=self._history_retention_reminder.encode(),
+                due_time=self._history_retention_interval,
+                period=self._history_retention_interval,
+            )
+            self._history_retention_reminder_registered = True
+
+    async def receive_reminder(
+        self,
+        name: str,
+        state: bytes,
+        due_time: timedelta,
+        period: timedelta,
+        ttl: Optional[timedelta] = None,
+    ) -> None:
+        if name != self._history_retention_reminder:
+            return
+        await self._load_resident_history()
+        assert self._history_head is not None
+        first = self._history_head.first
+        try:
+            await self._remove_history_segments(self._trim_history(datetime.now()))
+            if self._history_head.first == first:
+                return
+            if self._history_head.segments:
+                # Compact the oldest segment, which may hold entries that are no
+                # longer retained.
+                oldest_segment = self._history_head.segments[0]
+                await self._state_manager.set_state(
+                    self._history_segment_key(oldest_segment),
+                    self._history_segment_values(oldest_segment),
+                )
+            await self._state_manager.set_state(
+                self._history_head_key, self._history_head.model_dump()
+            )
+            await self._state_manager.save_state()
+        except Exception:
+            self._history = None
+            raise
+        if self._history_head.retained == 0:
+            # Nothing left to expire until the next echo registers it again.
+            await self.unregister_reminder(self._history_retention_reminder)
+            self._history_retention_reminder_registered = False
+            # A thread without a history is no longer found by bulk operations.
+            self._thread_index_pending = False
+            await self._update_thread_index("Remove")
+
     async def echo(self, data: dict | None = None) -> dict | None:
         if self._cancelled:
             return None
         logger.debug(f"Echo called on actor {self.id} with data: {data}")
-        history = await self._state_manager.get_or_add_state(self._history_key, [])
+        history = await self._load_resident_history()
+        assert self._history_head is not None
         timestamp = datetime.now()
         input_data = EchoInput.model_validate(data) if data else None
         if not input_data or input_data.user_input.strip() == "":
@@ -56,33 +437,94 @@ class EchoTaskActor(Actor, EchoTaskActorInterface):
             timestamp=timestamp,
             actor_id=str(self.id),
         )
+        tail_length = input_data.history_tail_length if input_data else None
+        first = 0 if tail_length is None else max(len(history) - tail_length, 0)
         response = EchoResponseWithHistory(
             current=current,
-            past=[EchoResponse.model_validate_json(message) for message in history],
+            past=history[first:],
+            total=len(history),
+            seq=self._history_head.count,
         )
-        history.append(current.model_dump_json())
-        await self._state_manager.set_state(self._history_key, history)
-        await self._state_manager.save_state()
+        await self._append_history(current)
+        response.etag = self._history_head.etag
         return response.model_dump()
 
-    async def history(self) -> list | None:
+    async def history(self, data: dict | None = None) -> dict | None:
         if self._cancelled:
             return None
-        logger.debug(f"History called on actor {self.id}")
-        history = await self._state_manager.get_or_add_state(self._history_key, [])
-        history_validated = [
-            EchoResponse.model_validate_json(message) for message in history
-        ]
-        response = [item.model_dump() for item in history_validated]
-        return response
+        logger.debug(f"History called on actor {self.id} with data: {data}")
+        history = await self._load_resident_history()
+        assert self._history_head is not None
+        query = (
+            EchoHistoryInput.model_validate(data)
+            if data
+            else EchoHistoryInput(thread_id=str(self.id))
+        )
+        etag = self._history_head.etag
+        if query.if_none_match == etag:
+            return EchoHistoryPage(
+                past=[],
+                total=len(history),
+                seq=self._history_head.count,
+                etag=etag,
+                not_modified=True,
+            ).model_dump()
+        lower = 0
+        if query.since_seq is not None:
+            lower = min(
+                max(query.since_seq - self._history_head.first, 0), len(history)
+            )
+        if query.since:
+            since = query.since
+            if since.tzinfo is not None:
+                # Stored timestamps are naive local times.
+                since = since.astimezone().replace(tzinfo=None)
+            lower = max(
+                lower,
+                bisect_right(history, since, key=lambda item: item.timestamp),
+            )
+        # Cursors are sequence numbers, which stay valid as old entries are trimmed.
+        upper = (
+            len(history)
+            if query.cursor is None
+            else min(max(query.cursor - self._history_head.first, 0), len(history))
+        )
+        start = max(lower, upper - query.limit) if query.limit else lower
+        start = min(start, upper)
+        response = EchoHistoryPage(
+            past=history[start:upper],
+            total=len(history),
+            next_cursor=self._history_head.first + start if start > lower else None,
+            seq=self._history_head.first + start,
+            etag=etag,
+        )
+        return response.model_dump()
 
     async def delete_history(self) -> str | None:
         if self._cancelled:
             return None
         logger.debug(f"DeleteHistory called on actor {self.id}")
-        if await self._state_manager.contains_state(self._history_key):
-            await self._state_manager.remove_state(self._history_key)
+        await self._load_resident_history()
+        assert self._history_head is not None
+        if self._history_head.retained > 0:
+            await self._remove_history_segments(list(self._history_head.segments))
+            # The head is kept, so that sequence numbers keep increasing and clients
+            # that synchronised with the deleted history notice that it changed.
+            head = self._history_head.model_copy(
+                update={"first": self._history_head.count}
+            )
+            await self._state_manager.set_state(
+                self._history_head_key, head.model_dump()
+            )
             await self._state_manager.save_state()
+            self._history_head = head
+            self._history = []
+            self._history_size = 0
+            if self._history_max_age:
+                await self.unregister_reminder(self._history_retention_reminder)
+                self._history_retention_reminder_registered = False
+            self._thread_index_pending = False
+            await self._update_thread_index("Remove")
             logger.debug(f"History deleted for actor {self.id}")
             return f"History was deleted successfully for {self.id}."
         else:
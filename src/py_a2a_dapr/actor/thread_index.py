@@ -0,0 +1,198 @@
+from bisect import bisect_left, bisect_right, insort
+import logging
+from abc import abstractmethod
+from typing import Dict, List
+from zlib import crc32
+
+from dapr.actor import Actor, ActorInterface, actormethod
+
+from py_a2a_dapr import env, metrics
+from py_a2a_dapr.model.echo_task import ThreadIndexHead
+
+
+def thread_index_shards() -> int:
+    return env.int("APP_ECHO_THREAD_INDEX_SHARDS", 16)
+
+
+def thread_index_shard(thread_id: str) -> str:
+    """
+    The ID of the index actor that records a thread. The shard is derived from a
+    stable checksum, so that it does not change between processes.
+    """
+    return str(crc32(thread_id.encode()) % thread_index_shards())
+
+
+class ThreadIndexActorInterface(ActorInterface):
+    @abstractmethod
+    @actormethod(name="Add")
+    async def add(self, thread_id: str) -> None: ...
+
+    @abstractmethod
+    @actormethod(name="Remove")
+    async def remove(self, thread_id: str) -> None: ...
+
+    @abstractmethod
+    @actormethod(name="Find")
+    async def find(self, prefix: str) -> List[str]: ...
+
+
+logger = logging.getLogger(__name__)
+
+
+class ThreadIndexActor(Actor, ThreadIndexActorInterface):
+    """
+    One shard of an index of the IDs of threads that have a history, kept sorted
+    so that threads can be found by prefix. The IDs are stored in sorted segments
+    of bounded size, so that adding or removing a thread rewrites one segment, and
+    the head only when a segment is split or dropped.
+    """
+
+    def __init__(self, ctx, actor_id):
+        super().__init__(ctx, actor_id)
+        self._thread_ids_key = "thread_ids"
+        self._head_key = f"{self._thread_ids_key}:head"
+        self._segment_size = env.int("APP_ECHO_THREAD_INDEX_SEGMENT_SIZE", 256)
+        # The head and the segments read so far are kept resident while the actor
+        # is active.
+        self._head: ThreadIndexHead | None = None
+        self._head_stored = False
+        self._segments: Dict[int, List[str]] = {}
+
+    async def _on_activate(self) -> None:
+        metrics.ACTIVE_ACTORS.labels(self.__class__.__name__).inc()
+
+    async def _on_deactivate(self) -> None:
+        metrics.ACTIVE_ACTORS.labels(self.__class__.__name__).dec()
+        self._head = None
+        self._segments = {}
+
+    def _segment_key(self, segment: int) -> str:
+        return f"{self._thread_ids_key}:{segment}"
+
+    async def _load_head(self) -> ThreadIndexHead:
+        """
+        Load the head, migrating any thread IDs stored as a single list under the
+        legacy key into segments on first access.
+        """
+        if self._head is not None:
+            return self._head
+        has_head, head = await self._state_manager.try_get_state(self._head_key)
+        self._head_stored = has_head
+        if has_head:
+            self._head = ThreadIndexHead.model_validate(head)
+            return self._head
+        self._head = ThreadIndexHead()
+        self._segments = {0: []}
+        has_legacy, thread_ids = await self._state_manager.try_get_state(
+            self._thread_ids_key
+        )
+        if has_legacy and thread_ids:
+            logger.debug(
+                f"Migrating {len(thread_ids)} legacy thread IDs for index shard {self.id}"
+            )
+            self._head = ThreadIndexHead(bounds=[], segments=[], next_segment=0)
+            for start in range(0, len(thread_ids), self._segment_size):
+                segment = self._head.next_segment
+                self._head.next_segment += 1
+                self._head.bounds.append(thread_ids[start] if start else "")
+                self._head.segments.append(segment)
+                self._segments[segment] = thread_ids[start : start + self._segment_size]
+            await self._state_manager.remove_state(self._thread_ids_key)
+            await self._save(list(self._segments))
+        return self._head
+
+    async def _load_segment(self, segment: int) -> List[str]:
+        if segment not in self._segments:
+            has_segment, thread_ids = await self._state_manager.try_get_state(
+                self._segment_key(segment)
+            )
+            self._segments[segment] = thread_ids if has_segment and thread_ids else []
+        return self._segments[segment]
+
+    async def _save(self, segments: List[int], save_head: bool = False) -> None:
+        try:
+            for segment in segments:
+                await self._state_manager.set_state(
+                    self._segment_key(segment), self._segments[segment]
+                )
+            if save_head or not self._head_stored:
+                assert self._head is not None
+                await self._state_manager.set_state(
+                    self._head_key, self._head.model_dump()
+                )
+            await self._state_manager.save_state()
+            self._head_stored = True
+        except Exception:
+            # Reload from the state store on the next call rather than serve a
+            # resident copy that may not have been saved.
+            self._head = None
+            self._segments = {}
+            raise
+
+    async def _find_segment(self, thread_id: str) -> int:
+        """
+        The position in the head of the segment whose range holds the thread ID.
+        """
+        head = await self._load_head()
+        return max(bisect_right(head.bounds, thread_id) - 1, 0)
+
+    async def add(self, thread_id: str) -> None:
+        head = await self._load_head()
+        position = await self._find_segment(thread_id)
+        segment = head.segments[position]
+        thread_ids = await self._load_segment(segment)
+        index = bisect_left(thread_ids, thread_id)
+        if index < len(thread_ids) and thread_ids[index] == thread_id:
+            return
+        insort(thread_ids, thread_id)
+        if len(thread_ids) <= self._segment_size:
+            await self._save([segment])
+        else:
+            # Split the full segment in two, which adds a range to the head.
+            half = len(thread_ids) // 2
+            new_segment = head.next_segment
+            head.next_segment += 1
+            self._segments[new_segment] = thread_ids[half:]
+            del thread_ids[half:]
+            head.bounds.insert(position + 1, self._segments[new_segment][0])
+            head.segments.insert(position + 1, new_segment)
+            await self._save([segment, new_segment], save_head=True)
+        logger.debug(f"Thread {thread_id} added to index shard {self.id}")
+
+    async def remove(self, thread_id: str) -> None:
+        head = await self._load_head()
+        position = await self._find_segment(thread_id)
+        segment = head.segments[position]
+        thread_ids = await self._load_segment(segment)
+        index = bisect_left(thread_ids, thread_id)
+        if index == len(thread_ids) or thread_ids[index] != thread_id:
+            return
+        del thread_ids[index]
+        if thread_ids or len(head.segments) == 1:
+            await self._save([segment])
+        else:
+            # Drop the empty segment, whose range is then covered by the one before
+            # it, or by the next one if it was the first.
+            del head.bounds[position]
+            del head.segments[position]
+            head.bounds[0] = ""
+            del self._segments[segment]
+            await self._state_manager.try_remove_state(self._segment_key(segment))
+            await self._save([], save_head=True)
+        logger.debug(f"Thread {thread_id} removed from index shard {self.id}")
+
+    async def find(self, prefix: str) -> List[str]:
+        head = await self._load_head()
+        matches: List[str] = []
+        first = await self._find_segment(prefix)
+        for position in range(first, len(head.segments)):
+            # Past the first segment, a segment can only hold matches if its lowest
+            # thread ID does.
+            if position > first and not head.bounds[position].startswith(prefix):
+                break
+            thread_ids = await self._load_segment(head.segments[position])
+            for thread_id in thread_ids[bisect_left(thread_ids, prefix) :]:
+                if not thread_id.startswith(prefix):
+                    return matches
+                matches.append(thread_id)
+        return matches
@@ -1,7 +1,11 @@
+from datetime import datetime
+import asyncio
 from functools import partial
 import logging
+import sys
+import time
 
-from typing import List
+from typing import Any, AsyncIterator, Dict, List, Optional
 from uuid import uuid4
 from asyncer import syncify
 
@@ -10,24 +14,28 @@ from rich import print_json
 
 from a2a.utils import get_message_text
 
-import httpx
-
 from py_a2a_dapr import env
 
-from a2a.client import A2ACardResolver, ClientFactory, ClientConfig
 from a2a.types import (
-    AgentCard,
     Message,
-)
-from a2a.utils.constants import (
-    AGENT_CARD_WELL_KNOWN_PATH,
+    Task,
+    TaskQueryParams,
+    TaskState,
 )
 
+from py_a2a_dapr.client.batch import run_echo_batch
+from py_a2a_dapr.client.bench import parse_skill_mix, run_benchmark
+from py_a2a_dapr.client.connection import connect
+from py_a2a_dapr.client.streaming import iter_artifact_data, merge_history_pages
+from py_a2a_dapr.server.task_store import is_task_finished
 from py_a2a_dapr.model.echo_task import (
+    BatchEchoInput,
     DeleteEchoHistoryInput,
     EchoAgentA2AInputMessage,
+    EchoAgentArtifacts,
     EchoAgentSkills,
     EchoHistoryInput,
+    EchoHistoryPage,
     EchoInput,
     EchoResponse,
     EchoResponseWithHistory,
@@ -73,40 +81,22 @@ async def echo_a2a_echo(
         default=str(uuid4()),
         help="A thread ID to identify your conversation. If not specified, a random UUID will be used.",
     ),
+    history_mode: str = typer.Option(
+        default="none",
+        help="How much of the past history to include in the response: none, full or tail:N for the last N messages. Use echo-a2a-history to retrieve the history separately.",
+    ),
 ) -> None:
     """
     Query the echo A2A endpoint with a message and print the response.
     """
 
-    async with httpx.AsyncClient() as httpx_client:
-        # initialise A2ACardResolver
-        resolver = A2ACardResolver(
-            httpx_client=httpx_client,
-            base_url=base_url,
-            # agent_card_path uses default, extended_agent_card_path also uses default
-        )
-        final_agent_card_to_use: AgentCard | None = None
-
-        logger.info(
-            f"Attempting to fetch public agent card from: {base_url}{AGENT_CARD_WELL_KNOWN_PATH}"
-        )
-        _public_card = (
-            await resolver.get_agent_card()
-        )  # Fetches from default public path
-        logger.info("Successfully fetched public agent card:")
-        logger.info(_public_card.model_dump_json(indent=2, exclude_none=True))
-        final_agent_card_to_use = _public_card
-
-        client = ClientFactory(
-            config=ClientConfig(streaming=True, polling=True, httpx_client=httpx_client)
-        ).create(card=final_agent_card_to_use)
-        logger.info("A2A client initialised.")
-
+    async with connect(base_url) as client:
         message_payload = EchoAgentA2AInputMessage(
             skill=EchoAgentSkills.ECHO,
             data=EchoInput(
                 thread_id=thread_id,
                 user_input=message,
+                history_mode=history_mode,
             ),
         )
 
@@ -118,57 +108,136 @@ async def echo_a2a_echo(
         logger.info("Sending message to the A2A endpoint")
         streaming_response = client.send_message(send_message)
         logger.info("Parsing streaming response from the A2A endpoint")
-        async for response in streaming_response:
-            if isinstance(response, Message):
-                full_message_content = get_message_text(response)
-                validated_response = EchoResponseWithHistory.model_validate_json(
-                    full_message_content
-                )
-                validated_response.past = validated_response.past[
-                    ::-1
-                ]  # Reverse to chronological order to look right in the CLI
-                print_json(validated_response.model_dump_json())
+        validated_response: EchoResponseWithHistory | None = None
+        past_pages: List[EchoHistoryPage] = []
+        async for artifact_name, data in iter_artifact_data(streaming_response):
+            match artifact_name:
+                case EchoAgentArtifacts.CURRENT:
+                    validated_response = EchoResponseWithHistory.model_validate(data)
+                case EchoAgentArtifacts.PAST:
+                    past_pages.append(EchoHistoryPage.model_validate(data))
+        if validated_response:
+            validated_response.past = merge_history_pages(past_pages)[
+                ::-1
+            ]  # Reverse to chronological order to look right in the CLI
+            print_json(validated_response.model_dump_json())
 
 
 @cli_app.command()
 @partial(syncify, raise_sync_error=False)
-async def echo_a2a_history(
+async def echo_a2a_queued_echo(
+    message: str = typer.Argument(
+        default="Hello there, from an A2A client!",
+        help="The message to send to the A2A endpoint.",
+    ),
     thread_id: str = typer.Option(
-        help="A thread ID to identify your conversation.",
+        default=str(uuid4()),
+        help="A thread ID to identify your conversation. If not specified, a random UUID will be used.",
+    ),
+    poll_interval: float = typer.Option(
+        default=0.5,
+        min=0.01,
+        help="The number of seconds to wait between polls of the task.",
+    ),
+    timeout: float = typer.Option(
+        default=60.0,
+        min=0.0,
+        help="The number of seconds after which to stop polling the task.",
     ),
 ) -> None:
     """
-    Retrieve the history of messages for a given thread ID from the A2A endpoint.
+    Queue a message to be echoed through the pub/sub component, poll the task until
+    it is finished and print the response.
     """
 
-    async with httpx.AsyncClient() as httpx_client:
-        # initialise A2ACardResolver
-        resolver = A2ACardResolver(
-            httpx_client=httpx_client,
-            base_url=base_url,
-            # agent_card_path uses default, extended_agent_card_path also uses default
+    async with connect(base_url) as client:
+        message_payload = EchoAgentA2AInputMessage(
+            skill=EchoAgentSkills.QUEUED_ECHO,
+            data=EchoInput(thread_id=thread_id, user_input=message),
         )
-        final_agent_card_to_use: AgentCard | None = None
 
-        logger.info(
-            f"Attempting to fetch public agent card from: {base_url}{AGENT_CARD_WELL_KNOWN_PATH}"
+        send_message = Message(
+            role="user",
+            parts=[{"kind": "text", "text": message_payload.model_dump_json()}],
+            message_id=str(uuid4()),
         )
-        _public_card = (
-            await resolver.get_agent_card()
-        )  # Fetches from default public path
-        logger.info("Successfully fetched public agent card:")
-        logger.info(_public_card.model_dump_json(indent=2, exclude_none=True))
-        final_agent_card_to_use = _public_card
-
-        client = ClientFactory(
-            config=ClientConfig(streaming=True, polling=True, httpx_client=httpx_client)
-        ).create(card=final_agent_card_to_use)
-        logger.info("A2A client initialised.")
+        logger.info("Sending message to the A2A endpoint")
+        task: Task | None = None
+        async for response in client.send_message(send_message):
+            if not isinstance(response, Message):
+                task = response[0]
+        if task is None:
+            typer.echo("No task was submitted.", err=True)
+            raise typer.Exit(code=1)
+        typer.echo(f"Task ID: {task.id}", err=True)
+        deadline = time.monotonic() + timeout
+        while not is_task_finished(task):
+            if time.monotonic() >= deadline:
+                typer.echo(f"The task is still {task.status.state.value}.", err=True)
+                raise typer.Exit(code=1)
+            await asyncio.sleep(poll_interval)
+            task = await client.get_task(TaskQueryParams(id=task.id))
+        if task.status.state != TaskState.completed:
+            error = task.status.message and get_message_text(task.status.message)
+            typer.echo(f"The task {task.status.state.value}. {error or ''}", err=True)
+            raise typer.Exit(code=1)
+
+        async def finished_task():
+            yield task, None
+
+        async for artifact_name, data in iter_artifact_data(finished_task()):
+            if artifact_name == EchoAgentArtifacts.CURRENT:
+                print_json(
+                    EchoResponseWithHistory.model_validate(data).model_dump_json()
+                )
+
 
+@cli_app.command()
+@partial(syncify, raise_sync_error=False)
+async def echo_a2a_history(
+    thread_id: str = typer.Option(
+        help="A thread ID to identify your conversation.",
+    ),
+    limit: Optional[int] = typer.Option(
+        default=None,
+        min=1,
+        help="The maximum number of the most recent messages to retrieve. If not specified, all messages are retrieved.",
+    ),
+    cursor: Optional[int] = typer.Option(
+        default=None,
+        min=0,
+        help="Retrieve only messages older than this cursor, as reported for a previous page.",
+    ),
+    since: Optional[datetime] = typer.Option(
+        default=None,
+        help="Retrieve only messages generated after this timestamp.",
+    ),
+    since_seq: Optional[int] = typer.Option(
+        default=None,
+        min=0,
+        help="Retrieve only messages from this sequence number on, as reported as the next sequence number by a previous retrieval.",
+    ),
+    if_none_match: Optional[str] = typer.Option(
+        default=None,
+        help="Retrieve no messages if the history has not changed since it had this ETag, as reported by a previous retrieval.",
+    ),
+) -> None:
+    """
+    Retrieve the history of messages for a given thread ID from the A2A endpoint.
+    The cursor for the next (older) page, if any, the sequence number of the next
+    message and the ETag of the history are printed to the standard error.
+    """
+
+    async with connect(base_url) as client:
         message_payload = EchoAgentA2AInputMessage(
             skill=EchoAgentSkills.HISTORY,
             data=EchoHistoryInput(
                 thread_id=thread_id,
+                limit=limit,
+                cursor=cursor,
+                since=since,
+                since_seq=since_seq,
+                if_none_match=if_none_match,
             ),
         )
 
@@ -181,16 +250,27 @@ async def echo_a2a_history(
         streaming_response = client.send_message(send_message)
         logger.info("Parsing streaming response from the A2A endpoint")
         response_adapter = TypeAdapter(List[EchoResponse])
-        async for response in streaming_response:
-            if isinstance(response, Message):
-                full_message_content = get_message_text(response)
-                validated_response = response_adapter.validate_json(
-                    full_message_content
-                )
-                validated_response = validated_response[
-                    ::-1
-                ]  # Reverse to chronological order to look right in the CLI
-                print_json(response_adapter.dump_json(validated_response).decode())
+        past_pages: List[EchoHistoryPage] = []
+        async for artifact_name, data in iter_artifact_data(streaming_response):
+            if artifact_name == EchoAgentArtifacts.PAST:
+                past_pages.append(EchoHistoryPage.model_validate(data))
+        if past_pages and past_pages[0].not_modified:
+            typer.echo("Not modified", err=True)
+            return
+        past = merge_history_pages(past_pages)[
+            ::-1
+        ]  # Reverse to chronological order to look right in the CLI
+        print_json(response_adapter.dump_json(past).decode())
+        if past_pages and past_pages[-1].next_cursor is not None:
+            typer.echo(f"Next cursor: {past_pages[-1].next_cursor}", err=True)
+        if past_pages and past_pages[0].seq is not None:
+            # The most recent page comes first.
+            typer.echo(
+                f"Next sequence number: {past_pages[0].seq + len(past_pages[0].past)}",
+                err=True,
+            )
+        if past_pages and past_pages[0].etag:
+            typer.echo(f"ETag: {past_pages[0].etag}", err=True)
 
 
 @cli_app.command()
@@ -204,30 +284,7 @@ async def echo_a2a_delete_history(
     Delete the history of messages for a given thread ID from the A2A endpoint.
     """
 
-    async with httpx.AsyncClient() as httpx_client:
-        # initialise A2ACardResolver
-        resolver = A2ACardResolver(
-            httpx_client=httpx_client,
-            base_url=base_url,
-            # agent_card_path uses default, extended_agent_card_path also uses default
-        )
-        final_agent_card_to_use: AgentCard | None = None
-
-        logger.info(
-            f"Attempting to fetch public agent card from: {base_url}{AGENT_CARD_WELL_KNOWN_PATH}"
-        )
-        _public_card = (
-            await resolver.get_agent_card()
-        )  # Fetches from default public path
-        logger.info("Successfully fetched public agent card:")
-        logger.info(_public_card.model_dump_json(indent=2, exclude_none=True))
-        final_agent_card_to_use = _public_card
-
-        client = ClientFactory(
-            config=ClientConfig(streaming=True, polling=True, httpx_client=httpx_client)
-        ).create(card=final_agent_card_to_use)
-        logger.info("A2A client initialised.")
-
+    async with connect(base_url) as client:
         message_payload = EchoAgentA2AInputMessage(
             skill=EchoAgentSkills.DELETE_HISTORY,
             data=DeleteEchoHistoryInput(
@@ -249,6 +306,164 @@ async def echo_a2a_delete_history(
                 print(full_message_content)
 
 
+@cli_app.command()
+@partial(syncify, raise_sync_error=False)
+async def echo_a2a_batch(
+    input_file: typer.FileText = typer.Argument(
+        default="-",
+        help="A file of JSON lines, each with a thread_id and a message. If not specified, the lines are read from the standard input.",
+    ),
+    batch_size: int = typer.Option(
+        default=64, min=1, help="The number of messages sent in each batch."
+    ),
+    concurrency: int = typer.Option(
+        default=8, min=1, help="The maximum number of batches in flight at once."
+    ),
+    history_mode: str = typer.Option(
+        default="none",
+        help="How much of the past history to include in each response: none, full or tail:N for the last N messages.",
+    ),
+) -> None:
+    """
+    Echo many messages, read as JSON lines, with the batch echo skill, and print
+    a JSON line for each result as soon as it is received. The messages of each
+    thread are echoed in order, and the results refer to their input lines.
+    """
+
+    async with connect(base_url, max_connections=concurrency) as client:
+
+        async def send_batch(data: BatchEchoInput) -> AsyncIterator[Dict[str, Any]]:
+            message_payload = EchoAgentA2AInputMessage(
+                skill=EchoAgentSkills.BATCH_ECHO, data=data
+            )
+            send_message = Message(
+                role="user",
+                parts=[{"kind": "text", "text": message_payload.model_dump_json()}],
+                message_id=str(uuid4()),
+            )
+            async for artifact_name, result in iter_artifact_data(
+                client.send_message(send_message)
+            ):
+                if artifact_name == EchoAgentArtifacts.RESULTS:
+                    yield result
+
+        echoed, failed = await run_echo_batch(
+            send_batch,
+            lines=input_file,
+            output=sys.stdout,
+            batch_size=batch_size,
+            concurrency=concurrency,
+            history_mode=history_mode,
+        )
+    typer.echo(f"Echoed {echoed} messages, {failed} failed.", err=True)
+
+
+@cli_app.command()
+@partial(syncify, raise_sync_error=False)
+async def bench(
+    users: int = typer.Option(
+        default=8, min=1, help="The number of concurrent virtual users."
+    ),
+    threads: int = typer.Option(
+        default=8,
+        min=1,
+        help="The number of conversation threads that the users send requests to.",
+    ),
+    duration: Optional[float] = typer.Option(
+        default=None,
+        min=0,
+        help="Run for this many seconds. If neither a duration nor a number of requests is specified, 100 requests are sent.",
+    ),
+    requests: Optional[int] = typer.Option(
+        default=None,
+        min=1,
+        help="Send this many requests in total. With a duration, the benchmark stops at whichever comes first.",
+    ),
+    mix: str = typer.Option(
+        default="echo=8,history=1,delete_history=1",
+        help="The skills to send requests for, with their relative weights.",
+    ),
+    history_limit: Optional[int] = typer.Option(
+        default=20,
+        min=1,
+        help="The maximum number of messages to retrieve in each history request.",
+    ),
+    seed: Optional[int] = typer.Option(
+        default=None, help="A seed for the random choice of skills and threads."
+    ),
+    json_output: bool = typer.Option(
+        False, "--json", help="Print the report as JSON instead of text."
+    ),
+) -> None:
+    """
+    Benchmark the echo A2A endpoint with concurrent virtual users, and report the
+    throughput and latency percentiles, overall and for each skill.
+    """
+    try:
+        skill_mix = parse_skill_mix(mix)
+    except ValueError as e:
+        raise typer.BadParameter(str(e), param_hint="--mix")
+    supported_skills = {
+        EchoAgentSkills.ECHO,
+        EchoAgentSkills.HISTORY,
+        EchoAgentSkills.DELETE_HISTORY,
+    }
+    if not set(skill_mix) <= supported_skills:
+        raise typer.BadParameter(
+            f"Only these skills can be benchmarked: {', '.join(supported_skills)}",
+            param_hint="--mix",
+        )
+    if duration is None and requests is None:
+        requests = 100
+    run_id = uuid4()
+    thread_ids = [f"bench-{run_id}-{index}" for index in range(threads)]
+
+    async with connect(base_url, max_connections=users) as client:
+
+        async def send(skill: EchoAgentSkills, thread_id: str) -> None:
+            match skill:
+                case EchoAgentSkills.ECHO:
+                    data = EchoInput(
+                        thread_id=thread_id, user_input=f"Benchmark {run_id}"
+                    )
+                case EchoAgentSkills.HISTORY:
+                    data = EchoHistoryInput(thread_id=thread_id, limit=history_limit)
+                case EchoAgentSkills.DELETE_HISTORY:
+                    data = DeleteEchoHistoryInput(thread_id=thread_id)
+            send_message = Message(
+                role="user",
+                parts=[
+                    {
+                        "kind": "text",
+                        "text": EchoAgentA2AInputMessage(
+                            skill=skill, data=data
+                        ).model_dump_json(),
+                    }
+                ],
+                message_id=str(uuid4()),
+            )
+            async for response in client.send_message(send_message):
+                if (
+                    not isinstance(response, Message)
+                    and response[0].status.state == TaskState.failed
+                ):
+                    raise RuntimeError(f"The {skill} task failed.")
+
+        report = await run_benchmark(
+            send,
+            users=users,
+            thread_ids=thread_ids,
+            mix=skill_mix,
+            duration=duration,
+            requests=requests,
+            seed=seed,
+        )
+    if json_output:
+        print_json(report.model_dump_json())
+    else:
+        print(report.as_text())
+
+
 def main():  # pragma: no cover
     try:
         cli_app()
@@ -0,0 +1,118 @@
+import asyncio
+from collections import Counter
+from itertools import islice
+import json
+from typing import Any, AsyncIterator, Callable, Dict, List, TextIO, Tuple
+
+from pydantic import ValidationError
+
+from py_a2a_dapr.model.echo_task import BatchEchoInput, EchoInput
+
+# Sends a batch to be echoed, and yields its results as they are received.
+SendBatch = Callable[[BatchEchoInput], AsyncIterator[Dict[str, Any]]]
+
+
+async def read_line_batches(
+    lines: TextIO, batch_size: int
+) -> AsyncIterator[List[Tuple[int, str]]]:
+    """
+    Read batches of numbered lines without blocking the event loop, so that the
+    batches already sent are echoed while more lines are read.
+    """
+    numbered_lines = enumerate(lines, start=1)
+    while batch := await asyncio.to_thread(
+        lambda: list(islice(numbered_lines, batch_size))
+    ):
+        yield batch
+
+
+async def run_echo_batch(
+    send_batch: SendBatch,
+    lines: TextIO,
+    output: TextIO,
+    batch_size: int,
+    concurrency: int,
+    history_mode: str = "none",
+) -> Tuple[int, int]:
+    """
+    Echo messages read as JSON lines with a thread_id and a message, in batches of
+    which up to the given number are in flight at once, and write a JSON line for
+    each result as soon as it is received. Batches that share a thread are not in
+    flight at the same time, so that the messages of a thread are echoed in order.
+    Only the batches in flight are held in memory. Returns the numbers of messages
+    that were echoed and that failed.
+    """
+    counts: Counter[str] = Counter()
+    in_flight_threads: Counter[str] = Counter()
+    threads_released = asyncio.Condition()
+    slots = asyncio.Semaphore(concurrency)
+    tasks: set[asyncio.Task] = set()
+
+    def write(line_number: int, thread_id: str | None, **result: Any) -> None:
+        output.write(
+            json.dumps({"line": line_number, "thread_id": thread_id, **result}) + "\n"
+        )
+        counts["error" if "error" in result else "response"] += 1
+
+    async def echo(items: List[EchoInput], line_numbers: List[int]) -> None:
+        reported = set()
+        try:
+            async for result in send_batch(BatchEchoInput(items=items, ordered=False)):
+                index = result["index"]
+                reported.add(index)
+                write(
+                    line_numbers[index],
+                    items[index].thread_id,
+                    **{
+                        key: result[key]
+                        for key in ("response", "error")
+                        if key in result
+                    },
+                )
+            error = "No result was received."
+        except Exception as e:
+            error = str(e) or e.__class__.__name__
+        finally:
+            async with threads_released:
+                in_flight_threads.subtract({item.thread_id for item in items})
+                threads_released.notify_all()
+            slots.release()
+        for index, item in enumerate(items):
+            if index not in reported:
+                write(line_numbers[index], item.thread_id, error=error)
+        output.flush()
+
+    async for batch in read_line_batches(lines, batch_size):
+        items: List[EchoInput] = []
+        line_numbers: List[int] = []
+        for line_number, line in batch:
+            if not line.strip():
+                continue
+            try:
+                record = json.loads(line)
+                items.append(
+                    EchoInput(
+                        thread_id=record["thread_id"],
+                        user_input=record["message"],
+                        history_mode=history_mode,
+                    )
+                )
+                line_numbers.append(line_number)
+            except (ValueError, KeyError, TypeError, ValidationError) as e:
+                write(line_number, None, error=f"Invalid input line. {e}")
+        if not items:
+            continue
+        thread_ids = {item.thread_id for item in items}
+        await slots.acquire()
+        async with threads_released:
+            await threads_released.wait_for(
+                lambda: not any(
+                    in_flight_threads[thread_id] for thread_id in thread_ids
+                )
+            )
+            in_flight_threads.update(thread_ids)
+        task = asyncio.create_task(echo(items, line_numbers))
+        tasks.add(task)
+        task.add_done_callback(tasks.discard)
+    await asyncio.gather(*tasks)
+    return counts["response"], counts["error"]
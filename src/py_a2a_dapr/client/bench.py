@@ -0,0 +1,156 @@
+import asyncio
+import math
+import random
+import time
+from typing import Annotated, Awaitable, Callable, Dict, List, Optional
+
+from pydantic import BaseModel
+
+from py_a2a_dapr.model.echo_task import EchoAgentSkills
+
+# Sends one request for a skill on a thread, and returns once the response is read.
+SendRequest = Callable[[EchoAgentSkills, str], Awaitable[None]]
+
+
+def parse_skill_mix(mix: str) -> Dict[EchoAgentSkills, int]:
+    """
+    Parse a mix of skills and their relative weights, such as
+    echo=8,history=1,delete_history=1.
+    """
+    weights: Dict[EchoAgentSkills, int] = {}
+    for item in mix.split(","):
+        name, _, weight = item.strip().partition("=")
+        try:
+            skill = EchoAgentSkills(name)
+        except ValueError:
+            raise ValueError(
+                f"Unknown skill '{name}' in the mix, expected one of: {', '.join(EchoAgentSkills)}"
+            )
+        weights[skill] = int(weight) if weight else 1
+        if weights[skill] < 0:
+            raise ValueError(f"The weight of the skill '{name}' must not be negative.")
+    if not any(weights.values()):
+        raise ValueError("At least one skill in the mix must have a positive weight.")
+    return weights
+
+
+def percentile(sorted_values: List[float], q: float) -> float:
+    """
+    The q-th percentile of values sorted in ascending order, by the nearest rank.
+    """
+    if not sorted_values:
+        return math.nan
+    rank = max(math.ceil(q / 100 * len(sorted_values)), 1)
+    return sorted_values[rank - 1]
+
+
+class LatencySummary(BaseModel):
+    requests: Annotated[int, "The number of requests that completed successfully."]
+    errors: Annotated[int, "The number of requests that failed."]
+    throughput: Annotated[float, "The successful requests per second."]
+    mean_ms: Annotated[float, "The mean latency in milliseconds."]
+    p50_ms: Annotated[float, "The median latency in milliseconds."]
+    p95_ms: Annotated[float, "The 95th percentile latency in milliseconds."]
+    p99_ms: Annotated[float, "The 99th percentile latency in milliseconds."]
+    max_ms: Annotated[float, "The maximum latency in milliseconds."]
+
+    @classmethod
+    def from_latencies(
+        cls, latencies: List[float], errors: int, elapsed: float
+    ) -> "LatencySummary":
+        values = sorted(latency * 1000 for latency in latencies)
+        return cls(
+            requests=len(values),
+            errors=errors,
+            throughput=len(values) / elapsed if elapsed > 0 else 0.0,
+            mean_ms=sum(values) / len(values) if values else math.nan,
+            p50_ms=percentile(values, 50),
+            p95_ms=percentile(values, 95),
+            p99_ms=percentile(values, 99),
+            max_ms=values[-1] if values else math.nan,
+        )
+
+
+class BenchmarkReport(BaseModel):
+    users: Annotated[int, "The number of concurrent virtual users."]
+    threads: Annotated[int, "The number of threads that the users sent requests to."]
+    elapsed_seconds: Annotated[float, "The wall clock duration of the benchmark."]
+    overall: Annotated[LatencySummary, "The summary over all requests."]
+    skills: Annotated[
+        Dict[EchoAgentSkills, LatencySummary], "The summary of the requests per skill."
+    ]
+
+    def as_text(self) -> str:
+        lines = [
+            f"{self.users} users, {self.threads} threads, {self.elapsed_seconds:.2f}s",
+            f"{'skill':<16}{'requests':>10}{'errors':>8}{'req/s':>10}"
+            f"{'mean ms':>10}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'max ms':>10}",
+        ]
+        for name, summary in [*self.skills.items(), ("overall", self.overall)]:
+            lines.append(
+                f"{name:<16}{summary.requests:>10}{summary.errors:>8}"
+                f"{summary.throughput:>10.1f}{summary.mean_ms:>10.2f}"
+                f"{summary.p50_ms:>10.2f}{summary.p95_ms:>10.2f}"
+                f"{summary.p99_ms:>10.2f}{summary.max_ms:>10.2f}"
+            )
+        return "\n".join(lines)
+
+
+async def run_benchmark(
+    send: SendRequest,
+    users: int,
+    thread_ids: List[str],
+    mix: Dict[EchoAgentSkills, int],
+    duration: Optional[float] = None,
+    requests: Optional[int] = None,
+    seed: Optional[int] = None,
+) -> BenchmarkReport:
+    """
+    Send requests from concurrent virtual users, each picking a skill by its weight
+    in the mix and a thread at random, until the duration has passed or the number
+    of requests has been sent, whichever comes first.
+    """
+    if duration is None and requests is None:
+        raise ValueError("Either a duration or a number of requests is required.")
+    rng = random.Random(seed)
+    skills = list(mix)
+    weights = list(mix.values())
+    latencies: Dict[EchoAgentSkills, List[float]] = {skill: [] for skill in skills}
+    errors: Dict[EchoAgentSkills, int] = {skill: 0 for skill in skills}
+    started = time.perf_counter()
+    deadline = started + duration if duration is not None else math.inf
+    issued = 0
+
+    async def virtual_user() -> None:
+        nonlocal issued
+        while time.perf_counter() < deadline and (
+            requests is None or issued < requests
+        ):
+            issued += 1
+            skill = rng.choices(skills, weights)[0]
+            request_started = time.perf_counter()
+            try:
+                await send(skill, rng.choice(thread_ids))
+            except Exception:
+                errors[skill] += 1
+            else:
+                latencies[skill].append(time.perf_counter() - request_started)
+
+    await asyncio.gather(*(virtual_user() for _ in range(users)))
+    elapsed = time.perf_counter() - started
+    return BenchmarkReport(
+        users=users,
+        threads=len(thread_ids),
+        elapsed_seconds=elapsed,
+        overall=LatencySummary.from_latencies(
+            [latency for values in latencies.values() for latency in values],
+            sum(errors.values()),
+            elapsed,
+        ),
+        skills={
+            skill: LatencySummary.from_latencies(
+                latencies[skill], errors[skill], elapsed
+            )
+            for skill in skills
+        },
+    )
@@ -0,0 +1,130 @@
+from contextlib import asynccontextmanager
+from datetime import timedelta
+import hashlib
+import json
+import logging
+import os
+from pathlib import Path
+import time
+from typing import AsyncIterator, Optional
+
+import httpx
+from a2a.client import Client, ClientConfig, ClientFactory
+from a2a.types import AgentCard
+from a2a.utils.constants import AGENT_CARD_WELL_KNOWN_PATH
+
+from py_a2a_dapr import env
+
+logger = logging.getLogger(__name__)
+
+
+class AgentCardCache:
+    """
+    Caches agent cards on disk, so that processes that each send a few messages
+    do not fetch the card every time. A cached card is used as is for a time to
+    live, after which it is revalidated with its ETag, if the server sent one.
+    """
+
+    def __init__(self, directory: Path, ttl: timedelta):
+        self._directory = directory
+        self._ttl = ttl
+
+    @classmethod
+    def from_env(cls) -> "AgentCardCache":
+        return cls(
+            directory=Path(
+                env.str(
+                    "APP_A2A_CARD_CACHE_DIR",
+                    str(Path.home() / ".cache" / "py-a2a-dapr" / "agent-cards"),
+                )
+            ),
+            ttl=env.timedelta("APP_A2A_CARD_CACHE_TTL", timedelta(minutes=5)),
+        )
+
+    def _path(self, card_url: str) -> Path:
+        return self._directory / f"{hashlib.sha256(card_url.encode()).hexdigest()}.json"
+
+    def _read(self, path: Path) -> Optional[dict]:
+        try:
+            return json.loads(path.read_text())
+        except (OSError, ValueError):
+            return None
+
+    def _write(self, path: Path, entry: dict) -> None:
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            # Replaced atomically, since other processes may read it at any time.
+            temporary_path = path.with_suffix(f".{os.getpid()}.tmp")
+            temporary_path.write_text(json.dumps(entry))
+            os.replace(temporary_path, path)
+        except OSError as e:
+            logger.warning(f"Could not cache the agent card at {path}. {e}")
+
+    async def get_agent_card(
+        self, httpx_client: httpx.AsyncClient, base_url: str
+    ) -> AgentCard:
+        card_url = f"{base_url.rstrip('/')}{AGENT_CARD_WELL_KNOWN_PATH}"
+        path = self._path(card_url)
+        entry = self._read(path)
+        if entry and time.time() - entry["fetched_at"] < self._ttl.total_seconds():
+            logger.debug(f"Using the cached agent card of {card_url}")
+            return AgentCard.model_validate(entry["card"])
+        headers = (
+            {"If-None-Match": entry["etag"]} if entry and entry.get("etag") else {}
+        )
+        response = await httpx_client.get(card_url, headers=headers)
+        if response.status_code == httpx.codes.NOT_MODIFIED and entry:
+            logger.debug(f"The cached agent card of {card_url} is still valid")
+        else:
+            response.raise_for_status()
+            logger.info(f"Fetched the agent card from {card_url}")
+            entry = {"card": response.json(), "etag": response.headers.get("ETag")}
+        entry["fetched_at"] = time.time()
+        self._write(path, entry)
+        return AgentCard.model_validate(entry["card"])
+
+
+agent_card_cache = AgentCardCache.from_env()
+
+
+def create_httpx_client(max_connections: Optional[int] = None) -> httpx.AsyncClient:
+    """
+    Create an HTTP client whose pool keeps up to the given number of connections
+    alive, to be shared by all the messages sent to the A2A server.
+    """
+    max_connections = max_connections or env.int("APP_A2A_CLIENT_MAX_CONNECTIONS", 16)
+    return httpx.AsyncClient(
+        limits=httpx.Limits(
+            max_connections=max_connections, max_keepalive_connections=max_connections
+        ),
+        timeout=env.timedelta(
+            "APP_A2A_CLIENT_TIMEOUT", timedelta(seconds=60)
+        ).total_seconds(),
+    )
+
+
+async def create_a2a_client(
+    httpx_client: httpx.AsyncClient,
+    base_url: str,
+    agent_card: Optional[AgentCard] = None,
+) -> Client:
+    """
+    Create an A2A client on a shared HTTP client, with the given agent card or else
+    the cached agent card.
+    """
+    return ClientFactory(
+        config=ClientConfig(streaming=True, polling=True, httpx_client=httpx_client)
+    ).create(
+        card=agent_card or await agent_card_cache.get_agent_card(httpx_client, base_url)
+    )
+
+
+@asynccontextmanager
+async def connect(
+    base_url: str, max_connections: Optional[int] = None
+) -> AsyncIterator[Client]:
+    """
+    Connect to the A2A server with a pooled HTTP client, which is closed on exit.
+    """
+    async with create_httpx_client(max_connections) as httpx_client:
+        yield await create_a2a_client(httpx_client, base_url)
@@ -0,0 +1,41 @@
+from typing import Any, AsyncIterator, List, Tuple
+
+from a2a.client.client import ClientEvent
+from a2a.types import DataPart, Message, TaskArtifactUpdateEvent
+from a2a.utils import get_message_text
+
+from py_a2a_dapr.model.echo_task import EchoHistoryPage, EchoResponse
+
+
+async def iter_artifact_data(
+    responses: AsyncIterator[ClientEvent | Message],
+) -> AsyncIterator[Tuple[str | None, Any]]:
+    """
+    Yield the name and structured data of each artifact chunk as soon as it is
+    received. The text of a message response, which carries no artifact, is
+    yielded without a name.
+    """
+    async for response in responses:
+        if isinstance(response, Message):
+            yield None, get_message_text(response)
+            continue
+        task, event = response
+        if isinstance(event, TaskArtifactUpdateEvent):
+            artifacts = [event.artifact]
+        elif event is None:
+            # Without streaming, the task arrives with all its artifacts.
+            artifacts = task.artifacts or []
+        else:
+            continue
+        for artifact in artifacts:
+            for part in artifact.parts:
+                if isinstance(part.root, DataPart):
+                    yield artifact.name, part.root.data
+
+
+def merge_history_pages(pages: List[EchoHistoryPage]) -> List[EchoResponse]:
+    """
+    Merge pages of history, received most recent page first, into one list of
+    past responses in chronological order.
+    """
+    return [item for page in reversed(pages) for item in page.past]
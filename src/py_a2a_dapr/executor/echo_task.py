@@ -1,57 +1,425 @@
-from dapr.actor import ActorProxy, ActorId, ActorProxyFactory
+import asyncio
+from datetime import timedelta
+import json
+import logging
+from typing import Any, AsyncIterator, Dict, Iterable, List, Type, TypeVar
+from uuid import uuid4
+
+from dapr.actor import ActorInterface, ActorProxy, ActorId, ActorProxyFactory
+from dapr.actor.client.proxy import ActorFactoryBase
 from dapr.clients.retry import RetryPolicy
 from a2a.server.agent_execution import AgentExecutor, RequestContext
 from a2a.server.events import EventQueue
-from a2a.utils import new_agent_text_message
+from a2a.server.tasks import TaskUpdater
+from a2a.types import (
+    Artifact,
+    DataPart,
+    Part,
+    Task,
+    TaskArtifactUpdateEvent,
+    TaskState,
+    TaskStatus,
+)
+from a2a.utils import append_artifact_to_task
+from a2a.utils import new_agent_text_message, new_task
+from pydantic import BaseModel
 
+from py_a2a_dapr import env, metrics
 from py_a2a_dapr.actor.echo_task import EchoTaskActorInterface
+from py_a2a_dapr.actor.thread_index import (
+    ThreadIndexActorInterface,
+    thread_index_shards,
+)
+from py_a2a_dapr.pubsub import QUEUED_ECHO_TOPIC, DaprPublisher, Publish
 from py_a2a_dapr.model.echo_task import (
+    BatchEchoInput,
+    BulkDeleteEchoHistoryInput,
+    BulkEchoHistoryInput,
+    BulkThreadsInput,
     DeleteEchoHistoryInput,
+    EchoAgentArtifacts,
     EchoHistoryInput,
     EchoInput,
     EchoAgentA2AInputMessage,
     EchoAgentSkills,
+    QueuedEchoRequest,
+    QueuedEchoResult,
 )
+from py_a2a_dapr.executor.proxy_cache import ActorProxyCache
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
 
 
 class EchoAgentExecutor(AgentExecutor):
-    def __init__(self):
+    def __init__(
+        self,
+        actor_proxy_factory: ActorFactoryBase | None = None,
+        publish: Publish | None = None,
+    ):
         self._actor_type = "EchoTaskActor"
-        self._factory = ActorProxyFactory(retry_policy=RetryPolicy(max_attempts=3))
-
-    async def perform_echo(self, data: EchoInput) -> str:
-        proxy = ActorProxy.create(
-            actor_type=self._actor_type,
-            actor_id=ActorId(actor_id=data.thread_id),
-            actor_interface=EchoTaskActorInterface,
-            actor_proxy_factory=self._factory,
+        self._thread_index_actor_type = "ThreadIndexActor"
+        # A factory can be given to call actors other than through the Dapr sidecar.
+        self._factory = actor_proxy_factory or ActorProxyFactory(
+            retry_policy=RetryPolicy(max_attempts=3)
         )
-        result = await proxy.invoke_method(
-            method="Echo", raw_body=data.model_dump_json().encode()
+        # Queued echoes are published to the pub/sub component, by default through
+        # the Dapr sidecar.
+        self._publish = publish or DaprPublisher()
+        self._history_chunk_size = env.int("APP_ECHO_HISTORY_CHUNK_SIZE", 64)
+        self._batch_echo_concurrency = env.int("APP_BATCH_ECHO_CONCURRENCY", 16)
+        self._bulk_history_concurrency = env.int("APP_BULK_HISTORY_CONCURRENCY", 16)
+        self._proxy_cache: ActorProxyCache[ActorProxy] = ActorProxyCache(
+            max_size=env.int("APP_ACTOR_PROXY_CACHE_SIZE", 1024),
+            ttl=env.timedelta("APP_ACTOR_PROXY_CACHE_TTL", timedelta(minutes=10)),
         )
-        return result.decode().strip("\"'")
-
-    async def perform_history(self, data: EchoHistoryInput) -> str:
-        proxy = ActorProxy.create(
-            actor_type=self._actor_type,
-            actor_id=ActorId(actor_id=data.thread_id),
-            actor_interface=EchoTaskActorInterface,
-            actor_proxy_factory=self._factory,
+
+    def _get_proxy(
+        self,
+        actor_id: str,
+        actor_type: str | None = None,
+        actor_interface: Type[ActorInterface] = EchoTaskActorInterface,
+    ) -> ActorProxy:
+        """
+        Get the proxy of an actor, by default the one for a thread, reusing a cached
+        proxy if there is one.
+        """
+        actor_type = actor_type or self._actor_type
+        proxy = self._proxy_cache.get_or_create(
+            (actor_type, actor_id),
+            lambda: ActorProxy.create(
+                actor_type=actor_type,
+                actor_id=ActorId(actor_id=actor_id),
+                actor_interface=actor_interface,
+                actor_proxy_factory=self._factory,
+            ),
         )
-        result = await proxy.invoke_method(method="History")
-        return result.decode().strip("\"'")
-
-    async def perform_delete_history(self, data: DeleteEchoHistoryInput) -> str:
-        proxy = ActorProxy.create(
-            actor_type=self._actor_type,
-            actor_id=ActorId(actor_id=data.thread_id),
-            actor_interface=EchoTaskActorInterface,
-            actor_proxy_factory=self._factory,
+        logger.debug(
+            f"Actor proxy cache: {self._proxy_cache.hits} hits, {self._proxy_cache.misses} misses"
+        )
+        return proxy
+
+    async def _invoke_actor(
+        self, thread_id: str, method: str, data: BaseModel | None = None
+    ) -> Any:
+        """
+        Invoke a method of the actor for a thread, and return its response decoded
+        from JSON, exactly once.
+        """
+        proxy = self._get_proxy(thread_id)
+        with metrics.ACTOR_CALL_DURATION.labels(self._actor_type, method).time():
+            result = await proxy.invoke_method(
+                method=method,
+                raw_body=data.model_dump_json().encode() if data else None,
+            )
+        return json.loads(result) if result else None
+
+    async def perform_echo(self, data: EchoInput) -> Dict[str, Any] | None:
+        """
+        Echo the input, responding with an EchoResponseWithHistory as it was
+        decoded from the actor's JSON response.
+        """
+        return await self._invoke_actor(data.thread_id, "Echo", data)
+
+    async def perform_history(self, data: EchoHistoryInput) -> Dict[str, Any] | None:
+        """
+        Retrieve a page of history, responding with an EchoHistoryPage as it was
+        decoded from the actor's JSON response.
+        """
+        return await self._invoke_actor(data.thread_id, "History", data)
+
+    async def perform_delete_history(self, data: DeleteEchoHistoryInput) -> str | None:
+        return await self._invoke_actor(data.thread_id, "DeleteHistory")
+
+    async def stream_history(
+        self, data: EchoHistoryInput
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Retrieve the requested history from the actor in pages of bounded size,
+        most recent page first. Each page is an EchoHistoryPage, as decoded from
+        the actor's JSON response.
+        """
+        remaining = data.limit
+        cursor = data.cursor
+        while True:
+            limit = (
+                min(remaining, self._history_chunk_size)
+                if remaining
+                else self._history_chunk_size
+            )
+            page = await self.perform_history(
+                data.model_copy(update={"limit": limit, "cursor": cursor})
+            )
+            if not page:
+                raise ValueError("No response received from the actor(s)!")
+            yield page
+            if remaining:
+                remaining -= len(page["past"])
+            if page.get("next_cursor") is None or remaining == 0:
+                break
+            cursor = page["next_cursor"]
+
+    async def _paginate_past(
+        self, response: Dict[str, Any]
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Split the past history of an echoed response into pages of bounded size,
+        most recent page first. Each page is an EchoHistoryPage.
+        """
+        past = response["past"]
+        total = response.get("total")
+        seq = response.get("seq")
+        for end in range(len(past), 0, -self._history_chunk_size):
+            start = max(end - self._history_chunk_size, 0)
+            page = {
+                "past": past[start:end],
+                "total": total if total is not None else len(past),
+            }
+            if seq is not None:
+                # The past entries are those that immediately precede the current one.
+                page["seq"] = seq - len(past) + start
+            yield page
+
+    async def complete_queued_echo(self, task: Task, result: QueuedEchoResult) -> Task:
+        """
+        Complete the task of a queued echo with its result, with the same artifacts
+        as an echo, or fail it with the reason why echoing failed.
+        """
+        if not result.response:
+            task.status = TaskStatus(
+                state=TaskState.failed,
+                message=new_agent_text_message(
+                    text=result.error or "No response received from the actor(s)!",
+                    context_id=task.context_id,
+                    task_id=task.id,
+                ),
+            )
+            return task
+        response = result.response.model_dump(mode="json")
+        past_pages = [page async for page in self._paginate_past(response)]
+        for name, chunks in (
+            (EchoAgentArtifacts.CURRENT, [{**response, "past": []}]),
+            (EchoAgentArtifacts.PAST, past_pages),
+        ):
+            if not chunks:
+                continue
+            append_artifact_to_task(
+                task,
+                TaskArtifactUpdateEvent(
+                    task_id=task.id,
+                    context_id=task.context_id,
+                    artifact=Artifact(
+                        artifact_id=str(uuid4()),
+                        name=name,
+                        parts=[Part(root=DataPart(data=chunk)) for chunk in chunks],
+                    ),
+                    last_chunk=True,
+                ),
+            )
+        task.status = TaskStatus(state=TaskState.completed)
+        return task
+
+    async def _merge_streams(
+        self, streams: Iterable[AsyncIterator[T]], concurrency: int
+    ) -> AsyncIterator[T]:
+        """
+        Iterate over the streams, at most the given number of them at a time, and
+        yield their items as soon as they are produced. Each stream waits while an
+        item it produced is not yet consumed, so that fast streams are not buffered
+        beyond one item each.
+        """
+        items: asyncio.Queue[Any] = asyncio.Queue(maxsize=concurrency)
+        remaining_streams = iter(streams)
+        finished = object()
+
+        async def drain() -> None:
+            try:
+                for stream in remaining_streams:
+                    async for item in stream:
+                        await items.put(item)
+            except Exception:
+                await items.put(finished)
+                raise
+            # Not put when cancelled, since nothing consumes the items any more.
+            await items.put(finished)
+
+        workers = [asyncio.create_task(drain()) for _ in range(concurrency)]
+        try:
+            running = len(workers)
+            while running:
+                item = await items.get()
+                if item is finished:
+                    running -= 1
+                else:
+                    yield item
+            # Raise any error that stopped a stream.
+            await asyncio.gather(*workers)
+        finally:
+            for worker in workers:
+                worker.cancel()
+            await asyncio.gather(*workers, return_exceptions=True)
+
+    async def perform_batch_echo(
+        self, data: BatchEchoInput
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Echo a batch of inputs, with a bounded number of actor calls in flight, and
+        yield each result as soon as it is available or, if the batch is ordered, as
+        soon as all results before it are. Inputs for the same thread are echoed
+        one after another, in the order given. Each result is a BatchEchoResult.
+        """
+        threads: Dict[str, List[int]] = {}
+        for index, item in enumerate(data.items):
+            threads.setdefault(item.thread_id, []).append(index)
+
+        async def echo_thread(indices: List[int]) -> AsyncIterator[Dict[str, Any]]:
+            for index in indices:
+                try:
+                    response = await self.perform_echo(data=data.items[index])
+                    if not response:
+                        raise ValueError("No response received from the actor(s)!")
+                    yield {"index": index, "response": response}
+                except Exception as e:
+                    yield {"index": index, "error": str(e)}
+
+        pending: Dict[int, Dict[str, Any]] = {}
+        next_index = 0
+        async for result in self._merge_streams(
+            (echo_thread(indices) for indices in threads.values()),
+            self._batch_echo_concurrency,
+        ):
+            if not data.ordered:
+                yield result
+                continue
+            pending[result["index"]] = result
+            while next_index in pending:
+                yield pending.pop(next_index)
+                next_index += 1
+
+    async def find_threads(self, prefix: str) -> List[str]:
+        """
+        Find the indexed threads whose identifiers start with the prefix, by querying
+        all shards of the index concurrently.
+        """
+
+        async def find(shard: int) -> bytes:
+            proxy = self._get_proxy(
+                str(shard),
+                actor_type=self._thread_index_actor_type,
+                actor_interface=ThreadIndexActorInterface,
+            )
+            with metrics.ACTOR_CALL_DURATION.labels(
+                self._thread_index_actor_type, "Find"
+            ).time():
+                return await proxy.invoke_method(
+                    method="Find", raw_body=json.dumps(prefix).encode()
+                )
+
+        results = await asyncio.gather(
+            *(find(shard) for shard in range(thread_index_shards()))
         )
-        result = await proxy.invoke_method(
-            method="DeleteHistory",
+        return sorted(
+            thread_id for result in results for thread_id in json.loads(result)
         )
-        return result.decode().strip("\"'")
+
+    async def _resolve_threads(self, data: BulkThreadsInput) -> List[str]:
+        if data.thread_ids is not None:
+            return list(dict.fromkeys(data.thread_ids))
+        return await self.find_threads(data.prefix or "")
+
+    async def perform_bulk_history(
+        self, data: BulkEchoHistoryInput
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Retrieve the histories of many threads concurrently, and yield each page of
+        history as soon as it is available, as a BulkEchoHistoryResult.
+        """
+
+        async def thread_history(
+            thread_id: str,
+        ) -> AsyncIterator[Dict[str, Any]]:
+            try:
+                async for page in self.stream_history(
+                    EchoHistoryInput(
+                        thread_id=thread_id, limit=data.limit, since=data.since
+                    )
+                ):
+                    yield {"thread_id": thread_id, "page": page}
+            except Exception as e:
+                yield {"thread_id": thread_id, "error": str(e)}
+
+        async for result in self._merge_streams(
+            (
+                thread_history(thread_id)
+                for thread_id in await self._resolve_threads(data)
+            ),
+            self._bulk_history_concurrency,
+        ):
+            yield result
+
+    async def perform_bulk_delete_history(
+        self, data: BulkDeleteEchoHistoryInput
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Delete the histories of many threads concurrently, and yield the outcome for
+        each thread as soon as it is known, as a BulkDeleteEchoHistoryResult.
+        """
+
+        async def delete_thread_history(
+            thread_id: str,
+        ) -> AsyncIterator[Dict[str, Any]]:
+            try:
+                yield {
+                    "thread_id": thread_id,
+                    "output": await self.perform_delete_history(
+                        DeleteEchoHistoryInput(thread_id=thread_id)
+                    ),
+                }
+            except Exception as e:
+                yield {"thread_id": thread_id, "error": str(e)}
+
+        async for result in self._merge_streams(
+            (
+                delete_thread_history(thread_id)
+                for thread_id in await self._resolve_threads(data)
+            ),
+            self._bulk_history_concurrency,
+        ):
+            yield result
+
+    async def _add_chunked_artifact(
+        self,
+        updater: TaskUpdater,
+        name: EchoAgentArtifacts,
+        chunks: AsyncIterator[Dict[str, Any]],
+    ) -> None:
+        """
+        Add each chunk as the structured data of a part of one artifact, as soon as
+        it is available.
+        """
+        artifact_id = str(uuid4())
+        previous: Dict[str, Any] | None = None
+        appending = False
+        async for chunk in chunks:
+            if previous is not None:
+                await updater.add_artifact(
+                    parts=[Part(root=DataPart(data=previous))],
+                    artifact_id=artifact_id,
+                    name=name,
+                    append=appending,
+                    last_chunk=False,
+                )
+                appending = True
+            previous = chunk
+        if previous is not None:
+            await updater.add_artifact(
+                parts=[Part(root=DataPart(data=previous))],
+                artifact_id=artifact_id,
+                name=name,
+                append=appending,
+                last_chunk=True,
+            )
 
     async def execute(self, context: RequestContext, event_queue: EventQueue):
         message_payload = EchoAgentA2AInputMessage.model_validate_json(
@@ -60,24 +428,96 @@ class EchoAgentExecutor(AgentExecutor):
         if (
             not message_payload
             or not message_payload.data
-            or message_payload.data.thread_id.strip() == ""
+            or any(
+                thread_id.strip() == ""
+                for thread_id in message_payload.data.thread_ids or []
+            )
         ):
             raise ValueError(("Missing mandatory thread_id in the input!"))
 
-        response = None
+        skill = message_payload.skill
+        with (
+            metrics.A2A_SKILL_ERRORS.labels(skill).count_exceptions(),
+            metrics.A2A_SKILL_DURATION.labels(skill).time(),
+        ):
+            await self._execute_skill(context, event_queue, message_payload)
+
+    async def _execute_skill(
+        self,
+        context: RequestContext,
+        event_queue: EventQueue,
+        message_payload: EchoAgentA2AInputMessage,
+    ):
+        if message_payload.skill == EchoAgentSkills.DELETE_HISTORY:
+            output = await self.perform_delete_history(data=message_payload.data)
+            if output:
+                await event_queue.enqueue_event(new_agent_text_message(text=output))
+                return
+            raise ValueError("No response received from the actor(s)!")
+
+        # Echoed responses and histories are streamed as task artifacts, so that
+        # long histories are sent in chunks of bounded size.
+        task = context.current_task
+        if not task:
+            if context.message is None:
+                raise ValueError("No message was received to create a task for!")
+            task = new_task(context.message)
+            await event_queue.enqueue_event(task)
+        updater = TaskUpdater(event_queue, task.id, task.context_id)
         match message_payload.skill:
             case EchoAgentSkills.ECHO:
-                response = await self.perform_echo(data=message_payload.data)
+                echoed = await self.perform_echo(data=message_payload.data)
+                if not echoed:
+                    raise ValueError("No response received from the actor(s)!")
+                await updater.add_artifact(
+                    parts=[Part(root=DataPart(data={**echoed, "past": []}))],
+                    name=EchoAgentArtifacts.CURRENT,
+                    last_chunk=True,
+                )
+                await self._add_chunked_artifact(
+                    updater,
+                    EchoAgentArtifacts.PAST,
+                    self._paginate_past(echoed),
+                )
             case EchoAgentSkills.HISTORY:
-                response = await self.perform_history(data=message_payload.data)
-            case EchoAgentSkills.DELETE_HISTORY:
-                response = await self.perform_delete_history(data=message_payload.data)
+                await self._add_chunked_artifact(
+                    updater,
+                    EchoAgentArtifacts.PAST,
+                    self.stream_history(data=message_payload.data),
+                )
+            case EchoAgentSkills.BATCH_ECHO:
+                await self._add_chunked_artifact(
+                    updater,
+                    EchoAgentArtifacts.RESULTS,
+                    self.perform_batch_echo(data=message_payload.data),
+                )
+            case EchoAgentSkills.BULK_HISTORY:
+                await self._add_chunked_artifact(
+                    updater,
+                    EchoAgentArtifacts.RESULTS,
+                    self.perform_bulk_history(data=message_payload.data),
+                )
+            case EchoAgentSkills.BULK_DELETE_HISTORY:
+                await self._add_chunked_artifact(
+                    updater,
+                    EchoAgentArtifacts.RESULTS,
+                    self.perform_bulk_delete_history(data=message_payload.data),
+                )
+            case EchoAgentSkills.QUEUED_ECHO:
+                # The task is left submitted, and is completed when the result of
+                # the echo is delivered back through the pub/sub component.
+                await self._publish(
+                    QUEUED_ECHO_TOPIC,
+                    QueuedEchoRequest(
+                        task_id=task.id,
+                        context_id=task.context_id,
+                        input=message_payload.data,
+                    ),
+                )
+                return
             case _:
                 raise ValueError(f"Unknown skill '{message_payload.skill}' requested!")
-        if response:
-            await event_queue.enqueue_event(new_agent_text_message(text=response))
-        else:
-            raise ValueError("No response received from the actor(s)!")
+        await updater.complete()
 
     async def cancel(self, context: RequestContext, event_queue: EventQueue):
         message_payload = EchoAgentA2AInputMessage.model_validate_json(
@@ -86,17 +526,15 @@ class EchoAgentExecutor(AgentExecutor):
         if (
             not message_payload
             or not message_payload.data
-            or message_payload.data.thread_id.strip() == ""
+            or any(
+                thread_id.strip() == ""
+                for thread_id in message_payload.data.thread_ids or []
+            )
         ):
             raise ValueError(("Missing mandatory thread_id in the input!"))
 
-        proxy = ActorProxy.create(
-            actor_type=self._actor_type,
-            actor_id=ActorId(actor_id=message_payload.data.thread_id),
-            actor_interface=EchoTaskActorInterface,
-            actor_proxy_factory=self._factory,
-        )
-        result = await proxy.invoke_method(method="Cancel")
-        await event_queue.enqueue_event(
-            new_agent_text_message(text=result.decode().strip("\"'"))
-        )
+        metrics.A2A_TASK_CANCELS.inc()
+        # A batch may span several threads, each of which is cancelled.
+        for thread_id in dict.fromkeys(message_payload.data.thread_ids or []):
+            result = await self._invoke_actor(thread_id, "Cancel")
+            await event_queue.enqueue_event(new_agent_text_message(text=result))
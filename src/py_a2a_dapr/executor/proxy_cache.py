@@ -0,0 +1,46 @@
+import time
+from collections import OrderedDict
+from datetime import timedelta
+from typing import Callable, Generic, Hashable, Optional, Tuple, TypeVar
+
+T = TypeVar("T")
+
+
+class ActorProxyCache(Generic[T]):
+    """
+    A least-recently-used cache of actor proxies, keyed by actor type and actor ID,
+    whose entries also expire after a time-to-live.
+    """
+
+    def __init__(self, max_size: int, ttl: Optional[timedelta] = None):
+        self._max_size = max_size
+        self._ttl = ttl.total_seconds() if ttl else None
+        self._entries: OrderedDict[Hashable, Tuple[float, T]] = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get_or_create(self, key: Hashable, create: Callable[[], T]) -> T:
+        """
+        Return the cached proxy for the key, creating and caching it if it is
+        missing or has expired.
+        """
+        now = time.monotonic()
+        entry = self._entries.get(key)
+        if entry is not None and (self._ttl is None or now - entry[0] < self._ttl):
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+        self.misses += 1
+        proxy = create()
+        if self._max_size > 0:
+            self._entries[key] = (now, proxy)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self._max_size:
+                self._entries.popitem(last=False)
+        return proxy
+
+    def clear(self) -> None:
+        self._entries.clear()
@@ -0,0 +1,150 @@
+import os
+import re
+import time
+
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    REGISTRY,
+    CollectorRegistry,
+    Counter,
+    Gauge,
+    Histogram,
+    generate_latest,
+    multiprocess,
+)
+from starlette.requests import Request
+from starlette.responses import Response
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+# Latencies from a fraction of a millisecond, in process, up to tens of seconds
+# for long streamed histories.
+LATENCY_BUCKETS = (
+    0.0005,
+    0.001,
+    0.0025,
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+    10.0,
+    30.0,
+)
+
+A2A_SKILL_DURATION = Histogram(
+    "a2a_skill_duration_seconds",
+    "The time taken to execute a request for an A2A skill, including streaming the response.",
+    ["skill"],
+    buckets=LATENCY_BUCKETS,
+)
+A2A_SKILL_ERRORS = Counter(
+    "a2a_skill_errors_total",
+    "The number of requests for an A2A skill that failed.",
+    ["skill"],
+)
+A2A_TASK_CANCELS = Counter(
+    "a2a_task_cancels_total",
+    "The number of A2A tasks that were requested to be cancelled.",
+)
+ACTOR_CALL_DURATION = Histogram(
+    "actor_call_duration_seconds",
+    "The time taken by an actor call made by the A2A server, through the Dapr sidecar.",
+    ["actor_type", "method"],
+    buckets=LATENCY_BUCKETS,
+)
+ACTOR_METHOD_DURATION = Histogram(
+    "actor_method_duration_seconds",
+    "The time taken by the Dapr service to handle a call to an actor method, reminder or timer.",
+    ["actor_type", "method"],
+    buckets=LATENCY_BUCKETS,
+)
+ACTOR_METHOD_ERRORS = Counter(
+    "actor_method_errors_total",
+    "The number of calls to an actor method, reminder or timer that failed.",
+    ["actor_type", "method"],
+)
+ACTIVE_ACTORS = Gauge(
+    "actors_active",
+    "The number of actors that are active.",
+    ["actor_type"],
+    multiprocess_mode="livesum",
+)
+ECHO_HISTORY_ENTRIES = Histogram(
+    "echo_history_entries",
+    "The number of entries retained in the history of a thread, as it is appended to.",
+    buckets=(1, 4, 16, 64, 256, 1024, 4096, 16384, 65536),
+)
+ECHO_HISTORY_BYTES = Histogram(
+    "echo_history_bytes",
+    "The JSON size of the history retained for a thread, as it is appended to.",
+    buckets=(256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304, 16777216),
+)
+STATE_COMPRESSED_VALUES = Counter(
+    "actor_state_compressed_values_total",
+    "The number of actor state values that were compressed.",
+)
+STATE_UNCOMPRESSED_BYTES = Counter(
+    "actor_state_uncompressed_bytes_total",
+    "The JSON size of the actor state values before they were compressed.",
+)
+STATE_COMPRESSED_BYTES = Counter(
+    "actor_state_compressed_bytes_total",
+    "The size of the actor state values after they were compressed.",
+)
+
+
+async def metrics_endpoint(request: Request) -> Response:
+    """
+    Serve the metrics in the Prometheus text format. With several worker processes,
+    the metrics of all workers are served if PROMETHEUS_MULTIPROC_DIR is set.
+    """
+    registry = REGISTRY
+    if "PROMETHEUS_MULTIPROC_DIR" in os.environ:
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    return Response(generate_latest(registry), media_type=CONTENT_TYPE_LATEST)
+
+
+# The paths at which the Dapr sidecar calls actor methods, reminders and timers.
+_ACTOR_METHOD_PATH = re.compile(
+    r"^/actors/(?P<actor_type>[^/]+)/[^/]+/method/(?P<method>remind|timer|[^/]+)"
+)
+
+
+class ActorMethodMetricsMiddleware:
+    """
+    Measures the calls of the Dapr sidecar to actor methods, reminders and timers,
+    labelled by actor type and method but not by actor ID.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        match = (
+            _ACTOR_METHOD_PATH.match(scope["path"]) if scope["type"] == "http" else None
+        )
+        if not match:
+            await self.app(scope, receive, send)
+            return
+        labels = (match["actor_type"], match["method"])
+        status = 500
+
+        async def send_with_status(message: Message) -> None:
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            ACTOR_METHOD_DURATION.labels(*labels).observe(time.perf_counter() - started)
+            if status >= 400:
+                ACTOR_METHOD_ERRORS.labels(*labels).inc()
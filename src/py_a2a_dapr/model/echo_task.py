@@ -3,8 +3,15 @@ from abc import ABC
 from enum import StrEnum, auto
 from typing import List, Optional, Union
 
-from typing_extensions import Annotated
-from pydantic import BaseModel
+from typing_extensions import Annotated, Self
+from pydantic import (
+    BaseModel,
+    Field,
+    NonNegativeInt,
+    PositiveInt,
+    StringConstraints,
+    model_validator,
+)
 
 
 class TaskActorInput(BaseModel, ABC):
@@ -13,19 +20,111 @@ class TaskActorInput(BaseModel, ABC):
         "Unique identifier for the thread (or task). Not called task_id to avoid confusion with A2A equivalent.",
     ]
 
+    @property
+    def thread_ids(self) -> List[str]:
+        return [self.thread_id]
+
 
 class EchoInput(TaskActorInput):
     user_input: Annotated[Optional[str], "Input string to be echoed back"]
+    history_mode: Annotated[
+        str,
+        StringConstraints(pattern=r"^(none|full|tail:[1-9][0-9]*)$"),
+        "How much of the past history to include in the response: none, full or tail:N for the last N entries",
+    ] = "full"
+
+    @property
+    def history_tail_length(self) -> Optional[int]:
+        """
+        The number of most recent past entries to respond with, or None for all of them.
+        """
+        match self.history_mode.split(":"):
+            case ["none"]:
+                return 0
+            case ["tail", length]:
+                return int(length)
+            case _:
+                return None
+
+
+class BatchEchoInput(BaseModel):
+    items: Annotated[
+        List[EchoInput],
+        Field(min_length=1),
+        "Inputs to be echoed, possibly for different threads. Inputs for the same thread are echoed in the order given.",
+    ]
+    ordered: Annotated[
+        bool,
+        "Whether results are returned in the order of the inputs, or as soon as each is echoed",
+    ] = True
+
+    @property
+    def thread_ids(self) -> List[str]:
+        return [item.thread_id for item in self.items]
 
 
 class EchoHistoryInput(TaskActorInput):
-    pass
+    limit: Annotated[
+        Optional[PositiveInt],
+        "Maximum number of the most recent entries to return. All entries are returned if not specified.",
+    ] = None
+    cursor: Annotated[
+        Optional[NonNegativeInt],
+        "Return only entries older than this cursor, as obtained from the next_cursor of a previous page.",
+    ] = None
+    since: Annotated[
+        Optional[datetime], "Return only entries generated after this timestamp"
+    ] = None
+    since_seq: Annotated[
+        Optional[NonNegativeInt],
+        "Return only entries from this sequence number on, such as the sequence number of the next entry when the history was last retrieved",
+    ] = None
+    if_none_match: Annotated[
+        Optional[str],
+        "ETag of the history when it was last retrieved. If the history has not changed since, no entries are returned and the page is marked as not modified.",
+    ] = None
 
 
 class DeleteEchoHistoryInput(TaskActorInput):
     pass
 
 
+class BulkThreadsInput(BaseModel):
+    thread_ids: Annotated[
+        Optional[List[str]],
+        "Identifiers of the threads to act on. Either these or a prefix must be given.",
+    ] = None
+    prefix: Annotated[
+        Optional[str],
+        "Act on all indexed threads whose identifiers start with this prefix, or on all of them if it is empty",
+    ] = None
+
+    @model_validator(mode="after")
+    def check_threads(self) -> Self:
+        if (self.thread_ids is None) == (self.prefix is None):
+            raise ValueError("Exactly one of thread_ids or prefix must be given.")
+        return self
+
+
+class BulkEchoHistoryInput(BulkThreadsInput):
+    limit: Annotated[
+        Optional[PositiveInt],
+        "Maximum number of the most recent entries to return for each thread. All entries are returned if not specified.",
+    ] = None
+    since: Annotated[
+        Optional[datetime], "Return only entries generated after this timestamp"
+    ] = None
+
+
+class BulkDeleteEchoHistoryInput(BulkThreadsInput):
+    # An empty prefix would delete the history of every thread.
+    prefix: Annotated[
+        Optional[str],
+        StringConstraints(min_length=1),
+        "Delete the histories of all indexed threads whose identifiers start with this prefix, which must not be empty",
+    ] = None
+
+
 class EchoResponse(BaseModel):
     user_input: Annotated[Optional[str], "User input string to be echoed back"]
     output: Annotated[str, "Output echoed string"]
@@ -36,12 +135,145 @@ class EchoResponse(BaseModel):
 class EchoResponseWithHistory(BaseModel):
     current: Annotated[EchoResponse, "Current echoed response"]
     past: Annotated[List[EchoResponse], "History of echoed responses"]
+    total: Annotated[
+        Optional[int],
+        "Number of entries in the history before the current one, which may exceed the number of past entries included",
+    ] = None
+    seq: Annotated[
+        Optional[int],
+        "Sequence number of the current entry in the history, by which clients can tell whether they missed any entries",
+    ] = None
+    etag: Annotated[
+        Optional[str],
+        "ETag of the history once the current entry was added to it",
+    ] = None
+
+
+class EchoHistoryPage(BaseModel):
+    past: Annotated[List[EchoResponse], "Page of past echoed responses, oldest first"]
+    total: Annotated[int, "Total number of entries in the history"]
+    next_cursor: Annotated[
+        Optional[int],
+        "Cursor to fetch the preceding (older) page with, or None if this is the oldest page",
+    ] = None
+    seq: Annotated[
+        Optional[int],
+        "Sequence number of the first entry of the page, from which the following entries are numbered consecutively",
+    ] = None
+    etag: Annotated[
+        Optional[str],
+        "ETag of the history, with which to ask for it again only if it has changed",
+    ] = None
+    not_modified: Annotated[
+        bool, "Whether the history has not changed since the ETag it was asked with"
+    ] = False
+
+
+class BatchEchoResult(BaseModel):
+    index: Annotated[int, "Position of the corresponding input in the batch"]
+    response: Annotated[
+        Optional[EchoResponseWithHistory], "Echoed response, unless echoing failed"
+    ] = None
+    error: Annotated[Optional[str], "Reason why echoing failed, if it did"] = None
+
+
+class BulkEchoHistoryResult(BaseModel):
+    thread_id: Annotated[str, "Identifier of the thread"]
+    page: Annotated[
+        Optional[EchoHistoryPage],
+        "Page of the history of the thread, unless retrieving it failed. Pages of a thread follow each other, most recent page first.",
+    ] = None
+    error: Annotated[Optional[str], "Reason why retrieving the history failed"] = None
+
+
+class BulkDeleteEchoHistoryResult(BaseModel):
+    thread_id: Annotated[str, "Identifier of the thread"]
+    output: Annotated[Optional[str], "Outcome of deleting the history"] = None
+    error: Annotated[Optional[str], "Reason why deleting the history failed"] = None
+
+
+class EchoHistoryHead(BaseModel):
+    segment_size: Annotated[
+        int, "Maximum number of entries held by a single history segment"
+    ]
+    count: Annotated[
+        int,
+        "Total number of entries ever appended, which is also the sequence number of the next entry",
+    ] = 0
+    first: Annotated[
+        int, "Sequence number of the oldest entry retained in the history"
+    ] = 0
+    digest: Annotated[
+        str, "Hash chained over all the entries ever appended, in hexadecimal"
+    ] = ""
+
+    @property
+    def etag(self) -> str:
+        """
+        The ETag of the retained history, which changes whenever entries are
+        appended, trimmed or deleted.
+        """
+        return f"{self.first}-{self.count}-{self.digest[:16]}"
+
+    @property
+    def retained(self) -> int:
+        return self.count - self.first
+
+    @property
+    def segments(self) -> range:
+        """
+        The indices of the segments holding the retained entries.
+        """
+        if self.retained <= 0:
+            return range(0)
+        return range(
+            self.first // self.segment_size, (self.count - 1) // self.segment_size + 1
+        )
+
+
+class ThreadIndexHead(BaseModel):
+    bounds: Annotated[
+        List[str],
+        "Lowest thread ID of the range held by each segment, in order, of which the first is always empty",
+    ] = [""]
+    segments: Annotated[
+        List[int], "Index of the segment holding each range of thread IDs"
+    ] = [0]
+    next_segment: Annotated[int, "Index of the next segment to be created"] = 1
+
+
+class QueuedEchoRequest(BaseModel):
+    task_id: Annotated[str, "ID of the A2A task to which the echo belongs"]
+    context_id: Annotated[str, "ID of the A2A context of the task"]
+    input: Annotated[EchoInput, "Input to be echoed by the actor of its thread"]
+
+
+class QueuedEchoResult(BaseModel):
+    task_id: Annotated[str, "ID of the A2A task to which the echo belongs"]
+    context_id: Annotated[str, "ID of the A2A context of the task"]
+    response: Annotated[
+        Optional[EchoResponseWithHistory], "Echoed response, unless echoing failed"
+    ] = None
+    error: Annotated[Optional[str], "Reason why echoing failed, if it did"] = None
 
 
 class EchoAgentSkills(StrEnum):
     ECHO = auto()
     HISTORY = auto()
     DELETE_HISTORY = auto()
+    BATCH_ECHO = auto()
+    BULK_HISTORY = auto()
+    BULK_DELETE_HISTORY = auto()
+    QUEUED_ECHO = auto()
+
+
+class EchoAgentArtifacts(StrEnum):
+    # The current echoed response, without any past history
+    CURRENT = auto()
+    # Pages of past history, most recent page first, streamed as chunks of one artifact
+    PAST = auto()
+    # Results of a batch echo or of a bulk history operation, each streamed as a chunk of one artifact
+    RESULTS = auto()
 
 
 class EchoAgentA2AInputMessage(BaseModel):
@@ -49,6 +281,13 @@ class EchoAgentA2AInputMessage(BaseModel):
         EchoAgentSkills, "Requested skill for which appropriate function is invoked"
     ]
     data: Annotated[
-        Union[EchoInput, EchoHistoryInput, DeleteEchoHistoryInput],
+        Union[
+            EchoInput,
+            EchoHistoryInput,
+            DeleteEchoHistoryInput,
+            BatchEchoInput,
+            BulkEchoHistoryInput,
+            BulkDeleteEchoHistoryInput,
+        ],
         "Input data for the requested skill.",
     ]
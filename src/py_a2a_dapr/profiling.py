@@ -0,0 +1,180 @@
+import asyncio
+import cProfile
+import logging
+import os
+import random
+import re
+import signal
+import time
+from pathlib import Path
+from typing import Annotated, Literal
+from uuid import uuid4
+
+from pydantic import BaseModel, Field, ValidationError, model_validator
+from starlette.requests import Request
+from starlette.responses import JSONResponse, Response
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+try:
+    import pyinstrument
+except ImportError:  # pragma: no cover
+    # Profiling with pyinstrument is only available if the package is installed.
+    pyinstrument = None
+
+from py_a2a_dapr import env
+
+logger = logging.getLogger(__name__)
+
+
+class ProfilingSettings(BaseModel):
+    enabled: Annotated[bool, "Whether requests are profiled at all"] = False
+    sample_rate: Annotated[
+        float,
+        Field(ge=0.0, le=1.0),
+        "The fraction of requests that are profiled, besides those that ask for it with the header",
+    ] = 0.0
+    header: Annotated[
+        str, "The request header with which a request asks to be profiled"
+    ] = "X-Profile"
+    directory: Annotated[str, "The directory to which profiles are written"] = (
+        "profiles"
+    )
+    profiler: Annotated[
+        Literal["cprofile", "pyinstrument"], "The profiler with which to profile"
+    ] = "cprofile"
+
+    @model_validator(mode="after")
+    def check_profiler(self):
+        if self.profiler == "pyinstrument" and pyinstrument is None:
+            raise ValueError("The pyinstrument package is required for pyinstrument.")
+        return self
+
+    @classmethod
+    def from_env(cls) -> "ProfilingSettings":
+        return cls(
+            enabled=env.bool("APP_PROFILING_ENABLED", False),
+            sample_rate=env.float("APP_PROFILING_SAMPLE_RATE", 0.0),
+            header=env.str("APP_PROFILING_HEADER", "X-Profile"),
+            directory=env.str("APP_PROFILING_DIR", "profiles"),
+            profiler=env.str("APP_PROFILING_PROFILER", "cprofile"),
+        )
+
+
+# The settings of this process, which can be changed while it runs.
+profiling_settings = ProfilingSettings.from_env()
+
+
+def toggle_profiling(signum=None, frame=None) -> None:
+    """
+    Switch profiling on or off, as the handler of a signal.
+    """
+    profiling_settings.enabled = not profiling_settings.enabled
+    logger.info(
+        f"Request profiling {'enabled' if profiling_settings.enabled else 'disabled'}"
+    )
+
+
+def install_profiling_signal_handler() -> None:
+    """
+    Switch profiling on or off when the process receives SIGUSR1, where there is
+    such a signal.
+    """
+    if hasattr(signal, "SIGUSR1"):
+        signal.signal(signal.SIGUSR1, toggle_profiling)
+
+
+async def profiling_admin_endpoint(request: Request) -> Response:
+    """
+    Get the profiling settings of this process, or change them with a JSON object
+    of the settings to change. The request must carry the admin token as a bearer
+    token.
+    """
+    token = env.str("APP_PROFILING_ADMIN_TOKEN", None)
+    if not token or request.headers.get("Authorization") != f"Bearer {token}":
+        return JSONResponse({"error": "Unauthorized"}, status_code=401)
+    if request.method == "POST":
+        try:
+            settings = ProfilingSettings.model_validate(
+                {**profiling_settings.model_dump(), **await request.json()}
+            )
+        except (ValueError, ValidationError) as e:
+            return JSONResponse({"error": str(e)}, status_code=400)
+        for name, value in settings:
+            setattr(profiling_settings, name, value)
+        logger.info(f"Request profiling settings changed to {profiling_settings}")
+    return JSONResponse(profiling_settings.model_dump())
+
+
+class RequestProfilingMiddleware:
+    """
+    Profiles a sample of requests, and those that ask for it with a header, while
+    profiling is enabled, and writes a profile per request. One request is profiled
+    at a time, and the profile covers everything that runs in the process while the
+    request is handled, including the tasks that it starts.
+    """
+
+    def __init__(self, app: ASGIApp, excluded_paths: tuple[str, ...] = ("/metrics",)):
+        self.app = app
+        self._excluded_paths = excluded_paths
+        self._profiling = False
+
+    def _should_profile(self, scope: Scope) -> bool:
+        settings = profiling_settings
+        if (
+            not settings.enabled
+            or self._profiling
+            or scope["type"] != "http"
+            or scope["path"] in self._excluded_paths
+            or scope["path"].startswith("/admin/")
+        ):
+            return False
+        header = settings.header.lower().encode()
+        return any(name == header for name, _ in scope["headers"]) or (
+            random.random() < settings.sample_rate
+        )
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if not self._should_profile(scope):
+            await self.app(scope, receive, send)
+            return
+        settings = profiling_settings
+        self._profiling = True
+        path = Path(settings.directory) / (
+            f"{time.strftime('%Y%m%dT%H%M%S')}-{os.getpid()}-{uuid4().hex[:8]}-"
+            f"{scope['method']}{re.sub(r'[^A-Za-z0-9]+', '_', scope['path'])}"
+        )
+        try:
+            if settings.profiler == "pyinstrument":
+                profiler = pyinstrument.Profiler(async_mode="disabled")
+                profiler.start()
+                try:
+                    await self.app(scope, receive, send)
+                finally:
+                    profiler.stop()
+                    await asyncio.to_thread(
+                        self._write, path.with_suffix(".html"), profiler.output_html()
+                    )
+            else:
+                profiler = cProfile.Profile()
+                profiler.enable()
+                try:
+                    await self.app(scope, receive, send)
+                finally:
+                    profiler.disable()
+                    await asyncio.to_thread(
+                        self._dump_stats, profiler, path.with_suffix(".prof")
+                    )
+        finally:
+            self._profiling = False
+
+    @staticmethod
+    def _write(path: Path, output: str) -> None:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(output)
+        logger.info(f"Wrote the request profile {path}")
+
+    @staticmethod
+    def _dump_stats(profiler: cProfile.Profile, path: Path) -> None:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        profiler.dump_stats(path)
+        logger.info(f"Wrote the request profile {path}")
@@ -0,0 +1,136 @@
+from datetime import datetime, timedelta, timezone
+import json
+import logging
+from typing import Any, Awaitable, Callable, Dict
+
+from dapr.actor import ActorId, ActorProxy, ActorProxyFactory
+from dapr.actor.client.proxy import ActorFactoryBase
+from dapr.aio.clients import DaprClient
+from pydantic import BaseModel, ValidationError
+
+from py_a2a_dapr import env
+from py_a2a_dapr.actor.echo_task import EchoTaskActorInterface
+from py_a2a_dapr.model.echo_task import (
+    EchoResponseWithHistory,
+    QueuedEchoRequest,
+    QueuedEchoResult,
+)
+
+logger = logging.getLogger(__name__)
+
+# The Dapr pub/sub component, and the topics through which queued echoes flow from
+# the A2A server to the Dapr service and back.
+PUBSUB_NAME = env.str("APP_PUBSUB_NAME", "pubsub")
+QUEUED_ECHO_TOPIC = env.str("APP_QUEUED_ECHO_TOPIC", "echo-requests")
+QUEUED_ECHO_RESULTS_TOPIC = env.str("APP_QUEUED_ECHO_RESULTS_TOPIC", "echo-results")
+
+# Publishes an event to a topic.
+Publish = Callable[[str, BaseModel], Awaitable[None]]
+
+
+class DaprPublisher:
+    """
+    Publishes events as JSON to a Dapr pub/sub component, through the sidecar.
+    """
+
+    def __init__(self, pubsub_name: str = PUBSUB_NAME):
+        self._pubsub_name = pubsub_name
+        self._client: DaprClient | None = None
+
+    async def __call__(self, topic: str, event: BaseModel) -> None:
+        # Created lazily, since creating a client waits for the sidecar.
+        if self._client is None:
+            self._client = DaprClient()
+        await self._client.publish_event(
+            pubsub_name=self._pubsub_name,
+            topic_name=topic,
+            data=event.model_dump_json(),
+            data_content_type="application/json",
+        )
+
+
+def subscription(topic: str, route: str) -> Dict[str, str]:
+    """
+    A programmatic subscription to a topic of the pub/sub component, as listed by
+    an app at /dapr/subscribe.
+    """
+    return {"pubsubname": PUBSUB_NAME, "topic": topic, "route": route}
+
+
+def event_data(event: Dict[str, Any]) -> Any:
+    """
+    The data of a CloudEvent delivered by Dapr, decoded from JSON if it was sent as
+    a string.
+    """
+    data = event.get("data")
+    return json.loads(data) if isinstance(data, (str, bytes)) else data
+
+
+def event_age(event: Dict[str, Any]) -> timedelta | None:
+    """
+    How long ago a CloudEvent delivered by Dapr was published, from its time
+    attribute, or None if it has no valid time.
+    """
+    try:
+        published = datetime.fromisoformat(event["time"])
+    except (KeyError, TypeError, ValueError):
+        return None
+    if published.tzinfo is None:
+        published = published.replace(tzinfo=timezone.utc)
+    return datetime.now(timezone.utc) - published
+
+
+class QueuedEchoSubscriber:
+    """
+    Echoes the queued echo requests delivered from the pub/sub component with the
+    actors of their threads, and publishes their results for the A2A server. The
+    actors take one call at a time, so the requests wait in the topic rather than
+    as open connections when there are bursts of them.
+    """
+
+    def __init__(
+        self,
+        actor_proxy_factory: ActorFactoryBase | None = None,
+        publish: Publish | None = None,
+    ):
+        self._factory = actor_proxy_factory
+        self._publish = publish or DaprPublisher()
+
+    def _get_proxy(self, thread_id: str) -> ActorProxy:
+        # Created lazily, since creating a factory waits for the sidecar.
+        if self._factory is None:
+            self._factory = ActorProxyFactory()
+        return ActorProxy.create(
+            actor_type="EchoTaskActor",
+            actor_id=ActorId(actor_id=thread_id),
+            actor_interface=EchoTaskActorInterface,
+            actor_proxy_factory=self._factory,
+        )
+
+    async def handle(self, event: Dict[str, Any]) -> Dict[str, str]:
+        """
+        Handle a delivered event, and respond with the status with which Dapr
+        acknowledges it. Requests that cannot be parsed are dropped. Echoes that
+        fail are reported as failed results, rather than retried, so that an
+        input is never added to a history twice.
+        """
+        try:
+            request = QueuedEchoRequest.model_validate(event_data(event))
+        except (ValueError, ValidationError) as e:
+            logger.warning(f"Dropping an invalid queued echo request. {e}")
+            return {"status": "DROP"}
+        result = QueuedEchoResult(
+            task_id=request.task_id, context_id=request.context_id
+        )
+        try:
+            response = await self._get_proxy(request.input.thread_id).invoke_method(
+                method="Echo", raw_body=request.input.model_dump_json().encode()
+            )
+            if not response:
+                raise ValueError("No response received from the actor(s)!")
+            result.response = EchoResponseWithHistory.model_validate_json(response)
+        except Exception as e:
+            logger.warning(f"Queued echo for task {request.task_id} failed. {e}")
+            result.error = str(e) or e.__class__.__name__
+        await self._publish(QUEUED_ECHO_RESULTS_TOPIC, result)
+        return {"status": "SUCCESS"}
@@ -4,46 +4,162 @@ from dapr.actor.runtime.config import (
     ActorTypeConfig,
     ActorReentrancyConfig,
 )
-from fastapi import FastAPI
+from fastapi import Body, FastAPI
 import uvicorn
-from dapr.ext.fastapi import DaprActor
+from dapr.ext.fastapi import DaprActor, DaprApp
+from dapr.serializers import DefaultJSONSerializer
+from py_a2a_dapr.actor.codec import PlainJSONSerializer
 from py_a2a_dapr.actor.echo_task import EchoTaskActor
+from py_a2a_dapr.actor.thread_index import ThreadIndexActor
+from py_a2a_dapr.metrics import ActorMethodMetricsMiddleware, metrics_endpoint
+from py_a2a_dapr.profiling import (
+    RequestProfilingMiddleware,
+    install_profiling_signal_handler,
+    profiling_admin_endpoint,
+)
+from py_a2a_dapr.pubsub import PUBSUB_NAME, QUEUED_ECHO_TOPIC, QueuedEchoSubscriber
 
 from contextlib import asynccontextmanager
+from datetime import timedelta
+import logging
 
 from py_a2a_dapr import env
 
+logger = logging.getLogger(__name__)
+
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     dapr_actor = DaprActor(app)
-    await dapr_actor.register_actor(EchoTaskActor)
+    # Actor messages and state are read back as plain JSON, so that strings that
+    # look like timestamps or durations are not turned into objects.
+    await dapr_actor.register_actor(
+        EchoTaskActor,
+        message_serializer=PlainJSONSerializer(),
+        state_serializer=PlainJSONSerializer(),
+    )
+    await dapr_actor.register_actor(
+        ThreadIndexActor,
+        message_serializer=PlainJSONSerializer(),
+        state_serializer=PlainJSONSerializer(),
+    )
     yield
 
 
-app = FastAPI(
-    title="Dapr Service",
-    # We should be using lifespan instead of on_event
-    lifespan=lifespan,
-)
+def create_app() -> FastAPI:
+    """
+    Create the Dapr service application. This is the application factory that each
+    worker process calls.
+    """
+    app = FastAPI(
+        title="Dapr Service",
+        # We should be using lifespan instead of on_event
+        lifespan=lifespan,
+    )
+    app.add_middleware(ActorMethodMetricsMiddleware)
+    # Queued echo requests published by the A2A server are echoed by the actors.
+    queued_echo_subscriber = QueuedEchoSubscriber()
+
+    @DaprApp(app).subscribe(pubsub=PUBSUB_NAME, topic=QUEUED_ECHO_TOPIC)
+    async def queued_echo(event: dict = Body(...)) -> dict:
+        return await queued_echo_subscriber.handle(event)
+
+    app.add_route("/metrics", metrics_endpoint, methods=["GET"])
+    app.add_route("/admin/profiling", profiling_admin_endpoint, methods=["GET", "POST"])
+    app.add_middleware(RequestProfilingMiddleware)
+    install_profiling_signal_handler()
+    return app
 
-config = ActorRuntimeConfig()
-config.update_actor_type_configs(
-    [
-        ActorTypeConfig(
-            actor_type=EchoTaskActor.__name__,
-            reentrancy=ActorReentrancyConfig(enabled=True),
+
+def actor_type_config(
+    actor_type: str, env_prefix: str, reentrancy: bool = False
+) -> ActorTypeConfig:
+    """
+    Create the runtime configuration of an actor type from environment variables
+    with the given prefix. Settings that are not set fall back to those of the
+    actor runtime.
+    """
+    return ActorTypeConfig(
+        actor_type=actor_type,
+        actor_idle_timeout=env.timedelta(f"{env_prefix}_IDLE_TIMEOUT", None),
+        actor_scan_interval=env.timedelta(f"{env_prefix}_SCAN_INTERVAL", None),
+        drain_ongoing_call_timeout=env.timedelta(
+            f"{env_prefix}_DRAIN_ONGOING_CALL_TIMEOUT", None
+        ),
+        drain_rebalanced_actors=env.bool(f"{env_prefix}_DRAIN_REBALANCED_ACTORS", None),
+        reentrancy=ActorReentrancyConfig(
+            enabled=True,
+            maxStackDepth=env.int(f"{env_prefix}_REENTRANCY_MAX_STACK_DEPTH", 32),
         )
-    ]
-)
-ActorRuntime.set_actor_config(config)
+        if env.bool(f"{env_prefix}_REENTRANCY", reentrancy)
+        else None,
+        reminders_storage_partitions=env.int(
+            f"{env_prefix}_REMINDERS_STORAGE_PARTITIONS", None
+        ),
+    )
+
+
+def actor_runtime_config() -> ActorRuntimeConfig:
+    """
+    Create the actor runtime configuration from environment variables. The defaults
+    are those of Dapr.
+    """
+    config = ActorRuntimeConfig(
+        actor_idle_timeout=env.timedelta("APP_ACTOR_IDLE_TIMEOUT", timedelta(hours=1)),
+        actor_scan_interval=env.timedelta(
+            "APP_ACTOR_SCAN_INTERVAL", timedelta(seconds=30)
+        ),
+        drain_ongoing_call_timeout=env.timedelta(
+            "APP_ACTOR_DRAIN_ONGOING_CALL_TIMEOUT", timedelta(minutes=1)
+        ),
+        drain_rebalanced_actors=env.bool("APP_ACTOR_DRAIN_REBALANCED_ACTORS", True),
+        reminders_storage_partitions=env.int(
+            "APP_ACTOR_REMINDERS_STORAGE_PARTITIONS", None
+        ),
+    )
+    config.update_actor_type_configs(
+        [
+            actor_type_config(
+                EchoTaskActor.__name__, "APP_ECHO_TASK_ACTOR", reentrancy=True
+            ),
+            actor_type_config(ThreadIndexActor.__name__, "APP_THREAD_INDEX_ACTOR"),
+        ]
+    )
+    # Logged as the sidecar reads it, with durations in the Go format.
+    logger.info(
+        f"Actor runtime configuration: {DefaultJSONSerializer().serialize(config.as_dict()).decode()}"
+    )
+    return config
+
+
+ActorRuntime.set_actor_config(actor_runtime_config())
 
 
 def main():
+    """
+    Main function to run the Dapr service, in a single worker process. Actors keep
+    their state resident while active, and the sidecar may call any worker of an
+    app, so more workers would activate the same actor in several of them at once.
+    To use more cores, run more instances of the app, each with its own sidecar and
+    the same app ID, across which Dapr places the actors. On shutdown, actor calls
+    in progress are given some time to complete.
+    """
+    workers = env.int("APP_DAPR_SVC_WORKERS", 1)
+    if workers != 1:
+        raise SystemExit(
+            f"APP_DAPR_SVC_WORKERS is {workers}, but the Dapr service must run in a "
+            "single worker. Run one app and sidecar per core instead."
+        )
     uvicorn.run(
-        app,
+        "py_a2a_dapr.server.dapr:create_app",
+        factory=True,
         host=env.str("APP_HOST", "127.0.0.1"),
         port=env.int("APP_DAPR_SVC_PORT", 32768),
+        timeout_graceful_shutdown=int(
+            env.timedelta(
+                "APP_DAPR_SVC_SHUTDOWN_TIMEOUT", timedelta(seconds=30)
+            ).total_seconds()
+        ),
     )
 
 
@@ -1,35 +1,154 @@
 # server.py
-import asyncio
-import signal
-import sys
+from contextlib import asynccontextmanager
+from datetime import timedelta
+import hashlib
+import logging
+
+import httpx
+from pydantic import ValidationError
+from starlette.applications import Starlette
+from starlette.requests import Request
+from starlette.responses import JSONResponse, Response
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
 import uvicorn
 
+from a2a.server.agent_execution import AgentExecutor
 from a2a.server.apps import A2AStarletteApplication
 from a2a.server.request_handlers import DefaultRequestHandler
-from a2a.server.tasks import InMemoryTaskStore
+from a2a.server.tasks import (
+    BasePushNotificationSender,
+    InMemoryPushNotificationConfigStore,
+)
 from a2a.types import (
     AgentCapabilities,
     AgentCard,
     AgentSkill,
 )
+from a2a.utils.constants import AGENT_CARD_WELL_KNOWN_PATH
 
 from py_a2a_dapr import env
 from py_a2a_dapr.executor.echo_task import EchoAgentExecutor
-from py_a2a_dapr.model.echo_task import EchoAgentSkills
+from py_a2a_dapr.metrics import metrics_endpoint
+from py_a2a_dapr.profiling import (
+    RequestProfilingMiddleware,
+    install_profiling_signal_handler,
+    profiling_admin_endpoint,
+)
+from py_a2a_dapr.model.echo_task import EchoAgentSkills, QueuedEchoResult
+from py_a2a_dapr.pubsub import (
+    QUEUED_ECHO_RESULTS_TOPIC,
+    event_age,
+    event_data,
+    subscription,
+)
+from py_a2a_dapr.server.task_store import (
+    DaprTaskStore,
+    create_task_store,
+    is_task_finished,
+)
+
+logger = logging.getLogger(__name__)
+
+
+class AgentCardETagMiddleware:
+    """
+    Tags the agent card with an ETag, so that clients that cache the card can
+    revalidate it without fetching it again while it has not changed.
+    """
+
+    def __init__(self, app: ASGIApp, agent_card: AgentCard):
+        self.app = app
+        self._etag = f'"{hashlib.sha256(agent_card.model_dump_json().encode()).hexdigest()}"'.encode()
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or scope["path"] != AGENT_CARD_WELL_KNOWN_PATH:
+            await self.app(scope, receive, send)
+            return
+        if dict(scope["headers"]).get(b"if-none-match") == self._etag:
+            await send(
+                {
+                    "type": "http.response.start",
+                    "status": 304,
+                    "headers": [(b"etag", self._etag)],
+                }
+            )
+            await send({"type": "http.response.body", "body": b""})
+            return
+
+        async def send_with_etag(message: Message) -> None:
+            if message["type"] == "http.response.start" and message["status"] == 200:
+                message["headers"] = [
+                    *message.get("headers", []),
+                    (b"etag", self._etag),
+                ]
+            await send(message)
+
+        await self.app(scope, receive, send_with_etag)
+
+
+# The route at which the Dapr sidecar delivers the results of queued echoes.
+QUEUED_ECHO_RESULTS_ROUTE = "/events/echo-results"
+
+
+async def dapr_subscribe_endpoint(request: Request) -> Response:
+    """
+    List the topics to which the Dapr sidecar subscribes this app.
+    """
+    return JSONResponse(
+        [subscription(QUEUED_ECHO_RESULTS_TOPIC, QUEUED_ECHO_RESULTS_ROUTE)]
+    )
+
+
+async def queued_echo_results_endpoint(request: Request) -> Response:
+    """
+    Complete the task of a queued echo with its result, as delivered by the Dapr
+    sidecar, and notify the client if it asked for push notifications. Results for
+    tasks that are not stored yet are retried until they are too old, since the
+    task may never be stored, and those for finished tasks are ignored, since they
+    may be delivered more than once.
+    """
+    try:
+        event = await request.json()
+        result = QueuedEchoResult.model_validate(event_data(event))
+    except (ValueError, ValidationError) as e:
+        logger.warning(f"Dropping an invalid queued echo result. {e}")
+        return JSONResponse({"status": "DROP"})
+    task_store = request.app.state.task_store
+    task = await task_store.get(result.task_id)
+    if task is None:
+        age = event_age(event)
+        if age is not None and age <= request.app.state.queued_echo_result_max_age:
+            return JSONResponse({"status": "RETRY"})
+        logger.warning(
+            f"Dropping the queued echo result for task {result.task_id}, which was "
+            "not stored in time. The task store may not be shared by the workers of "
+            "the A2A server."
+        )
+        return JSONResponse({"status": "DROP"})
+    if not is_task_finished(task):
+        task = await request.app.state.agent_executor.complete_queued_echo(task, result)
+        await task_store.save(task)
+        await request.app.state.push_sender.send_notification(task)
+    return JSONResponse({"status": "SUCCESS"})
 
 
-async def uvicorn_serve():
-    def sigint_handler(signal, frame):
-        """
-        Signal handler to shut down the server gracefully.
-        """
-        print("Attempting graceful shutdown, please wait...")
-        # This is absolutely necessary to exit the program
-        sys.exit(0)
+@asynccontextmanager
+async def lifespan(app: Starlette):
+    yield
+    # The clients that the app created are closed on shutdown.
+    await app.state.push_httpx_client.aclose()
+    if isinstance(app.state.task_store, DaprTaskStore):
+        await app.state.task_store.close()
 
+
+def create_app(agent_executor: AgentExecutor | None = None):
+    """
+    Create the A2A server application. This is the application factory that each
+    worker process calls. An agent executor can be given to call actors other than
+    through the Dapr sidecar.
+    """
     _a2a_uvicorn_host = env.str("APP_A2A_SRV_HOST", "127.0.0.1")
     _a2a_uvicorn_port = env.int("APP_ECHO_A2A_SRV_PORT", 32769)
-    signal.signal(signal.SIGINT, sigint_handler)
 
     echo_skill = AgentSkill(
         id=f"{EchoAgentSkills.ECHO}_skill",
@@ -42,7 +161,7 @@ async def uvicorn_serve():
     history_skill = AgentSkill(
         id=f"{EchoAgentSkills.HISTORY}_skill",
         name=EchoAgentSkills.HISTORY.capitalize(),
-        description="Responds with a history of past messages and their corresponding echoed responses.",
+        description="Responds with a history of past messages and their corresponding echoed responses, optionally paginated by limit, cursor and timestamp, and fetched conditionally by ETag or from a sequence number.",
         tags=[EchoAgentSkills.HISTORY],
     )
 
@@ -52,6 +171,34 @@ async def uvicorn_serve():
         description="Deletes the history of past messages and their corresponding echoed responses.",
         tags=[EchoAgentSkills.DELETE_HISTORY],
     )
+
+    batch_echo_skill = AgentSkill(
+        id=f"{EchoAgentSkills.BATCH_ECHO}_skill",
+        name=EchoAgentSkills.BATCH_ECHO.capitalize(),
+        description="Echo a batch of input messages, possibly for different threads, with results returned in order or as soon as each is echoed.",
+        tags=[EchoAgentSkills.ECHO, EchoAgentSkills.BATCH_ECHO],
+    )
+
+    bulk_history_skill = AgentSkill(
+        id=f"{EchoAgentSkills.BULK_HISTORY}_skill",
+        name=EchoAgentSkills.BULK_HISTORY.capitalize(),
+        description="Responds with the histories of many threads, given by their IDs or by a prefix of their IDs, retrieved concurrently.",
+        tags=[EchoAgentSkills.HISTORY, EchoAgentSkills.BULK_HISTORY],
+    )
+
+    bulk_delete_history_skill = AgentSkill(
+        id=f"{EchoAgentSkills.BULK_DELETE_HISTORY}_skill",
+        name=EchoAgentSkills.BULK_DELETE_HISTORY.capitalize(),
+        description="Deletes the histories of many threads, given by their IDs or by a non-empty prefix of their IDs, concurrently.",
+        tags=[EchoAgentSkills.DELETE_HISTORY, EchoAgentSkills.BULK_DELETE_HISTORY],
+    )
+
+    queued_echo_skill = AgentSkill(
+        id=f"{EchoAgentSkills.QUEUED_ECHO}_skill",
+        name=EchoAgentSkills.QUEUED_ECHO.capitalize(),
+        description="Queues an input message to be echoed, responding at once with a submitted task whose result is available by polling the task or by push notification.",
+        tags=[EchoAgentSkills.ECHO, EchoAgentSkills.QUEUED_ECHO],
+    )
     # This will be the public-facing agent card
     public_agent_card = AgentCard(
         name="Echo Agent",
@@ -60,39 +207,79 @@ async def uvicorn_serve():
         version="0.1.0",
         default_input_modes=["application/json"],
         default_output_modes=["application/json"],
-        capabilities=AgentCapabilities(streaming=True),
+        capabilities=AgentCapabilities(streaming=True, push_notifications=True),
         skills=[
             echo_skill,
             history_skill,
             delete_history_skill,
+            batch_echo_skill,
+            bulk_history_skill,
+            bulk_delete_history_skill,
+            queued_echo_skill,
         ],  # Only the basic skill for the public card
         supports_authenticated_extended_card=False,
     )
 
+    agent_executor = agent_executor or EchoAgentExecutor()
+    task_store = create_task_store()
+    push_config_store = InMemoryPushNotificationConfigStore()
+    push_httpx_client = httpx.AsyncClient()
+    push_sender = BasePushNotificationSender(push_httpx_client, push_config_store)
     request_handler = DefaultRequestHandler(
-        agent_executor=EchoAgentExecutor(),
-        task_store=InMemoryTaskStore(),
+        agent_executor=agent_executor,
+        task_store=task_store,
+        push_config_store=push_config_store,
+        push_sender=push_sender,
     )
 
     a2a_app = A2AStarletteApplication(
         agent_card=public_agent_card,
         http_handler=request_handler,
     )
-    config = uvicorn.Config(
-        a2a_app.build(),
-        host=_a2a_uvicorn_host,
-        port=_a2a_uvicorn_port,
-        log_level="info",
+    app = a2a_app.build(lifespan=lifespan)
+    app.state.agent_executor = agent_executor
+    app.state.task_store = task_store
+    app.state.push_httpx_client = push_httpx_client
+    app.state.push_sender = push_sender
+    app.state.queued_echo_result_max_age = env.timedelta(
+        "APP_QUEUED_ECHO_RESULT_MAX_AGE", timedelta(minutes=5)
+    )
+    app.add_route("/dapr/subscribe", dapr_subscribe_endpoint, methods=["GET"])
+    app.add_route(
+        QUEUED_ECHO_RESULTS_ROUTE, queued_echo_results_endpoint, methods=["POST"]
     )
-    server = uvicorn.Server(config)
-    await server.serve()
+    app.add_route("/metrics", metrics_endpoint, methods=["GET"])
+    app.add_route("/admin/profiling", profiling_admin_endpoint, methods=["GET", "POST"])
+    app.add_middleware(AgentCardETagMiddleware, agent_card=public_agent_card)
+    app.add_middleware(RequestProfilingMiddleware)
+    install_profiling_signal_handler()
+    return app
 
 
 def main():
     """
-    Main function to run the ACP server.
+    Main function to run the A2A server, in one or more worker processes. On
+    shutdown, requests in progress are given some time to complete.
     """
-    asyncio.run(uvicorn_serve())
+    workers = env.int("APP_ECHO_A2A_SRV_WORKERS", 1)
+    if workers > 1 and env.str("APP_A2A_TASK_STORE", "memory") == "memory":
+        logger.warning(
+            "Tasks in the memory A2A task store are not shared between workers, "
+            "consider setting APP_A2A_TASK_STORE to dapr."
+        )
+    uvicorn.run(
+        "py_a2a_dapr.server.echo_a2a:create_app",
+        factory=True,
+        host=env.str("APP_A2A_SRV_HOST", "127.0.0.1"),
+        port=env.int("APP_ECHO_A2A_SRV_PORT", 32769),
+        workers=workers,
+        timeout_graceful_shutdown=int(
+            env.timedelta(
+                "APP_ECHO_A2A_SRV_SHUTDOWN_TIMEOUT", timedelta(seconds=30)
+            ).total_seconds()
+        ),
+        log_level="info",
+    )
 
 
 if __name__ == "__main__":
@@ -0,0 +1,242 @@
+import asyncio
+from collections import OrderedDict
+from contextlib import closing, contextmanager
+from datetime import timedelta
+import logging
+import sqlite3
+import time
+from typing import Dict, Iterator, Optional
+
+from a2a.server.context import ServerCallContext
+from a2a.server.tasks import TaskStore
+from a2a.types import Task, TaskState
+from dapr.aio.clients import DaprClient
+
+from py_a2a_dapr import env
+
+logger = logging.getLogger(__name__)
+
+# Tasks in these states will not change any more, so they can expire.
+FINISHED_TASK_STATES = {
+    TaskState.completed,
+    TaskState.canceled,
+    TaskState.failed,
+    TaskState.rejected,
+}
+
+
+def is_task_finished(task: Task) -> bool:
+    return task.status.state in FINISHED_TASK_STATES
+
+
+class BoundedInMemoryTaskStore(TaskStore):
+    """
+    A task store in memory, like that of the SDK, except that finished tasks expire
+    after a time-to-live and only the most recently finished ones are kept, so that
+    the memory held by the tasks of past requests stays bounded.
+    """
+
+    def __init__(
+        self,
+        finished_task_ttl: Optional[timedelta] = None,
+        max_finished_tasks: Optional[int] = None,
+    ):
+        self._finished_task_ttl = finished_task_ttl
+        self._max_finished_tasks = max_finished_tasks
+        self._tasks: Dict[str, Task] = {}
+        # The times at which tasks finished, oldest first.
+        self._finished_at: OrderedDict[str, float] = OrderedDict()
+
+    def _evict(self) -> None:
+        now = time.monotonic()
+        while self._finished_at:
+            task_id, finished_at = next(iter(self._finished_at.items()))
+            if (
+                self._finished_task_ttl is not None
+                and now - finished_at >= self._finished_task_ttl.total_seconds()
+            ) or (
+                self._max_finished_tasks is not None
+                and len(self._finished_at) > self._max_finished_tasks
+            ):
+                self._finished_at.popitem(last=False)
+                self._tasks.pop(task_id, None)
+            else:
+                break
+
+    async def save(self, task: Task, context: ServerCallContext | None = None) -> None:
+        self._tasks[task.id] = task
+        if is_task_finished(task):
+            if task.id not in self._finished_at:
+                self._finished_at[task.id] = time.monotonic()
+        else:
+            self._finished_at.pop(task.id, None)
+        self._evict()
+
+    async def get(
+        self, task_id: str, context: ServerCallContext | None = None
+    ) -> Task | None:
+        self._evict()
+        return self._tasks.get(task_id)
+
+    async def delete(
+        self, task_id: str, context: ServerCallContext | None = None
+    ) -> None:
+        self._tasks.pop(task_id, None)
+        self._finished_at.pop(task_id, None)
+
+
+class DaprTaskStore(TaskStore):
+    """
+    A task store backed by a Dapr state store, which can be shared by several
+    replicas of the A2A server. Finished tasks expire after a time-to-live, which
+    the state store must support.
+    """
+
+    def __init__(
+        self,
+        store_name: str,
+        finished_task_ttl: Optional[timedelta] = None,
+        key_prefix: str = "a2a_task",
+    ):
+        self._store_name = store_name
+        self._finished_task_ttl = finished_task_ttl
+        self._key_prefix = key_prefix
+        self._client: DaprClient | None = None
+
+    def _get_client(self) -> DaprClient:
+        # Created lazily, since creating a client waits for the sidecar.
+        if self._client is None:
+            self._client = DaprClient()
+        return self._client
+
+    def _key(self, task_id: str) -> str:
+        return f"{self._key_prefix}:{task_id}"
+
+    async def save(self, task: Task, context: ServerCallContext | None = None) -> None:
+        state_metadata = {}
+        if self._finished_task_ttl and is_task_finished(task):
+            state_metadata["ttlInSeconds"] = str(
+                int(self._finished_task_ttl.total_seconds())
+            )
+        await self._get_client().save_state(
+            store_name=self._store_name,
+            key=self._key(task.id),
+            value=task.model_dump_json(exclude_none=True),
+            state_metadata=state_metadata,
+        )
+
+    async def get(
+        self, task_id: str, context: ServerCallContext | None = None
+    ) -> Task | None:
+        response = await self._get_client().get_state(
+            store_name=self._store_name, key=self._key(task_id)
+        )
+        return Task.model_validate_json(response.data) if response.data else None
+
+    async def delete(
+        self, task_id: str, context: ServerCallContext | None = None
+    ) -> None:
+        await self._get_client().delete_state(
+            store_name=self._store_name, key=self._key(task_id)
+        )
+
+    async def close(self) -> None:
+        if self._client is not None:
+            await self._client.close()
+            self._client = None
+
+
+class SQLiteTaskStore(TaskStore):
+    """
+    A task store in a local SQLite database, standing in for the Dapr state store
+    when running without a sidecar. Finished tasks expire after a time-to-live.
+    """
+
+    def __init__(self, path: str, finished_task_ttl: Optional[timedelta] = None):
+        self._path = path
+        self._finished_task_ttl = finished_task_ttl
+        with self._connect() as connection:
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS tasks "
+                "(id TEXT PRIMARY KEY, task TEXT NOT NULL, expires_at REAL)"
+            )
+
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        """
+        Connect to the database for a transaction, which is committed unless it
+        fails, after which the connection is closed.
+        """
+        with closing(sqlite3.connect(self._path)) as connection, connection:
+            yield connection
+
+    def _save(self, task: Task) -> None:
+        now = time.time()
+        expires_at = (
+            now + self._finished_task_ttl.total_seconds()
+            if self._finished_task_ttl and is_task_finished(task)
+            else None
+        )
+        with self._connect() as connection:
+            connection.execute(
+                "INSERT OR REPLACE INTO tasks (id, task, expires_at) VALUES (?, ?, ?)",
+                (task.id, task.model_dump_json(exclude_none=True), expires_at),
+            )
+            # Expired tasks are purged as tasks are saved, so the database stays bounded.
+            connection.execute("DELETE FROM tasks WHERE expires_at <= ?", (now,))
+
+    def _get(self, task_id: str) -> Task | None:
+        with self._connect() as connection:
+            row = connection.execute(
+                "SELECT task FROM tasks WHERE id = ? "
+                "AND (expires_at IS NULL OR expires_at > ?)",
+                (task_id, time.time()),
+            ).fetchone()
+        return Task.model_validate_json(row[0]) if row else None
+
+    def _delete(self, task_id: str) -> None:
+        with self._connect() as connection:
+            connection.execute("DELETE FROM tasks WHERE id = ?", (task_id,))
+
+    async def save(self, task: Task, context: ServerCallContext | None = None) -> None:
+        await asyncio.to_thread(self._save, task)
+
+    async def get(
+        self, task_id: str, context: ServerCallContext | None = None
+    ) -> Task | None:
+        return await asyncio.to_thread(self._get, task_id)
+
+    async def delete(
+        self, task_id: str, context: ServerCallContext | None = None
+    ) -> None:
+        await asyncio.to_thread(self._delete, task_id)
+
+
+def create_task_store() -> TaskStore:
+    """
+    Create the task store selected by configuration: memory (the default), dapr
+    or sqlite.
+    """
+    kind = env.str("APP_A2A_TASK_STORE", "memory")
+    finished_task_ttl = env.timedelta("APP_A2A_TASK_TTL", timedelta(hours=1))
+    logger.info(f"Using the {kind} A2A task store")
+    match kind:
+        case "memory":
+            return BoundedInMemoryTaskStore(
+                finished_task_ttl=finished_task_ttl,
+                max_finished_tasks=env.int("APP_A2A_TASK_MEMORY_MAX_FINISHED", 1024),
+            )
+        case "dapr":
+            return DaprTaskStore(
+                store_name=env.str("APP_A2A_TASK_STATE_STORE", "statestore"),
+                finished_task_ttl=finished_task_ttl,
+            )
+        case "sqlite":
+            return SQLiteTaskStore(
+                path=env.str("APP_A2A_TASK_SQLITE_PATH", "a2a_tasks.sqlite3"),
+                finished_task_ttl=finished_task_ttl,
+            )
+        case _:
+            raise ValueError(
+                f"Unknown A2A task store '{kind}', expected one of: memory, dapr, sqlite"
+            )
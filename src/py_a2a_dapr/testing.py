@@ -0,0 +1,132 @@
+import asyncio
+import json
+from typing import Dict, Optional, Tuple, Type
+
+from dapr.actor import Actor, ActorId, ActorInterface, ActorProxy
+from dapr.actor.client.proxy import ActorFactoryBase
+from dapr.actor.runtime._type_information import ActorTypeInformation
+from dapr.actor.runtime.context import ActorRuntimeContext
+from dapr.actor.runtime.manager import ActorManager
+from dapr.clients.base import DaprActorClientBase
+from dapr.serializers import Serializer
+
+from py_a2a_dapr.actor.codec import PlainJSONSerializer
+
+
+class FakeActorRuntime(DaprActorClientBase):
+    """
+    An in-process stand-in for the Dapr actor runtime and its state store. It hosts
+    actors and serves actor proxies without a sidecar, so that actors and the agent
+    executor can be tested and benchmarked without any network services. As with
+    Dapr, the calls to each actor are handled one at a time.
+    """
+
+    def __init__(self, serializer: Optional[Serializer] = None):
+        # Actors are registered with plain JSON serializers, as by the Dapr service.
+        self._serializer = serializer or PlainJSONSerializer()
+        self._managers: Dict[str, ActorManager] = {}
+        self._locks: Dict[Tuple[str, str], asyncio.Lock] = {}
+        self.state: Dict[Tuple[str, str, str], bytes] = {}
+        self.reminders: Dict[Tuple[str, str, str], bytes] = {}
+        self.timers: Dict[Tuple[str, str, str], bytes] = {}
+        self.bytes_read = 0
+        self.bytes_written = 0
+        self.proxy_factory = FakeActorProxyFactory(self)
+
+    def register_actor(self, actor: Type[Actor]) -> None:
+        context = ActorRuntimeContext(
+            ActorTypeInformation.create(actor),
+            self._serializer,
+            self._serializer,
+            self,
+        )
+        self._managers[actor.__name__] = ActorManager(context)
+
+    def _manager(self, actor_type: str) -> ActorManager:
+        if actor_type not in self._managers:
+            raise ValueError(f"The actor type {actor_type} is not registered.")
+        return self._managers[actor_type]
+
+    def _lock(self, actor_type: str, actor_id: str) -> asyncio.Lock:
+        return self._locks.setdefault((actor_type, actor_id), asyncio.Lock())
+
+    async def invoke_method(
+        self, actor_type: str, actor_id: str, method: str, data: Optional[bytes] = None
+    ) -> bytes:
+        async with self._lock(actor_type, actor_id):
+            return await self._manager(actor_type).dispatch(
+                ActorId(actor_id), method, data or b""
+            )
+
+    async def fire_reminder(self, actor_type: str, actor_id: str, name: str) -> None:
+        async with self._lock(actor_type, actor_id):
+            await self._manager(actor_type).fire_reminder(
+                ActorId(actor_id), name, self.reminders[(actor_type, actor_id, name)]
+            )
+
+    async def deactivate_all(self) -> None:
+        """
+        Deactivate all active actors, as Dapr does with idle actors, so that they
+        are activated again from the stored state when next called.
+        """
+        for actor_type, manager in self._managers.items():
+            for actor_id in list(manager._active_actors):
+                async with self._lock(actor_type, actor_id):
+                    await manager.deactivate_actor(ActorId(actor_id))
+
+    async def save_state_transactionally(
+        self, actor_type: str, actor_id: str, data: bytes
+    ) -> None:
+        self.bytes_written += len(data)
+        for operation in json.loads(data):
+            key = (actor_type, actor_id, operation["request"]["key"])
+            if operation["operation"] == "upsert":
+                self.state[key] = json.dumps(operation["request"]["value"]).encode()
+            else:
+                self.state.pop(key, None)
+
+    async def get_state(self, actor_type: str, actor_id: str, name: str) -> bytes:
+        value = self.state.get((actor_type, actor_id, name), b"")
+        self.bytes_read += len(value)
+        return value
+
+    async def register_reminder(
+        self, actor_type: str, actor_id: str, name: str, data: bytes
+    ) -> None:
+        self.reminders[(actor_type, actor_id, name)] = data
+
+    async def unregister_reminder(
+        self, actor_type: str, actor_id: str, name: str
+    ) -> None:
+        self.reminders.pop((actor_type, actor_id, name), None)
+
+    async def register_timer(
+        self, actor_type: str, actor_id: str, name: str, data: bytes
+    ) -> None:
+        self.timers[(actor_type, actor_id, name)] = data
+
+    async def unregister_timer(self, actor_type: str, actor_id: str, name: str) -> None:
+        self.timers.pop((actor_type, actor_id, name), None)
+
+
+class FakeActorProxyFactory(ActorFactoryBase):
+    """
+    Creates proxies of actors hosted by a fake actor runtime.
+    """
+
+    def __init__(self, runtime: FakeActorRuntime):
+        self._runtime = runtime
+
+    def create(
+        self,
+        actor_type: str,
+        actor_id: ActorId,
+        actor_interface: Optional[Type[ActorInterface]] = None,
+    ) -> ActorProxy:
+        return ActorProxy(
+            self._runtime,
+            actor_type,
+            actor_id,
+            actor_interface,
+            self._runtime._serializer,
+        )
@@ -1,26 +1,35 @@
+import asyncio
 import logging
 import signal
 import sys
-from typing import List
+from typing import Any, AsyncIterator, List, Optional, Tuple
 from uuid import uuid4
 
 
-from a2a.client import A2ACardResolver, ClientFactory, ClientConfig
+from a2a.client import Client
 from a2a.types import (
+    AgentCard,
     Message,
 )
 from a2a.utils import get_message_text
 
-import httpx
-from pydantic import TypeAdapter
 from py_a2a_dapr import env
 import gradio as gr
 
+from py_a2a_dapr.client.connection import (
+    agent_card_cache,
+    create_a2a_client,
+    create_httpx_client,
+)
+from py_a2a_dapr.client.streaming import iter_artifact_data, merge_history_pages
+
 from py_a2a_dapr.model.echo_task import (
     DeleteEchoHistoryInput,
     EchoAgentA2AInputMessage,
+    EchoAgentArtifacts,
     EchoAgentSkills,
     EchoHistoryInput,
+    EchoHistoryPage,
     EchoInput,
     EchoResponse,
     EchoResponseWithHistory,
@@ -37,6 +46,139 @@ class GradioApp:
         self._echo_a2a_base_url = (
             f"http://{self._echo_a2a_uvicorn_host}:{self._echo_a2a_uvicorn_port}"
         )
+        # One pooled HTTP client is shared by all the sessions of this app, and the
+        # A2A client on it is created with the agent card when it is first needed.
+        self._httpx_client = create_httpx_client(
+            env.int("APP_GRADIO_A2A_MAX_CONNECTIONS", 16)
+        )
+        self._agent_card: Optional[AgentCard] = None
+        self._a2a_client: Optional[Client] = None
+        self._a2a_client_lock = asyncio.Lock()
+        self._event_loop: Optional[asyncio.AbstractEventLoop] = None
+        # Chats are shown from their most recent entries, a page at a time.
+        self._history_page_size = env.int("APP_GRADIO_HISTORY_PAGE_SIZE", 20)
+
+    async def get_a2a_client(self) -> Tuple[Client, AgentCard]:
+        """
+        Get the A2A client shared by all the sessions of this app, and the agent
+        card with which it was created.
+        """
+        async with self._a2a_client_lock:
+            if self._a2a_client is None or self._agent_card is None:
+                self._event_loop = asyncio.get_running_loop()
+                self._agent_card = await agent_card_cache.get_agent_card(
+                    self._httpx_client, self._echo_a2a_base_url
+                )
+                self._a2a_client = await create_a2a_client(
+                    self._httpx_client, self._echo_a2a_base_url, self._agent_card
+                )
+            return self._a2a_client, self._agent_card
+
+    async def send_message(self, message_payload: EchoAgentA2AInputMessage):
+        """
+        Send a message for a skill of the agent with the shared A2A client, and
+        return its streaming response.
+        """
+        client, _ = await self.get_a2a_client()
+        send_message = Message(
+            role="user",
+            parts=[{"kind": "text", "text": message_payload.model_dump_json()}],
+            message_id=str(uuid4()),
+        )
+        return client.send_message(send_message)
+
+    async def fetch_history_pages(
+        self, query: EchoHistoryInput
+    ) -> AsyncIterator[EchoHistoryPage]:
+        """
+        Yield the pages of history streamed by the agent, most recent page first.
+        """
+        streaming_response = await self.send_message(
+            EchoAgentA2AInputMessage(skill=EchoAgentSkills.HISTORY, data=query)
+        )
+        async for name, data in iter_artifact_data(streaming_response):
+            if name == EchoAgentArtifacts.PAST:
+                yield EchoHistoryPage.model_validate(data)
+
+    async def fetch_missed_entries(
+        self, chat_id: str, next_seq: int, seq: int
+    ) -> Optional[List[EchoResponse]]:
+        """
+        Fetch the entries of a chat from the sequence number of the next entry that
+        was expected, up to but excluding the given sequence number. Returns None
+        if those entries are no longer all retained by the agent.
+        """
+        if seq == next_seq:
+            return []
+        if seq - next_seq > self._history_page_size:
+            # So many entries were missed that the chat is better shown afresh.
+            return None
+        pages = [
+            page
+            async for page in self.fetch_history_pages(
+                EchoHistoryInput(thread_id=chat_id, cursor=seq, limit=seq - next_seq)
+            )
+        ]
+        missed_entries = merge_history_pages(pages)
+        if (
+            not pages
+            or pages[-1].seq != next_seq
+            or len(missed_entries) != seq - next_seq
+        ):
+            return None
+        return missed_entries
+
+    def empty_chat(self) -> dict:
+        """
+        A chat with no entries shown, as kept in the state of a session.
+        """
+        return {"messages": [], "cursor": None, "etag": None, "entries": 0}
+
+    def is_chat_retained(self, chat: dict, retained: Optional[int]) -> bool:
+        """
+        Whether the entries shown in a chat are still all retained by the agent, given
+        how many entries it retains before the next entry that the chat expects. A
+        history that was deleted or trimmed meanwhile retains fewer entries, while
+        older entries may be retained that are not loaded into the chat yet.
+        """
+        entries = chat.get("entries")
+        if entries is None or retained is None:
+            return False
+        return retained == entries or (
+            chat["cursor"] is not None and retained > entries
+        )
+
+    async def fetch_history_page(self, chat_id: str, **query: Any) -> EchoHistoryPage:
+        """
+        Fetch a page of the most recent entries of a chat that match the query,
+        such as those older than a cursor, as one page in chronological order.
+        """
+        pages = [
+            page
+            async for page in self.fetch_history_pages(
+                EchoHistoryInput(
+                    thread_id=chat_id, limit=self._history_page_size, **query
+                )
+            )
+        ]
+        if not pages:
+            return EchoHistoryPage(past=[], total=0)
+        # The most recent page comes first, and the oldest page last.
+        return pages[0].model_copy(
+            update={
+                "past": merge_history_pages(pages),
+                "seq": pages[-1].seq,
+                "next_cursor": pages[-1].next_cursor,
+            }
+        )
+
+    def convert_echo_responses_to_chat_messages(
+        self, responses: List[EchoResponse]
+    ) -> List[gr.ChatMessage]:
+        chat_messages = []
+        for response in responses:
+            chat_messages.extend(self.convert_echo_response_to_chat_messages(response))
+        return chat_messages
 
     def convert_echo_response_to_chat_messages(self, response: EchoResponse):
         chat_messages = []
@@ -94,11 +236,19 @@ class GradioApp:
                         interactive=False,
                     )
                     state_selected_chat_id = gr.State(value=None)
+                    # The chat messages shown in this session, and the cursor to
+                    # load older messages with, by chat ID, so that only new turns
+                    # and older pages are converted and added to them.
+                    state_chats = gr.State(value={})
                 with gr.Column(scale=3):
+                    # The sequence number of the next entry of each chat, by chat ID.
                     bstate_chat_histories = gr.BrowserState(
                         storage_key="a2a_dapr_chat_histories",
                         secret="a2a_dapr_bstate_secret",
                     )
+                    btn_load_older = gr.Button(
+                        "Load older messages", size="sm", visible=False
+                    )
                     chatbot = gr.Chatbot(
                         type="messages",
                         label="Chat history (a new chat will be created if none if selected)",
@@ -133,75 +283,95 @@ class GradioApp:
                 else:
                     yield []
 
-            async def refresh_chat_history_from_agent(chat_id: str) -> list:
-                validated_response = []
-                logger.info(f"Refreshing remote chat history for chat ID: {chat_id}")
-                async with httpx.AsyncClient() as httpx_client:
-                    # initialise A2ACardResolver
-                    resolver = A2ACardResolver(
-                        httpx_client=httpx_client,
-                        base_url=self._echo_a2a_base_url,
-                        # agent_card_path uses default, extended_agent_card_path also uses default
-                    )
-                    final_agent_card_to_use = await resolver.get_agent_card()
-
-                    client = ClientFactory(
-                        config=ClientConfig(
-                            streaming=True, polling=True, httpx_client=httpx_client
-                        )
-                    ).create(card=final_agent_card_to_use)
-
-                    message_payload = EchoAgentA2AInputMessage(
-                        skill=EchoAgentSkills.HISTORY,
-                        data=EchoHistoryInput(
-                            thread_id=chat_id,
-                        ),
-                    )
-
-                    send_message = Message(
-                        role="user",
-                        parts=[
-                            {"kind": "text", "text": message_payload.model_dump_json()}
-                        ],
-                        message_id=str(uuid4()),
-                    )
-                    streaming_response = client.send_message(send_message)
-                    logger.info("Parsing streaming response from the A2A endpoint")
-                    response_adapter = TypeAdapter(List[EchoResponse])
-                    async for response in streaming_response:
-                        if isinstance(response, Message):
-                            full_message_content = get_message_text(response)
-                            validated_response = response_adapter.validate_json(
-                                full_message_content
-                            )
-                chat_history = []
-                for past_message in validated_response:
-                    chat_history.extend(
-                        self.convert_echo_response_to_chat_messages(past_message)
-                    )
-                return chat_history
+            async def load_recent_page(chat_id: str):
+                """
+                Load the most recent page of a chat, and return it as the chat to
+                show, together with the sequence number of its next entry.
+                """
+                logger.info(f"Loading recent chat history for chat ID: {chat_id}")
+                page = await self.fetch_history_page(chat_id)
+                chat = {
+                    "messages": self.convert_echo_responses_to_chat_messages(page.past),
+                    "cursor": page.next_cursor,
+                    "etag": page.etag,
+                    "entries": len(page.past),
+                }
+                return chat, page.seq + len(page.past) if page.seq is not None else None
 
             @gr.on(
                 triggers=[state_selected_chat_id.change],
-                inputs=[state_selected_chat_id, bstate_chat_histories],
-                outputs=[btn_chat_delete, chatbot, bstate_chat_histories],
+                inputs=[state_selected_chat_id, bstate_chat_histories, state_chats],
+                outputs=[
+                    btn_chat_delete,
+                    chatbot,
+                    bstate_chat_histories,
+                    state_chats,
+                    btn_load_older,
+                ],
             )
             async def state_selected_chat_id_changed(
-                selected_chat_id: str, chat_histories: dict
+                selected_chat_id: str, chat_histories: dict, chats: dict
             ):
                 try:
                     if selected_chat_id and selected_chat_id.strip() != "":
-                        refreshed_history = await refresh_chat_history_from_agent(
-                            selected_chat_id
-                        )
-                        chat_histories[selected_chat_id] = refreshed_history
+                        # A chat not shown yet in this session is empty, and loaded.
+                        chat = chats.get(selected_chat_id) or {}
+                        if chat:
+                            # The chat is shown as it was while it is reconciled.
+                            yield (
+                                gr.update(interactive=True),
+                                gr.update(
+                                    value=chat["messages"],
+                                    label=f"Chat ID: {selected_chat_id}",
+                                ),
+                                gr.skip(),
+                                gr.skip(),
+                                gr.update(visible=chat["cursor"] is not None),
+                            )
+                        next_seq = chat_histories.get(selected_chat_id)
+                        page = None
+                        if chat and isinstance(next_seq, int):
+                            # Only what changed since the chat was shown is fetched.
+                            page = await self.fetch_history_page(
+                                selected_chat_id,
+                                since_seq=next_seq,
+                                if_none_match=chat.get("etag"),
+                            )
+                            if page.not_modified:
+                                recent_next_seq = next_seq
+                            elif (
+                                page.seq == next_seq
+                                and page.next_cursor is None
+                                and self.is_chat_retained(
+                                    chat, page.total - len(page.past)
+                                )
+                            ):
+                                chat["messages"].extend(
+                                    self.convert_echo_responses_to_chat_messages(
+                                        page.past
+                                    )
+                                )
+                                chat["etag"] = page.etag
+                                chat["entries"] += len(page.past)
+                                recent_next_seq = next_seq + len(page.past)
+                            else:
+                                # Entries were missed, trimmed or deleted meanwhile.
+                                page = None
+                        if page is None:
+                            chat, recent_next_seq = await load_recent_page(
+                                selected_chat_id
+                            )
+                        chat_histories[selected_chat_id] = recent_next_seq
+                        chats[selected_chat_id] = chat
                         yield (
                             gr.update(interactive=True),
                             gr.update(
-                                value=chat_histories.get(selected_chat_id, []),
+                                value=chat["messages"],
                                 label=f"Chat ID: {selected_chat_id}",
                             ),
                             chat_histories,
+                            chats,
+                            gr.update(visible=chat["cursor"] is not None),
                         )
                     else:
                         yield (
@@ -211,10 +381,41 @@ class GradioApp:
                                 label="Chat history (a new chat will be created if none if selected)",
                             ),
                             chat_histories,
+                            chats,
+                            gr.update(visible=False),
                         )
                 except Exception as e:
                     raise gr.Error(e)
 
+            @gr.on(
+                triggers=[btn_load_older.click],
+                inputs=[state_selected_chat_id, state_chats],
+                outputs=[chatbot, state_chats, btn_load_older],
+            )
+            async def btn_load_older_clicked(selected_chat_id: str, chats: dict):
+                try:
+                    chat = chats.get(selected_chat_id)
+                    if not chat or chat["cursor"] is None:
+                        yield gr.skip(), chats, gr.update(visible=False)
+                        return
+                    page = await self.fetch_history_page(
+                        selected_chat_id, cursor=chat["cursor"]
+                    )
+                    # Each page is older than the messages already shown.
+                    chat["messages"] = (
+                        self.convert_echo_responses_to_chat_messages(page.past)
+                        + chat["messages"]
+                    )
+                    chat["cursor"] = page.next_cursor
+                    chat["entries"] = chat.get("entries", 0) + len(page.past)
+                    yield (
+                        gr.update(value=chat["messages"]),
+                        chats,
+                        gr.update(visible=page.next_cursor is not None),
+                    )
+                except Exception as e:
+                    raise gr.Error(e)
+
             @gr.on(
                 triggers=[list_task_ids.select],
                 outputs=[state_selected_chat_id],
@@ -224,53 +425,31 @@ class GradioApp:
 
             async def delete_remote_chat_history(chat_id: str):
                 logger.info(f"Deleting remote chat history for chat ID: {chat_id}")
-                async with httpx.AsyncClient() as httpx_client:
-                    # initialise A2ACardResolver
-                    resolver = A2ACardResolver(
-                        httpx_client=httpx_client,
-                        base_url=self._echo_a2a_base_url,
-                        # agent_card_path uses default, extended_agent_card_path also uses default
-                    )
-                    final_agent_card_to_use = await resolver.get_agent_card()
-
-                    client = ClientFactory(
-                        config=ClientConfig(
-                            streaming=True, polling=True, httpx_client=httpx_client
-                        )
-                    ).create(card=final_agent_card_to_use)
-
-                    message_payload = EchoAgentA2AInputMessage(
-                        skill=EchoAgentSkills.DELETE_HISTORY,
-                        data=DeleteEchoHistoryInput(
-                            thread_id=chat_id,
-                        ),
-                    )
-
-                    send_message = Message(
-                        role="user",
-                        parts=[
-                            {"kind": "text", "text": message_payload.model_dump_json()}
-                        ],
-                        message_id=str(uuid4()),
-                    )
-                    streaming_response = client.send_message(send_message)
-                    async for response in streaming_response:
-                        if isinstance(response, Message):
-                            full_message_content = get_message_text(response)
+                message_payload = EchoAgentA2AInputMessage(
+                    skill=EchoAgentSkills.DELETE_HISTORY,
+                    data=DeleteEchoHistoryInput(
+                        thread_id=chat_id,
+                    ),
+                )
+                streaming_response = await self.send_message(message_payload)
+                async for response in streaming_response:
+                    if isinstance(response, Message):
+                        full_message_content = get_message_text(response)
                 logger.info(full_message_content)
 
             @gr.on(
                 triggers=[btn_chat_delete.click],
-                inputs=[bstate_chat_histories, state_selected_chat_id],
-                outputs=[bstate_chat_histories, state_selected_chat_id],
+                inputs=[bstate_chat_histories, state_selected_chat_id, state_chats],
+                outputs=[bstate_chat_histories, state_selected_chat_id, state_chats],
             )
             async def btn_chat_delete_clicked(
-                browser_state_chat_histories: dict, selected_chat_id
+                browser_state_chat_histories: dict, selected_chat_id, chats: dict
             ):
                 if selected_chat_id and browser_state_chat_histories:
                     if selected_chat_id in browser_state_chat_histories:
                         await delete_remote_chat_history(selected_chat_id)
                         del browser_state_chat_histories[selected_chat_id]
+                        chats.pop(selected_chat_id, None)
                         selected_chat_id = None
                     else:
                         gr.Warning(
@@ -278,19 +457,22 @@ class GradioApp:
                         )
                 else:
                     gr.Warning("No chat was selected to delete.")
-                yield browser_state_chat_histories, selected_chat_id
+                yield browser_state_chat_histories, selected_chat_id, chats
 
             @gr.on(
                 triggers=[btn_new_chat.click],
-                inputs=[bstate_chat_histories],
-                outputs=[bstate_chat_histories, state_selected_chat_id],
+                inputs=[bstate_chat_histories, state_chats],
+                outputs=[bstate_chat_histories, state_selected_chat_id, state_chats],
             )
-            async def btn_new_chat_clicked(browser_state_chat_histories: dict):
+            async def btn_new_chat_clicked(
+                browser_state_chat_histories: dict, chats: dict
+            ):
                 new_chat_id = uuid4().hex
                 if not browser_state_chat_histories:
                     browser_state_chat_histories = {}
-                browser_state_chat_histories[new_chat_id] = []
-                yield browser_state_chat_histories, new_chat_id
+                browser_state_chat_histories[new_chat_id] = 0
+                chats[new_chat_id] = self.empty_chat()
+                yield browser_state_chat_histories, new_chat_id, chats
 
             @gr.on(
                 triggers=[btn_echo.click, txt_input.submit],
@@ -298,7 +480,7 @@ class GradioApp:
                     txt_input,
                     state_selected_chat_id,
                     bstate_chat_histories,
-                    chatbot,
+                    state_chats,
                 ],
                 outputs=[
                     txt_input,
@@ -306,101 +488,113 @@ class GradioApp:
                     state_selected_chat_id,
                     chatbot,
                     json_agent_card,
+                    state_chats,
+                    btn_load_older,
                 ],
             )
             async def btn_echo_clicked(
                 txt_input: str,
                 state_selected_chat: str,
                 browser_state_chat_histories: dict,
-                chat_history: list,
+                chats: dict,
             ):
                 try:
-                    selected_chat_id = (
-                        state_selected_chat if state_selected_chat else uuid4().hex
-                    )
                     if not browser_state_chat_histories:
                         browser_state_chat_histories = {}
+                    if state_selected_chat:
+                        selected_chat_id = state_selected_chat
+                        next_seq = browser_state_chat_histories.get(selected_chat_id)
+                        chat = chats.get(selected_chat_id)
+                        if chat is None:
+                            # A chat not shown yet in this session is empty, and is
+                            # loaded from its most recent page once the turn is added.
+                            chat = self.empty_chat()
+                            next_seq = None
+                    else:
+                        selected_chat_id = uuid4().hex
+                        next_seq = 0
+                        chat = self.empty_chat()
 
                     logger.info(f"Sending message to A2A endpoint: {txt_input}")
-                    async with httpx.AsyncClient() as httpx_client:
-                        resolver = A2ACardResolver(
-                            httpx_client=httpx_client,
-                            base_url=self._echo_a2a_base_url,
-                        )
-                        final_agent_card_to_use = await resolver.get_agent_card()
+                    _, agent_card = await self.get_a2a_client()
+
+                    # The chat shown is left as it is until the new turn is added.
+                    yield (
+                        None,
+                        gr.skip(),
+                        selected_chat_id,
+                        gr.skip(),
+                        agent_card.model_dump(),
+                        gr.skip(),
+                        gr.skip(),
+                    )
 
+                    message_payload = EchoAgentA2AInputMessage(
+                        skill=EchoAgentSkills.ECHO,
+                        data=EchoInput(
+                            thread_id=selected_chat_id,
+                            user_input=txt_input,
+                            history_mode="none",
+                        ),
+                    )
+
+                    streaming_response = await self.send_message(message_payload)
+                    logger.info("Parsing streaming response from the A2A endpoint")
+                    async for name, data in iter_artifact_data(streaming_response):
+                        if name != EchoAgentArtifacts.CURRENT:
+                            continue
+                        response_with_history = EchoResponseWithHistory.model_validate(
+                            data
+                        )
+                        seq = response_with_history.seq
+                        total = response_with_history.total
+                        missed_entries = None
+                        # Old browser states hold whole chats rather than sequence numbers.
+                        if (
+                            isinstance(next_seq, int)
+                            and seq is not None
+                            and seq >= next_seq
+                            and total is not None
+                            # A history deleted or trimmed meanwhile keeps its
+                            # sequence numbers, but retains fewer entries.
+                            and self.is_chat_retained(chat, total - (seq - next_seq))
+                        ):
+                            # Other clients may have added to the chat since it was shown.
+                            missed_entries = await self.fetch_missed_entries(
+                                selected_chat_id, next_seq, seq
+                            )
+                        if missed_entries is not None:
+                            # Only the new turns are added to the chat shown.
+                            chat["messages"].extend(
+                                self.convert_echo_responses_to_chat_messages(
+                                    missed_entries + [response_with_history.current]
+                                )
+                            )
+                            next_seq = seq + 1
+                            chat["etag"] = response_with_history.etag
+                            chat["entries"] = (
+                                chat.get("entries", 0) + len(missed_entries) + 1
+                            )
+                        else:
+                            # The chat shown cannot be reconciled with the agent, for
+                            # instance because its history was deleted or trimmed, so
+                            # its most recent page (which now includes the current
+                            # message) is loaded again.
+                            chat, next_seq = await load_recent_page(selected_chat_id)
+
+                        browser_state_chat_histories[selected_chat_id] = next_seq
+                        chats[selected_chat_id] = chat
                         yield (
                             None,
                             browser_state_chat_histories,
                             selected_chat_id,
-                            None,
-                            final_agent_card_to_use.model_dump(),
-                        )
-
-                        client = ClientFactory(
-                            config=ClientConfig(
-                                streaming=True, polling=True, httpx_client=httpx_client
-                            )
-                        ).create(card=final_agent_card_to_use)
-
-                        message_payload = EchoAgentA2AInputMessage(
-                            skill=EchoAgentSkills.ECHO,
-                            data=EchoInput(
-                                thread_id=selected_chat_id,
-                                user_input=txt_input,
+                            gr.update(
+                                value=chat["messages"],
                             ),
+                            agent_card.model_dump(),
+                            chats,
+                            gr.update(visible=chat["cursor"] is not None),
                         )
-
-                        send_message = Message(
-                            role="user",
-                            parts=[
-                                {
-                                    "kind": "text",
-                                    "text": message_payload.model_dump_json(),
-                                }
-                            ],
-                            message_id=str(uuid4()),
-                        )
-
-                        streaming_response = client.send_message(send_message)
-                        logger.info("Parsing streaming response from the A2A endpoint")
-                        async for response in streaming_response:
-                            if isinstance(response, Message):
-                                full_message_content = get_message_text(response)
-                                response_with_history = (
-                                    EchoResponseWithHistory.model_validate_json(
-                                        full_message_content
-                                    )
-                                )
-                                # Although this may seem strange to clear the history, it is necessary
-                                # because the chat may have been modified by another call to the same actor from another client.
-                                chat_history.clear()
-                                # Add any historical messages first -- they are already in reverse chronological order
-                                for past_message in response_with_history.past:
-                                    chat_history.extend(
-                                        self.convert_echo_response_to_chat_messages(
-                                            past_message
-                                        )
-                                    )
-                                # Then add the current message
-                                chat_history.extend(
-                                    self.convert_echo_response_to_chat_messages(
-                                        response_with_history.current
-                                    )
-                                )
-
-                                browser_state_chat_histories[selected_chat_id] = (
-                                    chat_history
-                                )
-                                yield (
-                                    None,
-                                    browser_state_chat_histories,
-                                    selected_chat_id,
-                                    gr.update(
-                                        value=chat_history,
-                                    ),
-                                    final_agent_card_to_use.model_dump(),
-                                )
                 except Exception as e:
                     raise gr.Error(e)
 
@@ -416,6 +610,17 @@ class GradioApp:
         return self.ui
 
     def shutdown(self):
+        # The pooled connections are closed on the event loop that opened them,
+        # before the server that runs it is closed.
+        if self._event_loop and self._event_loop.is_running():
+            try:
+                asyncio.run_coroutine_threadsafe(
+                    self._httpx_client.aclose(), self._event_loop
+                ).result(timeout=5)
+            except Exception as e:
+                logger.warning(f"Could not close the A2A client. {e}")
+        else:
+            asyncio.run(self._httpx_client.aclose())
         if self.ui and self.ui.is_running:
             self.ui.close()
 
@@ -0,0 +1,31 @@
+import pytest
+
+from py_a2a_dapr.actor.echo_task import EchoTaskActor
+from py_a2a_dapr.actor.thread_index import ThreadIndexActor
+from py_a2a_dapr.executor.echo_task import EchoAgentExecutor
+from py_a2a_dapr.server.echo_a2a import create_app
+from py_a2a_dapr.testing import FakeActorRuntime
+
+
+@pytest.fixture
+def fake_actor_runtime(monkeypatch) -> FakeActorRuntime:
+    """
+    An in-process actor runtime hosting the actors, instead of Dapr sidecars.
+    """
+    runtime = FakeActorRuntime()
+    runtime.register_actor(EchoTaskActor)
+    runtime.register_actor(ThreadIndexActor)
+    monkeypatch.setattr(
+        EchoTaskActor, "_thread_index_proxy_factory", runtime.proxy_factory
+    )
+    return runtime
+
+
+@pytest.fixture
+def echo_agent_executor(fake_actor_runtime) -> EchoAgentExecutor:
+    return EchoAgentExecutor(actor_proxy_factory=fake_actor_runtime.proxy_factory)
+
+
+@pytest.fixture
+def echo_a2a_app(echo_agent_executor):
+    return create_app(agent_executor=echo_agent_executor)
@@ -0,0 +1,57 @@
+import asyncio
+import io
+import json
+
+from py_a2a_dapr.client.batch import run_echo_batch
+
+
+class TestEchoBatch:
+    def test_results_refer_to_input_lines(self) -> None:
+        lines = [
+            json.dumps({"thread_id": f"thread-{index % 3}", "message": str(index)})
+            for index in range(20)
+        ]
+        lines.insert(5, "not json")
+        in_flight: set[str] = set()
+        echoed = []
+
+        async def send_batch(data):
+            thread_ids = {item.thread_id for item in data.items}
+            # Batches that share a thread must not be in flight at the same time.
+            assert not in_flight & thread_ids
+            in_flight.update(thread_ids)
+            await asyncio.sleep(0.001)
+            in_flight.difference_update(thread_ids)
+            first = min(int(item.user_input) for item in data.items)
+            for index, item in reversed(list(enumerate(data.items))):
+                echoed.append((item.thread_id, first))
+                if item.user_input == "7":
+                    yield {"index": index, "error": "Failed"}
+                else:
+                    yield {"index": index, "response": {"output": item.user_input}}
+
+        output = io.StringIO()
+        counts = asyncio.run(
+            run_echo_batch(
+                send_batch,
+                io.StringIO("\n".join(lines) + "\n"),
+                output,
+                batch_size=4,
+                concurrency=3,
+            )
+        )
+        results = [json.loads(line) for line in output.getvalue().splitlines()]
+        assert counts == (19, 2)
+        assert len(results) == 21
+        by_line = {result["line"]: result for result in results}
+        assert "error" in by_line[6] and by_line[6]["thread_id"] is None
+        for line_number, line in enumerate(lines, start=1):
+            if line_number != 6 and json.loads(line)["message"] != "7":
+                assert (
+                    by_line[line_number]["response"]["output"]
+                    == json.loads(line)["message"]
+                )
+        for thread_id in ("thread-0", "thread-1", "thread-2"):
+            # The batches with messages of a thread are echoed in the input order.
+            batches = [first for thread, first in echoed if thread == thread_id]
+            assert batches == sorted(batches)
@@ -0,0 +1,50 @@
+import asyncio
+
+import pytest
+
+from py_a2a_dapr.client.bench import parse_skill_mix, percentile, run_benchmark
+from py_a2a_dapr.model.echo_task import EchoAgentSkills
+
+
+class TestBenchmark:
+    def test_parse_skill_mix(self) -> None:
+        assert parse_skill_mix("echo=8, history") == {
+            EchoAgentSkills.ECHO: 8,
+            EchoAgentSkills.HISTORY: 1,
+        }
+        with pytest.raises(ValueError):
+            parse_skill_mix("unknown=1")
+        with pytest.raises(ValueError):
+            parse_skill_mix("echo=0")
+
+    def test_percentile(self) -> None:
+        values = [float(value) for value in range(1, 101)]
+        assert percentile(values, 50) == 50
+        assert percentile(values, 99) == 99
+        assert percentile(values[:1], 95) == 1
+
+    def test_run_benchmark(self) -> None:
+        sent = []
+
+        async def send(skill: EchoAgentSkills, thread_id: str) -> None:
+            sent.append((skill, thread_id))
+            await asyncio.sleep(0)
+            if skill == EchoAgentSkills.DELETE_HISTORY:
+                raise RuntimeError("Failed")
+
+        report = asyncio.run(
+            run_benchmark(
+                send,
+                users=4,
+                thread_ids=["a", "b"],
+                mix={EchoAgentSkills.ECHO: 3, EchoAgentSkills.DELETE_HISTORY: 1},
+                requests=50,
+                seed=0,
+            )
+        )
+        assert len(sent) == 50
+        assert {thread_id for _, thread_id in sent} == {"a", "b"}
+        deletes = sum(skill == EchoAgentSkills.DELETE_HISTORY for skill, _ in sent)
+        assert report.skills[EchoAgentSkills.DELETE_HISTORY].errors == deletes
+        assert report.overall.requests + report.overall.errors == 50
+        assert report.overall.p50_ms <= report.overall.p99_ms
@@ -64,8 +64,10 @@ class TestCLI:
         validated_response = EchoResponseWithHistory.model_validate_json(result.stdout)
         assert validated_response.current.user_input == message
         assert message in validated_response.current.output
+        # The CLI requests no past history by default, only its size.
+        assert len(validated_response.past) == 0
         if iterations > 1:
-            assert len(validated_response.past) >= (iterations - 1)
+            assert validated_response.total >= (iterations - 1)
 
     def test_echo_a2a_history(self, manage_dapr_sidecars) -> None:
         # Iterations are there to create a history in the response.
@@ -84,6 +86,19 @@ class TestCLI:
         for resp in validated_response:
             assert isinstance(resp, EchoResponse)
 
+    def test_echo_a2a_history_paginated(self, manage_dapr_sidecars) -> None:
+        runner = CliRunner()
+        result = runner.invoke(
+            app, ["echo-a2a-history", "--thread-id", self.thread_id, "--limit", "2"]
+        )
+        assert result.exit_code == 0
+        response_adapter = TypeAdapter(List[EchoResponse])
+        validated_response = response_adapter.validate_json(result.stdout)
+        # The history could be empty if this test runs independently without any preceding echo tests.
+        assert len(validated_response) == 0 or len(validated_response) == 2
+        if len(validated_response) > 0:
+            assert f"Next cursor: {self.echo_iteratons - 2}" in result.stderr
+
     def test_echo_a2a_delete_history(self, manage_dapr_sidecars) -> None:
         # Iterations are there to create a history in the response.
         runner = CliRunner()
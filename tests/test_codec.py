@@ -0,0 +1,61 @@
+from datetime import datetime
+
+import pytest
+
+from py_a2a_dapr.actor.codec import (
+    JSONStringHistoryCodec,
+    PlainJSONSerializer,
+    TupleHistoryCodec,
+    compress_state_value,
+    decompress_state_value,
+    detect_history_codec,
+    get_history_codec,
+    get_state_compression,
+)
+from py_a2a_dapr.model.echo_task import EchoResponse
+
+
+class TestHistoryCodec:
+    entries = [
+        None,
+        EchoResponse(
+            user_input="2024-01-01",
+            output="EchoTaskActor: 2024-01-01",
+            timestamp=datetime(2025, 1, 2, 3, 4, 5, 678901),
+            actor_id="thread",
+        ),
+        EchoResponse(
+            user_input="5s",
+            output="EchoTaskActor: 5s",
+            timestamp=datetime(2025, 1, 2, 3, 4, 6),
+            actor_id="thread",
+        ),
+    ]
+
+    @pytest.mark.parametrize("codec", [JSONStringHistoryCodec(), TupleHistoryCodec()])
+    def test_round_trip(self, codec) -> None:
+        serializer = PlainJSONSerializer()
+        stored = serializer.deserialize(
+            serializer.serialize(codec.encode(self.entries))
+        )
+        assert detect_history_codec(stored) is get_history_codec(codec.name)
+        assert codec.decode(stored) == self.entries
+
+    def test_unknown_codec(self) -> None:
+        with pytest.raises(ValueError):
+            get_history_codec("unknown")
+
+
+class TestStateCompression:
+    value = [["Ahoy there, matey!", "EchoTaskActor: Ahoy there, matey!"]] * 64
+
+    def test_compresses_above_threshold(self) -> None:
+        compression = get_state_compression("zlib")
+        compressed = compress_state_value(self.value, compression, threshold=1024)
+        assert isinstance(compressed, str) and compressed.startswith("zlib:")
+        assert decompress_state_value(compressed) == self.value
+
+    def test_keeps_values_below_threshold(self) -> None:
+        compression = get_state_compression("zlib")
+        assert compress_state_value(self.value[:1], compression, 1024) == self.value[:1]
+        assert compress_state_value(self.value, None, 1024) == self.value
@@ -0,0 +1,31 @@
+import asyncio
+from datetime import timedelta
+
+import httpx
+
+from py_a2a_dapr.client.connection import AgentCardCache
+
+
+class TestAgentCardCache:
+    def test_caches_and_revalidates(self, echo_a2a_app, tmp_path) -> None:
+        statuses = []
+
+        async def record(response: httpx.Response) -> None:
+            statuses.append(response.status_code)
+
+        async def run(cache: AgentCardCache):
+            async with httpx.AsyncClient(
+                transport=httpx.ASGITransport(app=echo_a2a_app),
+                event_hooks={"response": [record]},
+            ) as client:
+                return [
+                    await cache.get_agent_card(client, "http://test") for _ in range(2)
+                ]
+
+        cards = asyncio.run(run(AgentCardCache(tmp_path, timedelta(minutes=5))))
+        assert cards[0] == cards[1]
+        assert statuses == [200]
+        # Once the time to live has passed, the card is revalidated by its ETag.
+        cards = asyncio.run(run(AgentCardCache(tmp_path, timedelta(0))))
+        assert cards[0].name == "Echo Agent"
+        assert statuses == [200, 304, 304]
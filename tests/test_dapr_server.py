@@ -0,0 +1,13 @@
+import pytest
+
+from py_a2a_dapr.server import dapr as dapr_server
+
+
+class TestDaprServer:
+    def test_refuses_more_than_one_worker(self, monkeypatch) -> None:
+        monkeypatch.setenv("APP_DAPR_SVC_WORKERS", "2")
+        monkeypatch.setattr(
+            dapr_server.uvicorn, "run", lambda *args, **kwargs: pytest.fail()
+        )
+        with pytest.raises(SystemExit, match="single worker"):
+            dapr_server.main()
@@ -0,0 +1,771 @@
+import asyncio
+from datetime import datetime, timedelta
+import json
+from uuid import uuid4
+
+import httpx
+from pydantic import ValidationError
+import pytest
+from a2a.client import A2ACardResolver, ClientConfig, ClientFactory
+from a2a.types import Message, TaskArtifactUpdateEvent
+
+from py_a2a_dapr.actor import echo_task as echo_task_actor
+from py_a2a_dapr.actor.codec import (
+    HISTORY_CODECS,
+    decompress_state_value,
+    detect_history_codec,
+)
+from py_a2a_dapr.actor.echo_task import EchoTaskActor
+from py_a2a_dapr.actor.thread_index import ThreadIndexActor
+from py_a2a_dapr.client.streaming import iter_artifact_data, merge_history_pages
+from py_a2a_dapr.executor.echo_task import EchoAgentExecutor
+from py_a2a_dapr.server.echo_a2a import create_app
+from py_a2a_dapr.model.echo_task import (
+    BatchEchoInput,
+    BatchEchoResult,
+    BulkDeleteEchoHistoryInput,
+    BulkDeleteEchoHistoryResult,
+    BulkEchoHistoryInput,
+    BulkEchoHistoryResult,
+    DeleteEchoHistoryInput,
+    EchoAgentA2AInputMessage,
+    EchoAgentArtifacts,
+    EchoAgentSkills,
+    EchoHistoryInput,
+    EchoHistoryPage,
+    EchoInput,
+    EchoResponse,
+)
+
+
+async def call_actor(runtime, method, data=None, actor_id="thread"):
+    """
+    Call a method of the echo actor for a thread, and decode its JSON response.
+    """
+    return json.loads(
+        await runtime.invoke_method(
+            "EchoTaskActor",
+            actor_id,
+            method,
+            data.model_dump_json().encode() if data else None,
+        )
+    )
+
+
+def stored_keys(runtime, actor_id="thread"):
+    return {
+        key
+        for actor_type, stored_actor_id, key in runtime.state
+        if (actor_type, stored_actor_id) == ("EchoTaskActor", actor_id)
+    }
+
+
+class TestEchoTaskActor:
+    def test_history_survives_deactivation(self, fake_actor_runtime) -> None:
+        async def run():
+            for message in ("a", "b", "c"):
+                await fake_actor_runtime.invoke_method(
+                    "EchoTaskActor",
+                    "thread",
+                    "Echo",
+                    EchoInput(thread_id="thread", user_input=message)
+                    .model_dump_json()
+                    .encode(),
+                )
+            await fake_actor_runtime.deactivate_all()
+            return json.loads(
+                await fake_actor_runtime.invoke_method(
+                    "EchoTaskActor",
+                    "thread",
+                    "History",
+                    EchoHistoryInput(thread_id="thread", limit=2)
+                    .model_dump_json()
+                    .encode(),
+                )
+            )
+
+        page = EchoHistoryPage.model_validate(asyncio.run(run()))
+        assert [entry.user_input for entry in page.past] == ["b", "c"]
+        assert page.total == 3
+        assert page.next_cursor == 1
+        assert page.seq == 1
+
+    @pytest.mark.parametrize(
+        "history_mode, past",
+        [
+            ("none", []),
+            ("full", ["a", "b", "c"]),
+            ("tail:2", ["b", "c"]),
+            ("tail:10", ["a", "b", "c"]),
+        ],
+    )
+    def test_history_mode(self, fake_actor_runtime, history_mode, past) -> None:
+        async def run():
+            for message in ("a", "b", "c"):
+                await call_actor(
+                    fake_actor_runtime,
+                    "Echo",
+                    EchoInput(thread_id="thread", user_input=message),
+                )
+            return await call_actor(
+                fake_actor_runtime,
+                "Echo",
+                EchoInput(
+                    thread_id="thread", user_input="d", history_mode=history_mode
+                ),
+            )
+
+        echoed = asyncio.run(run())
+        assert [entry["user_input"] for entry in echoed["past"]] == past
+        # The size of the history is reported however much of it is included.
+        assert echoed["total"] == 3
+
+    @pytest.mark.parametrize("history_mode", ["tail:0", "tail:", "last:1", "all"])
+    def test_invalid_history_mode(self, history_mode) -> None:
+        with pytest.raises(ValidationError):
+            EchoInput(thread_id="thread", user_input="a", history_mode=history_mode)
+
+    def test_legacy_history_is_migrated(self, fake_actor_runtime, monkeypatch) -> None:
+        monkeypatch.setenv("APP_ECHO_HISTORY_SEGMENT_SIZE", "2")
+        # Histories used to be stored as a single list of JSON strings.
+        fake_actor_runtime.state[("EchoTaskActor", "thread", "echo_history")] = (
+            json.dumps(
+                [
+                    EchoResponse(
+                        user_input=message,
+                        output=f"EchoTaskActor: {message}",
+                        timestamp=datetime(2026, 1, 1),
+                        actor_id="thread",
+                    ).model_dump_json()
+                    for message in ("a", "b", "c")
+                ]
+            ).encode()
+        )
+
+        async def run():
+            query = EchoHistoryInput(thread_id="thread")
+            page = await call_actor(fake_actor_runtime, "History", query)
+            await fake_actor_runtime.deactivate_all()
+            # The migrated history is read back from its segments, as it was.
+            reloaded = await call_actor(fake_actor_runtime, "History", query)
+            echoed = await call_actor(
+                fake_actor_runtime,
+                "Echo",
+                EchoInput(thread_id="thread", user_input="d", history_mode="full"),
+            )
+            return page, reloaded, echoed
+
+        page, reloaded, echoed = asyncio.run(run())
+        assert [entry["user_input"] for entry in page["past"]] == ["a", "b", "c"]
+        assert reloaded == page
+        assert stored_keys(fake_actor_runtime) == {
+            "echo_history:head",
+            "echo_history:0",
+            "echo_history:1",
+        }
+        head = json.loads(
+            fake_actor_runtime.state[("EchoTaskActor", "thread", "echo_history:head")]
+        )
+        assert (head["count"], head["first"]) == (4, 0)
+        assert [entry["user_input"] for entry in echoed["past"]] == ["a", "b", "c"]
+        assert echoed["seq"] == 3
+
+    @pytest.mark.parametrize(
+        "stored, configured", [("json", "tuple"), ("tuple", "json")]
+    )
+    @pytest.mark.parametrize("compression", ["none", "zlib"])
+    def test_history_codec_is_switched(
+        self, fake_actor_runtime, monkeypatch, stored, configured, compression
+    ) -> None:
+        monkeypatch.setenv("APP_ECHO_HISTORY_SEGMENT_SIZE", "2")
+        monkeypatch.setenv("APP_ECHO_HISTORY_COMPRESSION_THRESHOLD", "0")
+
+        async def echo(*messages):
+            for message in messages:
+                await call_actor(
+                    fake_actor_runtime,
+                    "Echo",
+                    EchoInput(thread_id="thread", user_input=message),
+                )
+            await fake_actor_runtime.deactivate_all()
+
+        async def history():
+            page = await call_actor(
+                fake_actor_runtime, "History", EchoHistoryInput(thread_id="thread")
+            )
+            return [entry["user_input"] for entry in page["past"]]
+
+        async def run():
+            monkeypatch.setenv("APP_ECHO_HISTORY_CODEC", stored)
+            monkeypatch.setenv("APP_ECHO_HISTORY_COMPRESSION", "none")
+            await echo("a", "b", "c")
+            # Segments stored with the previous configuration are still read, and
+            # rewritten with the configured codec and compression.
+            monkeypatch.setenv("APP_ECHO_HISTORY_CODEC", configured)
+            monkeypatch.setenv("APP_ECHO_HISTORY_COMPRESSION", compression)
+            read = await history()
+            await echo("d")
+            return read, await history()
+
+        read, appended = asyncio.run(run())
+        assert read == ["a", "b", "c"]
+        assert appended == ["a", "b", "c", "d"]
+        for segment in ("echo_history:0", "echo_history:1"):
+            value = json.loads(
+                fake_actor_runtime.state[("EchoTaskActor", "thread", segment)]
+            )
+            assert isinstance(value, str) == (compression != "none")
+            assert (
+                detect_history_codec(decompress_state_value(value))
+                is HISTORY_CODECS[configured]
+            )
+
+    def test_conditional_history(self, fake_actor_runtime) -> None:
+        async def call(method, data=None):
+            return json.loads(
+                await fake_actor_runtime.invoke_method(
+                    "EchoTaskActor",
+                    "thread",
+                    method,
+                    data.model_dump_json().encode() if data else None,
+                )
+            )
+
+        async def run():
+            for message in ("a", "b"):
+                echoed = await call(
+                    "Echo", EchoInput(thread_id="thread", user_input=message)
+                )
+            pages = [
+                await call("History", EchoHistoryInput(thread_id="thread", **query))
+                for query in (
+                    {"if_none_match": echoed["etag"]},
+                    {"since_seq": 1},
+                )
+            ]
+            await call("DeleteHistory")
+            pages.append(
+                await call(
+                    "History",
+                    EchoHistoryInput(thread_id="thread", if_none_match=echoed["etag"]),
+                )
+            )
+            pages.append(
+                await call("Echo", EchoInput(thread_id="thread", user_input="c"))
+            )
+            return pages
+
+        not_modified, since, deleted, echoed = asyncio.run(run())
+        assert not_modified["not_modified"] and not_modified["past"] == []
+        assert [entry["user_input"] for entry in since["past"]] == ["b"]
+        assert since["seq"] == 1
+        # Deleting the history changes its ETag, and sequence numbers keep increasing.
+        assert not deleted["not_modified"] and deleted["etag"] != since["etag"]
+        assert deleted["seq"] == 2
+        assert echoed["seq"] == 2
+
+
+class Clock(datetime):
+    """
+    A datetime whose current time is set by the test.
+    """
+
+    current = datetime(2026, 1, 1)
+
+    @classmethod
+    def now(cls, tz=None):
+        return cls.current
+
+
+@pytest.fixture
+def clock(monkeypatch) -> type[Clock]:
+    monkeypatch.setattr(Clock, "current", datetime(2026, 1, 1))
+    monkeypatch.setattr(echo_task_actor, "datetime", Clock)
+    return Clock
+
+
+def history_head(runtime, actor_id="thread") -> dict:
+    return json.loads(runtime.state[("EchoTaskActor", actor_id, "echo_history:head")])
+
+
+class TestEchoTaskActorRetention:
+    @pytest.fixture(autouse=True)
+    def segment_size(self, monkeypatch) -> None:
+        monkeypatch.setenv("APP_ECHO_HISTORY_SEGMENT_SIZE", "2")
+
+    def echo(self, runtime, *messages):
+        async def run():
+            return [
+                await call_actor(
+                    runtime,
+                    "Echo",
+                    EchoInput(thread_id="thread", user_input=message),
+                )
+                for message in messages
+            ]
+
+        return asyncio.run(run())
+
+    def history(self, runtime):
+        return asyncio.run(
+            call_actor(runtime, "History", EchoHistoryInput(thread_id="thread"))
+        )
+
+    def test_max_entries(self, fake_actor_runtime, monkeypatch) -> None:
+        monkeypatch.setenv("APP_ECHO_HISTORY_MAX_ENTRIES", "3")
+        echoed = self.echo(fake_actor_runtime, "a", "b", "c", "d", "e", "f")
+        assert [(e["total"], e["seq"]) for e in echoed] == [
+            (0, 0),
+            (1, 1),
+            (2, 2),
+            (3, 3),
+            (3, 4),
+            (3, 5),
+        ]
+        # Every trim changes the ETag, even when the number of entries does not.
+        assert len({e["etag"] for e in echoed}) == len(echoed)
+        page = self.history(fake_actor_runtime)
+        assert [entry["user_input"] for entry in page["past"]] == ["d", "e", "f"]
+        assert (page["total"], page["seq"], page["etag"]) == (3, 3, echoed[-1]["etag"])
+        assert stored_keys(fake_actor_runtime) == {
+            "echo_history:head",
+            "echo_history:1",
+            "echo_history:2",
+        }
+        assert history_head(fake_actor_runtime)["first"] == 3
+
+    def test_max_bytes(self, fake_actor_runtime, monkeypatch) -> None:
+        monkeypatch.setenv("APP_ECHO_HISTORY_MAX_BYTES", "1")
+        echoed = self.echo(fake_actor_runtime, "a", "b", "c")
+        # The most recent entry is kept, however large it is.
+        assert [(e["total"], e["seq"]) for e in echoed] == [(0, 0), (1, 1), (1, 2)]
+        page = self.history(fake_actor_runtime)
+        assert [entry["user_input"] for entry in page["past"]] == ["c"]
+        assert page["seq"] == 2
+        assert stored_keys(fake_actor_runtime) == {
+            "echo_history:head",
+            "echo_history:1",
+        }
+
+    def test_max_age(self, fake_actor_runtime, monkeypatch, clock) -> None:
+        monkeypatch.setenv("APP_ECHO_HISTORY_MAX_AGE", str(3600))
+        self.echo(fake_actor_runtime, "a", "b")
+        clock.current += timedelta(hours=2)
+        (echoed,) = self.echo(fake_actor_runtime, "c")
+        # Entries that expired are trimmed as entries are appended.
+        assert (echoed["total"], echoed["seq"]) == (2, 2)
+        page = self.history(fake_actor_runtime)
+        assert [entry["user_input"] for entry in page["past"]] == ["c"]
+        assert stored_keys(fake_actor_runtime) == {
+            "echo_history:head",
+            "echo_history:1",
+        }
+
+    def test_retention_reminder(self, fake_actor_runtime, monkeypatch, clock) -> None:
+        monkeypatch.setenv("APP_ECHO_HISTORY_MAX_AGE", str(3600))
+        reminder = ("EchoTaskActor", "thread", "echo_history:retention")
+        self.echo(fake_actor_runtime, "a")
+        clock.current += timedelta(minutes=30)
+        self.echo(fake_actor_runtime, "b", "c")
+        assert reminder in fake_actor_runtime.reminders
+        etag = self.history(fake_actor_runtime)["etag"]
+
+        # The reminder trims the entries that expired since, and compacts the
+        # oldest segment, which still holds an expired entry.
+        clock.current += timedelta(minutes=40)
+        asyncio.run(fake_actor_runtime.fire_reminder(*reminder))
+        page = self.history(fake_actor_runtime)
+        assert [entry["user_input"] for entry in page["past"]] == ["b", "c"]
+        assert page["seq"] == 1 and page["etag"] != etag
+        oldest_segment = json.loads(
+            fake_actor_runtime.state[("EchoTaskActor", "thread", "echo_history:0")]
+        )
+        assert oldest_segment[0] is None
+        assert json.loads(oldest_segment[1])["user_input"] == "b"
+
+        # Once nothing is retained, no segments are left and the reminder stops.
+        asyncio.run(fake_actor_runtime.deactivate_all())
+        clock.current += timedelta(hours=2)
+        asyncio.run(fake_actor_runtime.fire_reminder(*reminder))
+        assert stored_keys(fake_actor_runtime) == {"echo_history:head"}
+        assert reminder not in fake_actor_runtime.reminders
+        head = history_head(fake_actor_runtime)
+        assert (head["first"], head["count"]) == (3, 3)
+        # A thread whose history expired is no longer indexed.
+        assert not any(
+            "thread" in json.loads(value)
+            for (actor_type, _, key), value in fake_actor_runtime.state.items()
+            if actor_type == "ThreadIndexActor" and key != "thread_ids:head"
+        )
+        assert self.history(fake_actor_runtime)["total"] == 0
+
+
+class TestEchoAgentExecutor:
+    def test_threads_are_indexed(self, echo_agent_executor) -> None:
+        async def run():
+            for thread_id in ("user-1", "user-2", "bot-1"):
+                await echo_agent_executor.perform_echo(
+                    EchoInput(thread_id=thread_id, user_input="Hello")
+                )
+            await echo_agent_executor.perform_delete_history(
+                DeleteEchoHistoryInput(thread_id="user-2")
+            )
+            return await echo_agent_executor.find_threads("user")
+
+        assert asyncio.run(run()) == ["user-1"]
+
+    def test_thread_index_is_best_effort(
+        self, echo_agent_executor, monkeypatch
+    ) -> None:
+        available = False
+        add = ThreadIndexActor.add
+
+        async def add_if_available(self, thread_id):
+            if not available:
+                raise RuntimeError("The index is unavailable.")
+            return await add(self, thread_id)
+
+        monkeypatch.setattr(ThreadIndexActor, "add", add_if_available)
+
+        async def echo():
+            return await echo_agent_executor.perform_echo(
+                EchoInput(thread_id="user-1", user_input="Hello")
+            )
+
+        async def run():
+            # Echoes do not fail when the index cannot be updated.
+            echoed = await echo()
+            unindexed = await echo_agent_executor.find_threads("user")
+            nonlocal available
+            available = True
+            # The thread is indexed with the next entry of its history instead.
+            await echo()
+            return echoed, unindexed, await echo_agent_executor.find_threads("user")
+
+        echoed, unindexed, indexed = asyncio.run(run())
+        assert echoed["current"]["user_input"] == "Hello"
+        assert unindexed == []
+        assert indexed == ["user-1"]
+
+    def echo_threads(self, executor, *thread_ids):
+        async def run():
+            for thread_id in thread_ids:
+                for message in ("a", "b", "c"):
+                    await executor.perform_echo(
+                        EchoInput(thread_id=thread_id, user_input=message)
+                    )
+
+        asyncio.run(run())
+
+    def bulk(self, results, result_type):
+        async def run():
+            return [result_type.model_validate(result) async for result in results]
+
+        return asyncio.run(run())
+
+    @pytest.mark.parametrize(
+        "threads", [{"prefix": "user"}, {"thread_ids": ["user-1", "user-2", "user-1"]}]
+    )
+    def test_bulk_history(self, echo_agent_executor, monkeypatch, threads) -> None:
+        monkeypatch.setattr(echo_agent_executor, "_history_chunk_size", 2)
+        self.echo_threads(echo_agent_executor, "user-1", "user-2", "bot-1")
+        results = self.bulk(
+            echo_agent_executor.perform_bulk_history(
+                BulkEchoHistoryInput(**threads, limit=3)
+            ),
+            BulkEchoHistoryResult,
+        )
+        pages: dict[str, list[EchoHistoryPage]] = {}
+        for result in results:
+            assert result.error is None
+            pages.setdefault(result.thread_id, []).append(result.page)
+        # Each thread is read once, in pages of bounded size.
+        assert sorted(pages) == ["user-1", "user-2"]
+        for thread_pages in pages.values():
+            assert [len(page.past) for page in thread_pages] == [2, 1]
+            assert [
+                entry.user_input for entry in merge_history_pages(thread_pages)
+            ] == [
+                "a",
+                "b",
+                "c",
+            ]
+
+    def test_bulk_history_errors(self, echo_agent_executor, fake_actor_runtime) -> None:
+        self.echo_threads(echo_agent_executor, "user-1", "user-2")
+        # A cancelled actor responds to nothing, so reading its history fails.
+        asyncio.run(
+            fake_actor_runtime.invoke_method("EchoTaskActor", "user-2", "Cancel")
+        )
+        results = self.bulk(
+            echo_agent_executor.perform_bulk_history(
+                BulkEchoHistoryInput(prefix="user")
+            ),
+            BulkEchoHistoryResult,
+        )
+        by_thread = {result.thread_id: result for result in results}
+        assert len(by_thread) == len(results) == 2
+        assert len(by_thread["user-1"].page.past) == 3
+        assert by_thread["user-2"].page is None
+        assert by_thread["user-2"].error == "No response received from the actor(s)!"
+
+    def test_bulk_delete_history(self, echo_agent_executor, monkeypatch) -> None:
+        delete_history = EchoTaskActor.delete_history
+
+        async def delete_history_unless_locked(self):
+            if str(self.id) == "user-locked":
+                raise RuntimeError("The history is locked.")
+            return await delete_history(self)
+
+        monkeypatch.setattr(
+            EchoTaskActor, "delete_history", delete_history_unless_locked
+        )
+        self.echo_threads(echo_agent_executor, "user-1", "user-locked", "bot-1")
+
+        by_prefix = self.bulk(
+            echo_agent_executor.perform_bulk_delete_history(
+                BulkDeleteEchoHistoryInput(prefix="user")
+            ),
+            BulkDeleteEchoHistoryResult,
+        )
+        by_thread = {result.thread_id: result for result in by_prefix}
+        assert sorted(by_thread) == ["user-1", "user-locked"]
+        assert (
+            by_thread["user-1"].output == "History was deleted successfully for user-1."
+        )
+        assert by_thread["user-locked"].output is None
+        assert "The history is locked." in by_thread["user-locked"].error
+
+        by_ids = self.bulk(
+            echo_agent_executor.perform_bulk_delete_history(
+                BulkDeleteEchoHistoryInput(thread_ids=["user-1", "bot-1"])
+            ),
+            BulkDeleteEchoHistoryResult,
+        )
+        assert {result.thread_id: result.output for result in by_ids} == {
+            "user-1": "No history was found for user-1.",
+            "bot-1": "History was deleted successfully for bot-1.",
+        }
+        assert asyncio.run(echo_agent_executor.find_threads("")) == ["user-locked"]
+        # An empty prefix, which would match every thread, is refused.
+        with pytest.raises(ValidationError):
+            BulkDeleteEchoHistoryInput(prefix="")
+        assert asyncio.run(echo_agent_executor.find_threads("")) == ["user-locked"]
+
+    def test_merged_streams_are_not_buffered(self, echo_agent_executor) -> None:
+        produced = 0
+
+        async def stream():
+            nonlocal produced
+            for item in range(100):
+                produced += 1
+                yield item
+
+        async def run():
+            merged = echo_agent_executor._merge_streams(
+                (stream() for _ in range(4)), concurrency=2
+            )
+            first = await anext(merged)
+            # Let the streams run ahead of the consumer as far as they can.
+            await asyncio.sleep(0.01)
+            await merged.aclose()
+            return first
+
+        assert asyncio.run(run()) == 0
+        # Each running stream has at most one item waiting, besides those queued.
+        assert produced <= 2 * 2 + 1
+
+    def batch_echo(self, executor, items, ordered):
+        async def run():
+            return [
+                BatchEchoResult.model_validate(result)
+                async for result in executor.perform_batch_echo(
+                    BatchEchoInput(
+                        items=[
+                            EchoInput(thread_id=thread_id, user_input=message)
+                            for thread_id, message in items
+                        ],
+                        ordered=ordered,
+                    )
+                )
+            ]
+
+        return asyncio.run(run())
+
+    @pytest.fixture
+    def slow_thread(self, echo_agent_executor, monkeypatch) -> EchoAgentExecutor:
+        """
+        An executor whose echoes for the slow thread take longer than the others.
+        """
+        perform_echo = echo_agent_executor.perform_echo
+
+        async def slow_perform_echo(data):
+            if data.thread_id == "slow":
+                await asyncio.sleep(0.01)
+            return await perform_echo(data)
+
+        monkeypatch.setattr(echo_agent_executor, "perform_echo", slow_perform_echo)
+        return echo_agent_executor
+
+    @pytest.mark.parametrize("ordered", [True, False])
+    def test_batch_echo(self, slow_thread, ordered) -> None:
+        items = [("slow", "a"), ("fast", "b"), ("slow", "c"), ("fast", "d")]
+        results = self.batch_echo(slow_thread, items, ordered)
+        indices = [result.index for result in results]
+        if ordered:
+            assert indices == [0, 1, 2, 3]
+        else:
+            # Results are yielded as soon as each is echoed.
+            assert indices == [1, 3, 0, 2]
+        for result in results:
+            assert result.error is None
+            assert result.response.current.user_input == items[result.index][1]
+        # The inputs for the same thread are echoed in the order given.
+        by_index = {result.index: result.response for result in results}
+        assert [by_index[0].seq, by_index[2].seq] == [0, 1]
+        assert [entry.user_input for entry in by_index[2].past] == ["a"]
+
+    def test_batch_echo_errors(self, echo_agent_executor, fake_actor_runtime) -> None:
+        # A cancelled actor responds to nothing, so echoing its thread fails.
+        asyncio.run(
+            fake_actor_runtime.invoke_method("EchoTaskActor", "cancelled", "Cancel")
+        )
+        results = self.batch_echo(
+            echo_agent_executor,
+            [("thread", "a"), ("cancelled", "b"), ("thread", "c")],
+            ordered=True,
+        )
+        assert [result.index for result in results] == [0, 1, 2]
+        assert results[1].response is None
+        assert results[1].error == "No response received from the actor(s)!"
+        assert [result.response.current.user_input for result in results[::2]] == [
+            "a",
+            "c",
+        ]
+
+
+class TestEchoA2A:
+    def send(self, app, messages, collect=iter_artifact_data):
+        async def run():
+            async with httpx.AsyncClient(
+                transport=httpx.ASGITransport(app=app), base_url="http://test"
+            ) as httpx_client:
+                card = await A2ACardResolver(
+                    httpx_client=httpx_client, base_url="http://test"
+                ).get_agent_card()
+                card.url = "http://test/"
+                client = ClientFactory(
+                    config=ClientConfig(streaming=True, httpx_client=httpx_client)
+                ).create(card=card)
+                return [
+                    [
+                        artifact
+                        async for artifact in collect(
+                            client.send_message(
+                                Message(
+                                    role="user",
+                                    parts=[
+                                        {"kind": "text", "text": msg.model_dump_json()}
+                                    ],
+                                    message_id=str(uuid4()),
+                                )
+                            )
+                        )
+                    ]
+                    for msg in messages
+                ]
+
+        return asyncio.run(run())
+
+    def test_echo_and_history(self, echo_a2a_app) -> None:
+        responses = self.send(
+            echo_a2a_app,
+            [
+                EchoAgentA2AInputMessage(
+                    skill=EchoAgentSkills.ECHO,
+                    data=EchoInput(thread_id="thread", user_input=message),
+                )
+                for message in ("a", "b")
+            ]
+            + [
+                EchoAgentA2AInputMessage(
+                    skill=EchoAgentSkills.HISTORY,
+                    data=EchoHistoryInput(thread_id="thread"),
+                )
+            ],
+        )
+        name, current = responses[1][0]
+        assert name == EchoAgentArtifacts.CURRENT
+        assert current["current"]["output"] == "EchoTaskActor: b"
+        assert current["total"] == 1
+        assert current["seq"] == 1
+        past = merge_history_pages(
+            [EchoHistoryPage.model_validate(data) for _, data in responses[2]]
+        )
+        assert [entry.user_input for entry in past] == ["a", "b"]
+
+    def test_finished_tasks_are_bounded(self, echo_agent_executor, monkeypatch) -> None:
+        monkeypatch.setenv("APP_A2A_TASK_MEMORY_MAX_FINISHED", "10")
+        app = create_app(agent_executor=echo_agent_executor)
+        self.send(
+            app,
+            [
+                EchoAgentA2AInputMessage(
+                    skill=EchoAgentSkills.ECHO,
+                    data=EchoInput(thread_id="thread", user_input=str(message)),
+                )
+                for message in range(50)
+            ],
+        )
+        assert len(app.state.task_store._tasks) == 10
+
+    def test_history_is_streamed_in_chunks(
+        self, fake_actor_runtime, monkeypatch
+    ) -> None:
+        monkeypatch.setenv("APP_ECHO_HISTORY_CHUNK_SIZE", "2")
+        app = create_app(
+            agent_executor=EchoAgentExecutor(
+                actor_proxy_factory=fake_actor_runtime.proxy_factory
+            )
+        )
+
+        async def artifact_events(responses):
+            async for response in responses:
+                if isinstance(response[1], TaskArtifactUpdateEvent):
+                    yield response[1]
+
+        *_, events = self.send(
+            app,
+            [
+                EchoAgentA2AInputMessage(
+                    skill=EchoAgentSkills.ECHO,
+                    data=EchoInput(thread_id="thread", user_input=str(message)),
+                )
+                for message in range(5)
+            ]
+            + [
+                EchoAgentA2AInputMessage(
+                    skill=EchoAgentSkills.HISTORY,
+                    data=EchoHistoryInput(thread_id="thread"),
+                )
+            ],
+            collect=artifact_events,
+        )
+        # Five entries in chunks of two are sent as three chunks of one artifact,
+        # most recent first.
+        assert len({event.artifact.artifact_id for event in events}) == 1
+        assert [(event.append, event.last_chunk) for event in events] == [
+            (False, False),
+            (True, False),
+            (True, True),
+        ]
+        pages = [
+            EchoHistoryPage.model_validate(event.artifact.parts[0].root.data)
+            for event in events
+        ]
+        assert [[entry.user_input for entry in page.past] for page in pages] == [
+            ["3", "4"],
+            ["1", "2"],
+            ["0"],
+        ]
+        assert [page.next_cursor for page in pages] == [3, 1, None]
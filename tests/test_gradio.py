@@ -0,0 +1,209 @@
+import asyncio
+from datetime import timedelta
+
+import httpx
+import pytest
+
+from py_a2a_dapr.client.connection import AgentCardCache
+from py_a2a_dapr.model.echo_task import DeleteEchoHistoryInput, EchoInput
+from py_a2a_dapr.web import gradio as web_gradio
+
+
+@pytest.fixture
+def gradio_app(echo_a2a_app, monkeypatch, tmp_path) -> web_gradio.GradioApp:
+    """
+    A Gradio app whose shared A2A client calls the A2A server in process.
+    """
+    monkeypatch.setattr(
+        web_gradio,
+        "agent_card_cache",
+        AgentCardCache(tmp_path, timedelta(minutes=5)),
+    )
+    app = web_gradio.GradioApp()
+    app.requests = []
+
+    async def record(request: httpx.Request) -> None:
+        app.requests.append((request.method, request.url.path))
+
+    app._httpx_client = httpx.AsyncClient(
+        transport=httpx.ASGITransport(app=echo_a2a_app),
+        event_hooks={"request": [record]},
+    )
+    app.construct_ui()
+    return app
+
+
+def event_handler(app: web_gradio.GradioApp, name: str):
+    return next(
+        block_function.fn
+        for block_function in app.ui.fns.values()
+        if block_function.fn.__name__ == name
+    )
+
+
+def empty_chat() -> dict:
+    return {"messages": [], "cursor": None, "etag": None, "entries": 0}
+
+
+def send_messages(echo, chat_id, messages, chat_histories=None, chats=None):
+    """
+    Send messages as a session of the app does, and return the chat shown and the
+    states of the browser and the session.
+    """
+    chat_histories = {} if chat_histories is None else chat_histories
+    chats = {} if chats is None else chats
+
+    async def run():
+        chat_history = None
+        for message in messages:
+            async for outputs in echo(message, chat_id, chat_histories, chats):
+                pass
+            chat_history = outputs[3]["value"]
+        return chat_history
+
+    return asyncio.run(run()), chat_histories, chats
+
+
+class TestGradioApp:
+    def test_shares_one_a2a_client(self, gradio_app) -> None:
+        echo = event_handler(gradio_app, "btn_echo_clicked")
+        chat_history, chat_histories, _ = send_messages(
+            echo, "chat", ["a", "b", "c"], {"chat": 0}, {"chat": empty_chat()}
+        )
+        assert [message.content for message in chat_history[::3]] == ["a", "b", "c"]
+        # Only the sequence number of the next entry is kept in the browser.
+        assert chat_histories == {"chat": 3}
+        # The agent card is fetched once, and not before every message.
+        assert gradio_app.requests.count(("GET", "/.well-known/agent-card.json")) == 1
+        gradio_app.shutdown()
+        assert gradio_app._httpx_client.is_closed
+
+    def test_reconciles_by_sequence_number(
+        self, gradio_app, echo_agent_executor
+    ) -> None:
+        echo = event_handler(gradio_app, "btn_echo_clicked")
+        chat_history, chat_histories, chats = send_messages(
+            echo, "chat", ["a"], {"chat": 0}, {"chat": empty_chat()}
+        )
+        # Another client adds to the chat, which is fetched with the next turn.
+        asyncio.run(
+            echo_agent_executor.perform_echo(
+                EchoInput(thread_id="chat", user_input="elsewhere")
+            )
+        )
+        chat_history, chat_histories, chats = send_messages(
+            echo, "chat", ["b"], chat_histories, chats
+        )
+        assert [message.content for message in chat_history[::3]] == [
+            "a",
+            "elsewhere",
+            "b",
+        ]
+        assert chat_histories == {"chat": 3}
+        # A browser state without a sequence number, as kept by older versions of
+        # the app, is reconciled by loading the most recent page of the chat.
+        chat_history, chat_histories, _ = send_messages(
+            echo, "chat", ["c"], {"chat": []}, {}
+        )
+        assert len(chat_history) == 4 * 3
+        assert chat_histories == {"chat": 4}
+        # So is a chat that a new session has not shown yet.
+        chat_history, chat_histories, chats = send_messages(
+            echo, "chat", ["d"], chat_histories, {}
+        )
+        assert len(chat_history) == 5 * 3
+        assert chat_histories == {"chat": 5}
+        assert chats["chat"]["messages"] == chat_history
+
+    def test_reloads_history_deleted_before_echo(
+        self, gradio_app, echo_agent_executor
+    ) -> None:
+        echo = event_handler(gradio_app, "btn_echo_clicked")
+        chat_history, chat_histories, chats = send_messages(
+            echo, "chat", ["a", "b"], {"chat": 0}, {"chat": empty_chat()}
+        )
+        # Another client deletes the history, which keeps its sequence numbers, so
+        # the chat is reloaded with the next turn rather than added to.
+        asyncio.run(
+            echo_agent_executor.perform_delete_history(
+                DeleteEchoHistoryInput(thread_id="chat")
+            )
+        )
+        chat_history, chat_histories, chats = send_messages(
+            echo, "chat", ["c"], chat_histories, chats
+        )
+        assert [message.content for message in chat_history[::3]] == ["c"]
+        assert chat_histories == {"chat": 3}
+        assert chats["chat"]["entries"] == 1
+
+    def test_loads_history_in_pages(self, gradio_app, echo_agent_executor) -> None:
+        gradio_app._history_page_size = 2
+        select = event_handler(gradio_app, "state_selected_chat_id_changed")
+        load_older = event_handler(gradio_app, "btn_load_older_clicked")
+
+        async def echo(*messages):
+            for message in messages:
+                await echo_agent_executor.perform_echo(
+                    EchoInput(thread_id="chat", user_input=message)
+                )
+
+        async def run():
+            chat_histories: dict[str, int] = {}
+            chats: dict[str, dict] = {}
+            shown = []
+            await echo("a", "b", "c")
+            async for outputs in select("chat", chat_histories, chats):
+                shown.append(list(outputs[1]["value"]))
+            async for outputs in load_older("chat", chats):
+                shown.append(list(outputs[0]["value"]))
+                load_older_button = outputs[2]
+            # Selecting the chat again shows the pages already loaded at once, and
+            # then adds the entries added since.
+            await echo("d")
+            async for outputs in select("chat", chat_histories, chats):
+                shown.append(list(outputs[1]["value"]))
+            return shown, chat_histories, load_older_button
+
+        shown, chat_histories, load_older_button = asyncio.run(run())
+        assert [
+            [message.content for message in messages[::3]] for messages in shown
+        ] == [
+            ["b", "c"],
+            ["a", "b", "c"],
+            ["a", "b", "c"],
+            ["a", "b", "c", "d"],
+        ]
+        assert chat_histories == {"chat": 4}
+        assert load_older_button["visible"] is False
+
+    def test_reloads_history_deleted_elsewhere(
+        self, gradio_app, echo_agent_executor
+    ) -> None:
+        select = event_handler(gradio_app, "state_selected_chat_id_changed")
+
+        async def run():
+            chat_histories: dict[str, int] = {}
+            chats: dict[str, dict] = {}
+            shown = []
+            for message in ("a", "b"):
+                await echo_agent_executor.perform_echo(
+                    EchoInput(thread_id="chat", user_input=message)
+                )
+            async for outputs in select("chat", chat_histories, chats):
+                pass
+            shown.append(list(outputs[1]["value"]))
+            # Another client deletes the history, which keeps its sequence numbers.
+            await echo_agent_executor.perform_delete_history(
+                DeleteEchoHistoryInput(thread_id="chat")
+            )
+            async for outputs in select("chat", chat_histories, chats):
+                pass
+            shown.append(list(outputs[1]["value"]))
+            return shown, chat_histories, chats
+
+        shown, chat_histories, chats = asyncio.run(run())
+        assert [
+            [message.content for message in messages[::3]] for messages in shown
+        ] == [["a", "b"], []]
+        assert chat_histories == {"chat": 2}
+        assert chats["chat"]["entries"] == 0
@@ -0,0 +1,91 @@
+import asyncio
+
+import httpx
+from starlette.applications import Starlette
+from starlette.responses import PlainTextResponse
+from starlette.routing import Route
+
+from py_a2a_dapr.metrics import ActorMethodMetricsMiddleware, metrics_endpoint
+from py_a2a_dapr.model.echo_task import (
+    EchoAgentA2AInputMessage,
+    EchoAgentSkills,
+    EchoInput,
+)
+
+
+def get(app, *paths: str):
+    async def run():
+        async with httpx.AsyncClient(
+            transport=httpx.ASGITransport(app=app), base_url="http://test"
+        ) as client:
+            return [await client.get(path) for path in paths]
+
+    return asyncio.run(run())
+
+
+class TestMetrics:
+    def test_actor_methods_are_measured(self) -> None:
+        async def method(request):
+            status = 500 if request.path_params["method"] == "Fail" else 200
+            return PlainTextResponse("", status_code=status)
+
+        app = Starlette(
+            routes=[
+                Route("/actors/{actor_type}/{actor_id}/method/{method}", method),
+                Route("/metrics", metrics_endpoint),
+            ]
+        )
+        app.add_middleware(ActorMethodMetricsMiddleware)
+        *_, metrics = get(
+            app,
+            "/actors/TestActor/a/method/Echo",
+            "/actors/TestActor/b/method/Echo",
+            "/actors/TestActor/a/method/Fail",
+            "/metrics",
+        )
+        assert (
+            'actor_method_duration_seconds_count{actor_type="TestActor",method="Echo"} 2.0'
+            in metrics.text
+        )
+        assert (
+            'actor_method_errors_total{actor_type="TestActor",method="Fail"} 1.0'
+            in metrics.text
+        )
+
+    def test_skills_are_measured(self, echo_a2a_app) -> None:
+        message = EchoAgentA2AInputMessage(
+            skill=EchoAgentSkills.ECHO,
+            data=EchoInput(thread_id="thread", user_input="Hello"),
+        )
+
+        async def run():
+            async with httpx.AsyncClient(
+                transport=httpx.ASGITransport(app=echo_a2a_app),
+                base_url="http://test",
+            ) as client:
+                await client.post(
+                    "/",
+                    json={
+                        "jsonrpc": "2.0",
+                        "id": 1,
+                        "method": "message/send",
+                        "params": {
+                            "message": {
+                                "role": "user",
+                                "messageId": "message",
+                                "parts": [
+                                    {"kind": "text", "text": message.model_dump_json()}
+                                ],
+                            }
+                        },
+                    },
+                )
+                return await client.get("/metrics")
+
+        metrics = asyncio.run(run()).text
+        assert 'a2a_skill_duration_seconds_count{skill="echo"}' in metrics
+        assert (
+            'actor_call_duration_seconds_count{actor_type="EchoTaskActor",method="Echo"}'
+            in metrics
+        )
+        assert "echo_history_entries_count" in metrics
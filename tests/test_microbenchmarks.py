@@ -0,0 +1,93 @@
+# Microbenchmarks of the echo and history costs against the length of the history,
+# on the in-process actor runtime. Run with -s to see the timings.
+
+import asyncio
+import time
+
+import pytest
+
+from py_a2a_dapr.model.echo_task import EchoHistoryInput, EchoInput
+
+HISTORY_LENGTHS = [0, 512, 2048]
+
+
+def measure(
+    fake_actor_runtime, echo_agent_executor, history_length: int, history_mode: str
+):
+    async def run():
+        for index in range(history_length):
+            await echo_agent_executor.perform_echo(
+                EchoInput(
+                    thread_id="thread",
+                    user_input=f"Message {index}",
+                    history_mode="none",
+                )
+            )
+        # An echo and a page of history with the actor active, and then a page
+        # of history right after the actor is activated again.
+        bytes_written = fake_actor_runtime.bytes_written
+        started = time.perf_counter()
+        await echo_agent_executor.perform_echo(
+            EchoInput(
+                thread_id="thread", user_input="Benchmark", history_mode=history_mode
+            )
+        )
+        echo_seconds = time.perf_counter() - started
+        echo_bytes_written = fake_actor_runtime.bytes_written - bytes_written
+        started = time.perf_counter()
+        await echo_agent_executor.perform_history(
+            EchoHistoryInput(thread_id="thread", limit=20)
+        )
+        history_seconds = time.perf_counter() - started
+        await fake_actor_runtime.deactivate_all()
+        bytes_read = fake_actor_runtime.bytes_read
+        started = time.perf_counter()
+        await echo_agent_executor.perform_history(
+            EchoHistoryInput(thread_id="thread", limit=20)
+        )
+        activation_seconds = time.perf_counter() - started
+        activation_bytes_read = fake_actor_runtime.bytes_read - bytes_read
+        return (
+            echo_seconds,
+            echo_bytes_written,
+            history_seconds,
+            activation_seconds,
+            activation_bytes_read,
+        )
+
+    return asyncio.run(run())
+
+
+class TestMicrobenchmarks:
+    @pytest.fixture(autouse=True)
+    def segment_size(self, monkeypatch) -> None:
+        monkeypatch.setenv("APP_ECHO_HISTORY_SEGMENT_SIZE", "64")
+
+    @pytest.mark.parametrize("history_mode", ["none", "full"])
+    @pytest.mark.parametrize("history_length", HISTORY_LENGTHS)
+    def test_echo_and_history_cost(
+        self,
+        fake_actor_runtime,
+        echo_agent_executor,
+        history_length: int,
+        history_mode: str,
+    ) -> None:
+        (
+            echo_seconds,
+            echo_bytes_written,
+            history_seconds,
+            activation_seconds,
+            activation_bytes_read,
+        ) = measure(
+            fake_actor_runtime, echo_agent_executor, history_length, history_mode
+        )
+        print(
+            f"\nHistory of {history_length}: echo with history {history_mode} "
+            f"{echo_seconds * 1000:.2f} ms, "
+            f"{echo_bytes_written} bytes written; history {history_seconds * 1000:.2f} ms; "
+            f"history after activation {activation_seconds * 1000:.2f} ms, "
+            f"{activation_bytes_read} bytes read"
+        )
+        # With segmented history, an echo only writes the tail segment and the head,
+        # however long the history is.
+        assert echo_bytes_written < 4096
@@ -0,0 +1,64 @@
+import asyncio
+import pstats
+
+import httpx
+
+from py_a2a_dapr import profiling
+from py_a2a_dapr.model.echo_task import (
+    EchoAgentA2AInputMessage,
+    EchoAgentSkills,
+    EchoInput,
+)
+
+
+class TestRequestProfiling:
+    def test_profiles_requests_with_header(
+        self, echo_a2a_app, monkeypatch, tmp_path
+    ) -> None:
+        monkeypatch.setenv("APP_PROFILING_ADMIN_TOKEN", "secret")
+        for name, value in profiling.profiling_settings:
+            monkeypatch.setattr(profiling.profiling_settings, name, value)
+        message = EchoAgentA2AInputMessage(
+            skill=EchoAgentSkills.ECHO,
+            data=EchoInput(thread_id="thread", user_input="Hello"),
+        )
+
+        async def run():
+            async with httpx.AsyncClient(
+                transport=httpx.ASGITransport(app=echo_a2a_app),
+                base_url="http://test",
+            ) as client:
+                unauthorized = await client.get("/admin/profiling")
+                settings = await client.post(
+                    "/admin/profiling",
+                    json={"enabled": True, "directory": str(tmp_path)},
+                    headers={"Authorization": "Bearer secret"},
+                )
+                await client.post(
+                    "/",
+                    json={
+                        "jsonrpc": "2.0",
+                        "id": 1,
+                        "method": "message/send",
+                        "params": {
+                            "message": {
+                                "role": "user",
+                                "messageId": "message",
+                                "parts": [
+                                    {"kind": "text", "text": message.model_dump_json()}
+                                ],
+                            }
+                        },
+                    },
+                    headers={"X-Profile": "1"},
+                )
+                await client.get("/.well-known/agent-card.json")
+                return unauthorized, settings
+
+        unauthorized, settings = asyncio.run(run())
+        assert unauthorized.status_code == 401
+        assert settings.json()["enabled"] is True
+        profiles = list(tmp_path.glob("*.prof"))
+        assert len(profiles) == 1
+        functions = pstats.Stats(str(profiles[0])).stats  # type: ignore[attr-defined]
+        assert any(name == "execute" for _, _, name in functions)
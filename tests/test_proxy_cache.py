@@ -0,0 +1,36 @@
+import time
+from datetime import timedelta
+
+import pytest
+
+from py_a2a_dapr.executor.proxy_cache import ActorProxyCache
+
+
+class TestActorProxyCache:
+    def test_reuses_cached_proxy(self) -> None:
+        cache: ActorProxyCache[object] = ActorProxyCache(max_size=2)
+        proxy = cache.get_or_create(("EchoTaskActor", "a"), object)
+        assert cache.get_or_create(("EchoTaskActor", "a"), object) is proxy
+        assert cache.hits == 1
+        assert cache.misses == 1
+
+    def test_evicts_least_recently_used(self) -> None:
+        cache: ActorProxyCache[object] = ActorProxyCache(max_size=2)
+        proxy_a = cache.get_or_create(("EchoTaskActor", "a"), object)
+        cache.get_or_create(("EchoTaskActor", "b"), object)
+        cache.get_or_create(("EchoTaskActor", "a"), object)
+        cache.get_or_create(("EchoTaskActor", "c"), object)
+        assert len(cache) == 2
+        assert cache.get_or_create(("EchoTaskActor", "a"), object) is proxy_a
+        cache.get_or_create(("EchoTaskActor", "b"), object)
+        assert cache.misses == 4
+
+    def test_expires_entries(self, monkeypatch: pytest.MonkeyPatch) -> None:
+        cache: ActorProxyCache[object] = ActorProxyCache(
+            max_size=2, ttl=timedelta(minutes=1)
+        )
+        proxy = cache.get_or_create(("EchoTaskActor", "a"), object)
+        now = time.monotonic()
+        monkeypatch.setattr(time, "monotonic", lambda: now + 60)
+        assert cache.get_or_create(("EchoTaskActor", "a"), object) is not proxy
+        assert cache.misses == 2
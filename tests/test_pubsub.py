@@ -0,0 +1,172 @@
+import asyncio
+from datetime import datetime, timedelta, timezone
+from uuid import uuid4
+
+import httpx
+from a2a.types import Message, TaskQueryParams, TaskState
+
+from py_a2a_dapr.client.connection import AgentCardCache, create_a2a_client
+from py_a2a_dapr.executor.echo_task import EchoAgentExecutor
+from py_a2a_dapr.model.echo_task import (
+    EchoAgentA2AInputMessage,
+    EchoAgentArtifacts,
+    EchoAgentSkills,
+    EchoInput,
+    QueuedEchoRequest,
+    QueuedEchoResult,
+)
+from py_a2a_dapr.pubsub import (
+    QUEUED_ECHO_RESULTS_TOPIC,
+    QUEUED_ECHO_TOPIC,
+    QueuedEchoSubscriber,
+)
+from py_a2a_dapr.server.echo_a2a import create_app
+
+
+class TestQueuedEcho:
+    def test_completes_task_with_delivered_result(
+        self, fake_actor_runtime, tmp_path
+    ) -> None:
+        # Events are collected instead of published, and delivered by the test.
+        published = []
+
+        async def publish(topic, event) -> None:
+            published.append((topic, event))
+
+        app = create_app(
+            agent_executor=EchoAgentExecutor(
+                actor_proxy_factory=fake_actor_runtime.proxy_factory,
+                publish=publish,
+            )
+        )
+        subscriber = QueuedEchoSubscriber(
+            actor_proxy_factory=fake_actor_runtime.proxy_factory, publish=publish
+        )
+
+        async def run():
+            async with httpx.AsyncClient(
+                transport=httpx.ASGITransport(app=app), base_url="http://test"
+            ) as httpx_client:
+                client = await create_a2a_client(
+                    httpx_client,
+                    "http://test",
+                    await AgentCardCache(tmp_path, timedelta(minutes=5)).get_agent_card(
+                        httpx_client, "http://test"
+                    ),
+                )
+                message_payload = EchoAgentA2AInputMessage(
+                    skill=EchoAgentSkills.QUEUED_ECHO,
+                    data=EchoInput(thread_id="thread", user_input="queued"),
+                )
+                async for response in client.send_message(
+                    Message(
+                        role="user",
+                        parts=[
+                            {"kind": "text", "text": message_payload.model_dump_json()}
+                        ],
+                        message_id=str(uuid4()),
+                    )
+                ):
+                    task = response[0]
+                submitted = task.status.state
+
+                topic, request = published.pop()
+                assert topic == QUEUED_ECHO_TOPIC
+                assert isinstance(request, QueuedEchoRequest)
+                assert request.task_id == task.id
+                # Requests are delivered as the data of CloudEvents, in JSON.
+                status = await subscriber.handle({"data": request.model_dump_json()})
+                assert status == {"status": "SUCCESS"}
+                topic, result = published.pop()
+                assert topic == QUEUED_ECHO_RESULTS_TOPIC
+                result_event = {"data": result.model_dump(mode="json")}
+
+                subscriptions = (await httpx_client.get("/dapr/subscribe")).json()
+                assert [s["topic"] for s in subscriptions] == [
+                    QUEUED_ECHO_RESULTS_TOPIC
+                ]
+                route = subscriptions[0]["route"]
+                statuses = [
+                    (await httpx_client.post(route, json=result_event)).json()
+                    # A result delivered twice does not change the finished task.
+                    for _ in range(2)
+                ] + [(await httpx_client.post(route, json={"data": {}})).json()]
+                return (
+                    submitted,
+                    statuses,
+                    await client.get_task(TaskQueryParams(id=task.id)),
+                )
+
+        submitted, statuses, task = asyncio.run(run())
+        assert submitted == TaskState.submitted
+        assert statuses == [
+            {"status": "SUCCESS"},
+            {"status": "SUCCESS"},
+            {"status": "DROP"},
+        ]
+        assert task.status.state == TaskState.completed
+        current = next(
+            artifact
+            for artifact in task.artifacts
+            if artifact.name == EchoAgentArtifacts.CURRENT
+        )
+        assert current.parts[0].root.data["current"]["user_input"] == "queued"
+        assert [artifact.name for artifact in task.artifacts].count(
+            EchoAgentArtifacts.CURRENT
+        ) == 1
+
+    def test_echoes_delivered_requests(self, fake_actor_runtime) -> None:
+        published = []
+
+        async def publish(topic, event) -> None:
+            published.append(event)
+
+        subscriber = QueuedEchoSubscriber(
+            actor_proxy_factory=fake_actor_runtime.proxy_factory, publish=publish
+        )
+        request = QueuedEchoRequest(
+            task_id="task",
+            context_id="context",
+            input=EchoInput(thread_id="thread", user_input="queued"),
+        )
+        status = asyncio.run(
+            subscriber.handle({"data": request.model_dump(mode="json")})
+        )
+        assert status == {"status": "SUCCESS"}
+        assert published[0].response.current.user_input == "queued"
+        assert asyncio.run(subscriber.handle({"data": "not json"})) == {
+            "status": "DROP"
+        }
+
+    def test_retries_results_for_unknown_tasks_until_too_old(
+        self, echo_a2a_app
+    ) -> None:
+        result = QueuedEchoResult(task_id="unknown", context_id="context", error="")
+        now = datetime.now(timezone.utc)
+
+        async def run():
+            async with httpx.AsyncClient(
+                transport=httpx.ASGITransport(app=echo_a2a_app),
+                base_url="http://test",
+            ) as httpx_client:
+                route = (await httpx_client.get("/dapr/subscribe")).json()[0]["route"]
+                return [
+                    (
+                        await httpx_client.post(
+                            route,
+                            json={"data": result.model_dump(mode="json"), **time},
+                        )
+                    ).json()
+                    for time in (
+                        {"time": now.isoformat()},
+                        {"time": (now - timedelta(hours=1)).isoformat()},
+                        # Results without a time cannot be retried for long.
+                        {},
+                    )
+                ]
+
+        assert asyncio.run(run()) == [
+            {"status": "RETRY"},
+            {"status": "DROP"},
+            {"status": "DROP"},
+        ]
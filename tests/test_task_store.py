@@ -0,0 +1,104 @@
+import asyncio
+from datetime import timedelta
+import sqlite3
+
+from a2a.types import Task, TaskState, TaskStatus
+import pytest
+
+from py_a2a_dapr.server import task_store as task_store_module
+from py_a2a_dapr.server.echo_a2a import create_app
+from py_a2a_dapr.server.task_store import (
+    BoundedInMemoryTaskStore,
+    DaprTaskStore,
+    SQLiteTaskStore,
+)
+
+
+def make_task(task_id: str, state: TaskState) -> Task:
+    return Task(id=task_id, context_id="context", status=TaskStatus(state=state))
+
+
+class TestBoundedInMemoryTaskStore:
+    def test_keeps_most_recently_finished_tasks(self) -> None:
+        store = BoundedInMemoryTaskStore(max_finished_tasks=2)
+
+        async def run():
+            await store.save(make_task("working", TaskState.working))
+            for task_id in ("a", "b", "c"):
+                await store.save(make_task(task_id, TaskState.completed))
+            return [
+                await store.get(task_id) is not None
+                for task_id in ("working", "a", "b", "c")
+            ]
+
+        # Tasks that are not finished are never evicted.
+        assert asyncio.run(run()) == [True, False, True, True]
+
+    def test_finished_tasks_expire(self) -> None:
+        store = BoundedInMemoryTaskStore(finished_task_ttl=timedelta(seconds=0))
+        asyncio.run(store.save(make_task("working", TaskState.working)))
+        asyncio.run(store.save(make_task("completed", TaskState.completed)))
+        assert asyncio.run(store.get("working")) is not None
+        assert asyncio.run(store.get("completed")) is None
+
+
+class TestSQLiteTaskStore:
+    def test_save_get_delete(self, tmp_path) -> None:
+        store = SQLiteTaskStore(str(tmp_path / "tasks.sqlite3"))
+        task = make_task("task", TaskState.working)
+        asyncio.run(store.save(task))
+        assert asyncio.run(store.get("task")) == task
+        asyncio.run(store.delete("task"))
+        assert asyncio.run(store.get("task")) is None
+
+    def test_finished_tasks_expire(self, tmp_path) -> None:
+        store = SQLiteTaskStore(
+            str(tmp_path / "tasks.sqlite3"), finished_task_ttl=timedelta(seconds=-1)
+        )
+        asyncio.run(store.save(make_task("working", TaskState.working)))
+        asyncio.run(store.save(make_task("completed", TaskState.completed)))
+        assert asyncio.run(store.get("working")) is not None
+        assert asyncio.run(store.get("completed")) is None
+
+    def test_connections_are_closed(self, tmp_path, monkeypatch) -> None:
+        connections = []
+        sqlite3_connect = sqlite3.connect
+
+        def connect(path):
+            connections.append(sqlite3_connect(path))
+            return connections[-1]
+
+        monkeypatch.setattr(task_store_module.sqlite3, "connect", connect)
+        store = SQLiteTaskStore(str(tmp_path / "tasks.sqlite3"))
+        asyncio.run(store.save(make_task("task", TaskState.working)))
+        assert asyncio.run(store.get("task")) is not None
+        asyncio.run(store.delete("task"))
+        assert len(connections) == 4
+        for connection in connections:
+            with pytest.raises(sqlite3.ProgrammingError):
+                connection.execute("SELECT 1")
+
+
+class TestDaprTaskStore:
+    def test_client_is_closed_on_shutdown(
+        self, echo_agent_executor, monkeypatch
+    ) -> None:
+        monkeypatch.setenv("APP_A2A_TASK_STORE", "dapr")
+        app = create_app(agent_executor=echo_agent_executor)
+        assert isinstance(app.state.task_store, DaprTaskStore)
+        closed = []
+
+        class Client:
+            async def close(self) -> None:
+                closed.append(True)
+
+        app.state.task_store._client = Client()
+
+        async def run():
+            async with app.router.lifespan_context(app):
+                pass
+
+        asyncio.run(run())
+        assert closed == [True]
+        assert app.state.task_store._client is None
+        assert app.state.push_httpx_client.is_closed
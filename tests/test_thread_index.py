@@ -0,0 +1,72 @@
+import asyncio
+import json
+
+import pytest
+
+
+def call_index(runtime, method, argument, shard="0"):
+    async def run():
+        result = await runtime.invoke_method(
+            "ThreadIndexActor", shard, method, json.dumps(argument).encode()
+        )
+        return json.loads(result) if result else None
+
+    return asyncio.run(run())
+
+
+def stored_state(runtime, shard="0"):
+    return {
+        key: json.loads(value)
+        for (actor_type, actor_id, key), value in runtime.state.items()
+        if (actor_type, actor_id) == ("ThreadIndexActor", shard)
+    }
+
+
+class TestThreadIndexActor:
+    @pytest.fixture(autouse=True)
+    def segment_size(self, monkeypatch) -> None:
+        monkeypatch.setenv("APP_ECHO_THREAD_INDEX_SEGMENT_SIZE", "2")
+
+    def test_segments_are_split_and_dropped(self, fake_actor_runtime) -> None:
+        thread_ids = ["bot-1", "user-3", "user-1", "bot-2", "user-2", "admin"]
+        for thread_id in thread_ids:
+            call_index(fake_actor_runtime, "Add", thread_id)
+        call_index(fake_actor_runtime, "Add", "user-1")
+        assert call_index(fake_actor_runtime, "Find", "") == sorted(thread_ids)
+        assert call_index(fake_actor_runtime, "Find", "user") == [
+            "user-1",
+            "user-2",
+            "user-3",
+        ]
+        assert call_index(fake_actor_runtime, "Find", "bot-2") == ["bot-2"]
+        assert call_index(fake_actor_runtime, "Find", "nobody") == []
+        # No segment holds more thread IDs than the segment size.
+        state = stored_state(fake_actor_runtime)
+        head = state.pop("thread_ids:head")
+        assert len(head["segments"]) == len(state) >= 3
+        assert all(len(segment) <= 2 for segment in state.values())
+
+        asyncio.run(fake_actor_runtime.deactivate_all())
+        for thread_id in ("admin", "bot-1", "bot-2", "user-3"):
+            call_index(fake_actor_runtime, "Remove", thread_id)
+        call_index(fake_actor_runtime, "Remove", "admin")
+        assert call_index(fake_actor_runtime, "Find", "") == ["user-1", "user-2"]
+        # Segments that are emptied are dropped.
+        state = stored_state(fake_actor_runtime)
+        head = state.pop("thread_ids:head")
+        assert head["bounds"][0] == ""
+        assert len(head["segments"]) == len(state)
+        assert all(state.values())
+
+    def test_legacy_thread_ids_are_migrated(self, fake_actor_runtime) -> None:
+        # Shards used to store all their thread IDs as a single sorted list.
+        fake_actor_runtime.state[("ThreadIndexActor", "0", "thread_ids")] = json.dumps(
+            ["a", "b", "c", "d", "e"]
+        ).encode()
+        assert call_index(fake_actor_runtime, "Find", "") == ["a", "b", "c", "d", "e"]
+        state = stored_state(fake_actor_runtime)
+        assert "thread_ids" not in state
+        assert state["thread_ids:head"]["bounds"] == ["", "c", "e"]
+        call_index(fake_actor_runtime, "Add", "bb")
+        asyncio.run(fake_actor_runtime.deactivate_all())
+        assert call_index(fake_actor_runtime, "Find", "b") == ["b", "bb"]